@@ -0,0 +1,91 @@
+"""
+Import-time benchmark for the Editor package.
+
+Each measurement is taken in a fresh interpreter, so the numbers reflect the
+cold-start cost paid by a new worker process. For each target the script
+reports the best and median import time, and which of the heavy optional
+dependencies were loaded as a side effect.
+
+Run from the `Editor` directory:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules that should only be loaded when a feature that needs them is used
+HEAVY = ['bleach', 'validators', 'sqlalchemy.orm', 'flask']
+
+TARGETS = [
+    'import website.editor',
+    'from website.editor import Formatter',
+    'from website.editor import Editor',
+    'from website.editor import Editor, Field, Validate',
+    'from website import create_app',
+]
+
+SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+exec(%r)
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "time": elapsed,
+    "modules": len(sys.modules),
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+'''
+
+
+def measure(statement, runs):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = []
+
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-X', 'frozen_modules=off', '-c',
+             SCRIPT % (statement, HEAVY)],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        results.append(json.loads(out.stdout))
+
+    times = [r['time'] * 1000 for r in results]
+
+    return {
+        'best': min(times),
+        'median': statistics.median(times),
+        'modules': results[-1]['modules'],
+        'loaded': results[-1]['loaded'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=10,
+                        help='fresh interpreters to start per target')
+    args = parser.parse_args()
+
+    print('%-52s %9s %9s %8s  %s' %
+          ('statement', 'best ms', 'median ms', 'modules', 'heavy loaded'))
+
+    for statement in TARGETS:
+        r = measure(statement, args.runs)
+        print('%-52s %9.1f %9.1f %8d  %s' % (
+            statement,
+            r['best'],
+            r['median'],
+            r['modules'],
+            ', '.join(r['loaded']) or '-'
+        ))
+
+
+if __name__ == '__main__':
+    main()
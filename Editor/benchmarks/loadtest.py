@@ -0,0 +1,540 @@
+"""
+Load test for the Flask demo app.
+
+A fresh SQLite database is seeded with the tables used by the `staff`, `join`,
+`joinLinkTable`, `compoundKey` and `cascadingLists` controllers, and the app
+from `create_app()` is driven with a mix of read, create, edit and remove
+requests from a number of concurrent workers - either through Flask's WSGI
+test client (the default, no network) or over HTTP to a local server run in
+the same process.
+
+For each endpoint and action the number of requests, errors, latency
+percentiles and the mean number of SQL statements per request are reported,
+along with the overall throughput. `--json` writes the same figures to a file,
+so that runs before and after a change can be compared.
+
+Rows are only removed if they were created by the test, so that edits always
+have rows to work on. Edits keep the primary key of the row.
+
+Run from the `Editor` directory:
+
+    python benchmarks/loadtest.py
+    python benchmarks/loadtest.py --concurrency 8 --duration 30
+    python benchmarks/loadtest.py --server --mix read=50,create=20,edit=20,remove=10
+    python benchmarks/loadtest.py --endpoints staff,compoundKey --json after.json
+"""
+import argparse
+import contextlib
+import datetime
+import itertools
+import json
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, '.')
+
+SCHEMA = '''
+CREATE TABLE datatables_demo (id INTEGER PRIMARY KEY AUTOINCREMENT, first_name TEXT, last_name TEXT, position TEXT, email TEXT, office TEXT, start_date TEXT, age INTEGER, salary INTEGER, seq INTEGER, extn TEXT);
+CREATE TABLE sites (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT);
+CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, first_name TEXT, last_name TEXT, phone TEXT, city TEXT, zip TEXT, updated_date TEXT, registered_date TEXT, removed_date TEXT, active INTEGER, manager INTEGER, site INTEGER, image INTEGER, shift_start TEXT, shift_end TEXT, description TEXT);
+CREATE TABLE dept (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT);
+CREATE TABLE user_dept (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, dept_id INTEGER);
+CREATE TABLE users_visits (user_id INTEGER NOT NULL, site_id INTEGER NOT NULL, visit_date TEXT NOT NULL, PRIMARY KEY (user_id, visit_date));
+CREATE TABLE continent (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT);
+CREATE TABLE country (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, continent INTEGER);
+CREATE TABLE team (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, continent INTEGER, country INTEGER);
+'''
+
+SITES = ['Edinburgh', 'London', 'New York', 'Paris', 'Singapore', 'Los Angeles']
+DEPTS = ['IT', 'Sales', 'Pre-Sales', 'Marketing', 'Senior Management', 'Accounts', 'Support']
+CONTINENTS = [('Africa', ['Egypt', 'Kenya']), ('Asia', ['Japan', 'India']),
+              ('Europe', ['France', 'United Kingdom']), ('North America', ['Canada', 'Mexico'])]
+OFFICES = ['Edinburgh', 'London', 'New York', 'Tokyo', 'San Francisco']
+
+ACTIONS = ['read', 'create', 'edit', 'remove']
+
+# Unique numbers for the values of created rows
+_serial = itertools.count(1)
+
+
+def seed(path, rows):
+    """
+    Create the database and fill it with `rows` staff and users.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+
+    con = sqlite3.connect(path)
+
+    # WAL lets the reads carry on while another worker is writing
+    con.execute('PRAGMA journal_mode=WAL')
+    con.executescript(SCHEMA)
+
+    for i in range(1, rows + 1):
+        con.execute(
+            'INSERT INTO datatables_demo (first_name, last_name, position, email, office, start_date, age, salary, extn) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            ('First%d' % i, 'Last%d' % i, 'Developer' if i % 4 else '', 'staff%d@example.com' % i,
+             OFFICES[i % len(OFFICES)], (datetime.date(2010, 1, 1) + datetime.timedelta(days=i)).isoformat(),
+             20 + i % 45, 40000 + i * 10, str(1000 + i % 1000)))
+
+    con.executemany('INSERT INTO sites (name) VALUES (?)', [(s,) for s in SITES])
+    con.executemany('INSERT INTO dept (name) VALUES (?)', [(d,) for d in DEPTS])
+
+    for i in range(1, rows + 1):
+        con.execute(
+            'INSERT INTO users (first_name, last_name, phone, city, zip, active, manager, site) '
+            'VALUES (?, ?, ?, ?, ?, 1, 1, ?)',
+            ('User%d' % i, 'Surname%d' % i, '555-%04d' % i, 'City', '00000', i % len(SITES) + 1))
+        con.execute('INSERT INTO user_dept (user_id, dept_id) VALUES (?, ?)', (i, i % len(DEPTS) + 1))
+        con.execute('INSERT INTO users_visits (user_id, site_id, visit_date) VALUES (?, ?, ?)',
+                    (i, i % len(SITES) + 1, (datetime.date(2020, 1, 1) + datetime.timedelta(days=i)).isoformat()))
+
+    for continent, countries in CONTINENTS:
+        id = con.execute('INSERT INTO continent (name) VALUES (?)', (continent,)).lastrowid
+        con.executemany('INSERT INTO country (name, continent) VALUES (?, ?)', [(c, id) for c in countries])
+
+    for i in range(1, rows // 10 + 2):
+        con.execute('INSERT INTO team (name, continent, country) VALUES (?, ?, ?)',
+                    ('Team %d' % i, i % 4 + 1, i % 8 + 1))
+
+    con.commit()
+    con.close()
+
+
+#
+# The values to submit for each endpoint. `create` is given a serial number
+# and `edit` the row being edited (as read from the endpoint) as well
+#
+
+def staff_create(n):
+    return {
+        'first_name': 'Load%d' % n, 'last_name': 'Test', 'position': 'Tester',
+        'office': OFFICES[n % len(OFFICES)], 'extn': str(1000 + n % 1000),
+        'start_date': '2024-01-%02d' % (n % 28 + 1), 'salary': str(50000 + n)
+    }
+
+
+def staff_edit(row, n):
+    return dict(staff_create(n), first_name=row['first_name'], last_name='Edit%d' % n)
+
+
+def join_create(n):
+    return {'users': {'first_name': 'Load%d' % n, 'last_name': 'Test', 'phone': '555-0000',
+                      'site': str(n % len(SITES) + 1)}}
+
+
+def join_edit(row, n):
+    return {'users': dict(row['users'], phone='555-%04d' % (n % 10000), site=str(n % len(SITES) + 1))}
+
+
+def link_edit(row, n):
+    return dict(join_edit(row, n), user_dept={'dept_id': str(n % len(DEPTS) + 1)})
+
+
+def visit_create(n):
+    # Unique dates, so the compound key and the "already busy" check pass
+    return {'users_visits': {
+        'user_id': '1', 'site_id': str(n % len(SITES) + 1),
+        'visit_date': (datetime.date(2040, 1, 1) + datetime.timedelta(days=n)).isoformat()}}
+
+
+def visit_edit(row, n):
+    return {'users_visits': dict(row['users_visits'], site_id=str(n % len(SITES) + 1))}
+
+
+def team_create(n):
+    return {'team': {'name': 'Load %d' % n, 'continent': str(n % 4 + 1), 'country': str(n % 8 + 1)}}
+
+
+def team_edit(row, n):
+    return {'team': dict(row['team'], name='Edit %d' % n)}
+
+
+ENDPOINTS = {
+    'staff': {'create': staff_create, 'edit': staff_edit},
+    'join': {'create': join_create, 'edit': join_edit},
+    'joinLinkTable': {'create': None, 'edit': link_edit},
+    'compoundKey': {'create': visit_create, 'edit': visit_edit},
+    'cascadingLists': {'create': team_create, 'edit': team_edit},
+}
+
+
+def form(action, rows):
+    """
+    Encode a request the way the Editor client does, as form parameters such
+    as `data[row_1][users][first_name]`.
+    """
+    params = {'action': action}
+
+    def add(prefix, value):
+        if isinstance(value, dict):
+            for key, val in value.items():
+                add(prefix + '[' + key + ']', val)
+        else:
+            params[prefix] = '' if value is None else str(value)
+
+    for id, values in rows.items():
+        add('data[' + id + ']', values)
+
+    return params
+
+
+def percentile(values, p):
+    """
+    Percentile of sorted values, interpolating between the nearest two.
+    """
+    if len(values) == 0:
+        return 0.0
+
+    pos = (len(values) - 1) * p / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+class StatementCounter:
+    """
+    WSGI middleware counting the SQL statements run for each request, returned
+    in an `X-Editor-Statements` header. A request is handled in a single
+    thread by both the test client and the server, so the count is kept per
+    thread.
+    """
+
+    header = 'X-Editor-Statements'
+
+    def __init__(self, app, engine):
+        import sqlalchemy
+
+        self.app = app
+        self.local = threading.local()
+
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', self.count)
+
+    def count(self, *args):
+        self.local.count = getattr(self.local, 'count', 0) + 1
+
+    def __call__(self, environ, start_response):
+        self.local.count = 0
+
+        def start(status, headers, *args):
+            return start_response(status, headers + [(self.header, str(self.local.count))], *args)
+
+        return self.app(environ, start)
+
+
+class TestClient:
+    """
+    Requests through Flask's test client - one per worker.
+    """
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, url, params):
+        if params is None:
+            res = self.client.get(url)
+        else:
+            res = self.client.post(url, data=params)
+
+        return res.status_code, res.get_data(), res.headers.get(StatementCounter.header)
+
+
+class HttpClient:
+    """
+    Requests over HTTP to a server.
+    """
+
+    def __init__(self, base):
+        self.base = base
+
+    def request(self, url, params):
+        body = None if params is None else urllib.parse.urlencode(params).encode()
+
+        try:
+            with urllib.request.urlopen(self.base + url, body) as res:
+                return res.status, res.read(), res.headers.get(StatementCounter.header)
+        except urllib.error.HTTPError as e:
+            return e.code, e.read(), e.headers.get(StatementCounter.header)
+
+
+class Workload:
+    """
+    The rows of each endpoint, and the choice of the next request.
+    """
+
+    def __init__(self, endpoints, mix, seed):
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.rows = {}
+        self.created = {name: [] for name in endpoints}
+        self.ops = []
+        self.weights = []
+
+        for name in endpoints:
+            for action in ACTIONS:
+                weight = mix.get(action, 0)
+
+                # Endpoints which can't create rows have none to remove
+                if action in ('create', 'remove') and ENDPOINTS[name]['create'] is None:
+                    continue
+
+                if weight > 0:
+                    self.ops.append((name, action))
+                    self.weights.append(weight)
+
+    def load(self, name, response):
+        """
+        Keep the rows read from an endpoint, to be edited.
+        """
+        self.rows[name] = json.loads(response)['data']
+
+    def next(self):
+        """
+        Choose the next request.
+
+        :return: Tuple of the endpoint, action and request parameters (None
+            for a `GET`)
+        """
+        with self.lock:
+            name, action = self.random.choices(self.ops, self.weights)[0]
+            n = next(_serial)
+
+            # Nothing created to remove yet, so create something instead
+            if action == 'remove' and len(self.created[name]) == 0:
+                action = 'create'
+
+            if action == 'read':
+                return name, action, None
+
+            if action == 'create':
+                return name, action, form('create', {'0': ENDPOINTS[name]['create'](n)})
+
+            if action == 'edit':
+                row = self.random.choice(self.rows[name])
+                return name, action, form('edit', {row['DT_RowId']: ENDPOINTS[name]['edit'](row, n)})
+
+            id = self.created[name].pop(self.random.randrange(len(self.created[name])))
+            return name, action, form('remove', {id: {'DT_RowId': id}})
+
+    def done(self, name, action, response):
+        """
+        Note the rows created by a request, so they can be removed later.
+        """
+        if action == 'create':
+            with self.lock:
+                self.created[name] += [row['DT_RowId'] for row in response.get('data', [])]
+
+
+def worker(client, workload, stop, results, warmup):
+    """
+    Make requests until stopped. The first `warmup` requests of each worker
+    aren't recorded.
+    """
+    made = 0
+
+    while not stop():
+        name, action, params = workload.next()
+        start = time.perf_counter()
+        status, body, statements = client.request('/api/' + name, params)
+        elapsed = time.perf_counter() - start
+        made += 1
+
+        try:
+            response = json.loads(body)
+        except ValueError:
+            response = {}
+
+        error = status != 200 or bool(response.get('error')) or bool(response.get('fieldErrors'))
+
+        if not error:
+            workload.done(name, action, response)
+
+        if made > warmup:
+            results.append((name, action, elapsed, error,
+                            int(statements) if statements is not None else None))
+
+
+def report(results, elapsed, concurrency):
+    """
+    Summarise the results by endpoint and action.
+    """
+    groups = {}
+
+    for name, action, seconds, error, statements in results:
+        groups.setdefault((name, action), []).append((seconds, error, statements))
+
+    groups[('all', '')] = [(r[2], r[3], r[4]) for r in results]
+    rows = []
+
+    for (name, action), group in groups.items():
+        times = sorted(g[0] for g in group)
+        counts = [g[2] for g in group if g[2] is not None]
+
+        rows.append({
+            'endpoint': name,
+            'action': action,
+            'requests': len(group),
+            'errors': sum(1 for g in group if g[1]),
+            'rps': len(group) / elapsed if elapsed else 0.0,
+            'mean': sum(times) / len(times) if len(times) else 0.0,
+            'p50': percentile(times, 50),
+            'p90': percentile(times, 90),
+            'p99': percentile(times, 99),
+            'max': times[-1] if len(times) else 0.0,
+            'statements': sum(counts) / len(counts) if len(counts) else None,
+        })
+
+    rows.sort(key=lambda r: (r['endpoint'] == 'all', r['endpoint'], ACTIONS.index(r['action'])
+                             if r['action'] in ACTIONS else 0))
+
+    return {'elapsed': elapsed, 'concurrency': concurrency, 'results': rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=2000,
+                        help='number of requests to make (default 2000)')
+    parser.add_argument('--duration', type=float,
+                        help='run for this many seconds instead of a number of requests')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='number of concurrent workers (default 4)')
+    parser.add_argument('--mix', default='read=70,create=10,edit=15,remove=5',
+                        help='relative weights of the actions (default read=70,create=10,edit=15,remove=5)')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS),
+                        help='endpoints to use (default all of %s)' % ', '.join(ENDPOINTS))
+    parser.add_argument('--rows', type=int, default=500,
+                        help='number of staff and users to seed (default 500)')
+    parser.add_argument('--server', action='store_true',
+                        help='make the requests over HTTP to a local server, rather than the test client')
+    parser.add_argument('--db', help='database file to create (default a temporary file)')
+    parser.add_argument('--warmup', type=int, default=10,
+                        help='requests per worker that are not recorded (default 10)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed (default 1)')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--verbose', action='store_true',
+                        help='show the output of the controllers, which is hidden by default')
+    args = parser.parse_args()
+
+    mix = {}
+
+    for part in args.mix.split(','):
+        action, _, weight = part.partition('=')
+
+        if action not in ACTIONS:
+            parser.error('Unknown action `' + action + '` in --mix')
+
+        mix[action] = float(weight)
+
+    endpoints = [e for e in args.endpoints.split(',') if e]
+
+    for name in endpoints:
+        if name not in ENDPOINTS:
+            parser.error('Unknown endpoint `' + name + '`')
+
+    directory = None
+
+    if args.db is None:
+        directory = tempfile.mkdtemp()
+        args.db = os.path.join(directory, 'loadtest.db')
+
+    seed(args.db, args.rows)
+
+    # Read by `controllers.db` when it creates the engine, so must be set
+    # before the app is imported
+    os.environ['EDITOR_DB'] = args.db
+
+    from website import create_app
+    from website.controllers.db import db
+
+    db.echo = args.verbose
+
+    app = create_app()
+    app.wsgi_app = StatementCounter(app.wsgi_app, db)
+    server = None
+
+    if args.server:
+        from werkzeug.serving import make_server
+
+        if not args.verbose:
+            logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = 'http://127.0.0.1:%d' % server.server_port
+        clients = [HttpClient(base) for _ in range(args.concurrency)]
+    else:
+        clients = [TestClient(app) for _ in range(args.concurrency)]
+
+    workload = Workload(endpoints, mix, args.seed)
+    results = []
+    out = sys.stdout if args.verbose else open(os.devnull, 'w')
+
+    with contextlib.redirect_stdout(out):
+        for name in endpoints:
+            workload.load(name, clients[0].request('/api/' + name, None)[1])
+
+        made = itertools.count(1)
+        total = args.requests + args.warmup * args.concurrency
+        end = None if args.duration is None else time.perf_counter() + args.duration
+
+        if end is None:
+            stop = lambda: next(made) > total
+        else:
+            stop = lambda: time.perf_counter() >= end
+
+        threads = [threading.Thread(target=worker, args=(client, workload, stop, results, args.warmup))
+                   for client in clients]
+        start = time.perf_counter()
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.perf_counter() - start
+
+    if server is not None:
+        server.shutdown()
+
+    if out is not sys.stdout:
+        out.close()
+
+    summary = report(results, elapsed, args.concurrency)
+
+    print('%d requests in %.2fs with %d workers (%s)' % (
+        len(results), elapsed, args.concurrency, 'local server' if args.server else 'test client'))
+    print('')
+    print('%-15s %-7s %8s %7s %8s %9s %9s %9s %9s %6s' % (
+        'endpoint', 'action', 'requests', 'errors', 'req/s', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms', 'stmts'))
+
+    for row in summary['results']:
+        print('%-15s %-7s %8d %7d %8.1f %9.2f %9.2f %9.2f %9.2f %6s' % (
+            row['endpoint'], row['action'], row['requests'], row['errors'], row['rps'],
+            row['p50'] * 1000, row['p90'] * 1000, row['p99'] * 1000, row['max'] * 1000,
+            '-' if row['statements'] is None else '%.1f' % row['statements']))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(dict(summary, args=vars(args)), f, indent=2)
+
+    if directory is not None:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
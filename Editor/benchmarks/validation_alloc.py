@@ -0,0 +1,170 @@
+"""
+Allocation benchmark for multi-row validation.
+
+Validates a large multi-row `create` submission two ways and reports how many
+`ValidationHost` objects were created and how long it took:
+
+* `per value` - a new `ValidationHost` for each field of each row, as
+  `Field._validate` does when called without a host.
+* `per field` - one `ValidationHost` per field for the request, updated in
+  place for each row, as `Editor` now does.
+
+It then uses `tracemalloc` to compare the memory held by many slotted
+`ValidationHost` instances with a dict-backed equivalent, and shows the size
+of each slotted class against the same attributes held in a `__dict__`.
+No database is needed.
+
+Run from the `Editor` directory:
+
+    python benchmarks/validation_alloc.py
+    python benchmarks/validation_alloc.py --rows 50000 --fields 20
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, '.')
+
+from website.editor import (Action, Editor, Field, Options, ValidationHost,
+                            ValidationOptions, Validate)
+
+
+class DictHost:
+    """ValidationHost as it was before `__slots__`, for comparison"""
+
+    def __init__(self, action=None, id=None, field=None, editor=None):
+        self.action = action
+        self.id = id
+        self.field = field
+        self.editor = editor
+
+
+class Plain:
+    """Empty dict-backed class, filled with the attributes of a slotted one"""
+
+
+def instance_sizes(obj):
+    plain = Plain()
+
+    for name in type(obj).__slots__:
+        setattr(plain, name, getattr(obj, name, None))
+
+    return (
+        sys.getsizeof(obj),
+        sys.getsizeof(plain) + sys.getsizeof(plain.__dict__)
+    )
+
+
+def build(fields):
+    editor = Editor(None, 'bench')
+
+    for i in range(fields):
+        editor.field(
+            Field('f' + str(i))
+                .validator(Validate.not_empty())
+                .validator(Validate.min_len(1))
+        )
+
+    return editor
+
+
+def submission(rows, fields):
+    return {
+        'action': 'create',
+        'data': {
+            str(r): {'f' + str(i): 'value ' + str(r) for i in range(fields)}
+            for r in range(rows)
+        }
+    }
+
+
+def per_value(editor, data):
+    errors = []
+
+    for id, values in data['data'].items():
+        for field in editor.fields():
+            res = field._validate(values, editor, id, Action.CREATE)
+            if res != True:
+                errors.append(res)
+
+    return errors
+
+
+def per_field(editor, data):
+    errors = []
+    editor._validate(errors, data, Action.CREATE)
+
+    return errors
+
+
+def count_hosts(fn, editor, data):
+    created = [0]
+    init = ValidationHost.__init__
+
+    def counting(self, *args, **kwargs):
+        created[0] += 1
+        init(self, *args, **kwargs)
+
+    ValidationHost.__init__ = counting
+
+    try:
+        start = time.perf_counter()
+        errors = fn(editor, data)
+        elapsed = time.perf_counter() - start
+    finally:
+        ValidationHost.__init__ = init
+
+    return len(errors), created[0], elapsed
+
+
+def held(factory, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    objects = [factory(i) for i in range(count)]
+
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    del objects
+
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--fields', type=int, default=10)
+    parser.add_argument('--instances', type=int, default=100000)
+    args = parser.parse_args()
+
+    editor = build(args.fields)
+    data = submission(args.rows, args.fields)
+
+    print('Validation of %d rows x %d fields' % (args.rows, args.fields))
+    print('  %-10s %8s %14s %9s' % ('hosts', 'errors', 'hosts created', 'ms'))
+
+    for name, fn in (('per value', per_value), ('per field', per_field)):
+        errors, created, elapsed = count_hosts(fn, editor, data)
+        print('  %-10s %8d %14d %9.1f' % (name, errors, created, elapsed * 1000))
+
+    print()
+    print('Memory held by %d hosts (bytes)' % args.instances)
+
+    for name, factory in (
+        ('DictHost', lambda i: DictHost('create', str(i))),
+        ('ValidationHost', lambda i: ValidationHost('create', str(i))),
+    ):
+        print('  %-18s %12d' % (name, held(factory, args.instances)))
+
+    print()
+    print('Instance size, excluding attribute values (bytes)')
+    print('  %-18s %8s %8s' % ('class', 'slots', 'dict'))
+
+    for obj in (Field('a'), Options(), ValidationHost(), ValidationOptions()):
+        slotted, plain = instance_sizes(obj)
+        print('  %-18s %8d %8d' % (type(obj).__name__, slotted, plain))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""
+Tests for Editor's request processing, run against a temporary SQLite
+database.
+
+Run from the `Editor` directory:
+
+    python -m unittest discover tests
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import sqlalchemy
+
+from website.editor import ChangeLog, Editor, EventContext, EventQueue, Field, Metrics
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """
+    Base class giving each test a fresh database with a `sites` table.
+    """
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+
+        con = sqlite3.connect(self.path)
+        con.executescript('''
+            CREATE TABLE sites (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT);
+            INSERT INTO sites (name) VALUES ('Edinburgh'), ('London'), ('Paris');
+        ''')
+        con.commit()
+        con.close()
+
+        self.db = sqlalchemy.create_engine('sqlite:///' + self.path)
+
+    def tearDown(self):
+        self.db.dispose()
+        os.remove(self.path)
+
+    def rows(self, sql):
+        with self.db.connect() as connection:
+            return [tuple(row) for row in connection.exec_driver_sql(sql)]
+
+
+class PreEventTest(DatabaseTestCase):
+
+    def test_cancel_in_pre_create(self):
+        # Cancelling a row removes it from the submitted data, which used to
+        # be done while iterating over it
+        def pre_create(editor, values):
+            return values['name'] != 'Skip'
+
+        editor = Editor(self.db, 'sites').fields([Field('name')]).on('preCreate', pre_create)
+        out = editor.process({'action': 'create', 'data': {
+            '0': {'name': 'Skip'}, '1': {'name': 'Rome'}}})
+
+        self.assertEqual(out['cancelled'], ['0'])
+        self.assertEqual([row['name'] for row in out['data']], ['Rome'])
+        self.assertEqual(self.rows('SELECT name FROM sites WHERE id > 3'), [('Rome',)])
+
+    def test_nested_data_not_changed(self):
+        editor = Editor(self.db, 'sites').fields([Field('name')])
+        editor.on('preEdit', lambda editor, id, values: False)
+        data = {'action': 'edit', 'data': {'row_1': {'name': 'Glasgow'}}}
+
+        out = editor.process(data)
+
+        self.assertEqual(out['cancelled'], ['row_1'])
+        self.assertEqual(data, {'action': 'edit', 'data': {'row_1': {'name': 'Glasgow'}}})
+
+    def test_cancel_in_pre_edit(self):
+        def pre_edit(editor, id, values):
+            return id != '1'
+
+        editor = Editor(self.db, 'sites').fields([Field('name')]).on('preEdit', pre_edit)
+        out = editor.process({'action': 'edit', 'data': {
+            'row_1': {'name': 'A'}, 'row_2': {'name': 'B'}}})
+
+        self.assertEqual(out['cancelled'], ['row_1'])
+        self.assertEqual(self.rows('SELECT name FROM sites ORDER BY id'),
+                         [('Edinburgh',), ('B',), ('Paris',)])
+
+
+class RemoveTest(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        con = sqlite3.connect(self.path)
+        con.executescript('''
+            CREATE TABLE site_log (site_id INTEGER);
+            CREATE TRIGGER no_paris BEFORE DELETE ON sites WHEN old.name = 'Paris'
+            BEGIN SELECT RAISE(ABORT, 'Paris can not be removed'); END;
+        ''')
+        con.commit()
+        con.close()
+
+    def test_failed_remove_is_rolled_back(self):
+        class Join:
+            # Stands in for a row based join, writing to its link table
+            def remove(self, editor, ids):
+                for id in ids:
+                    editor._session.execute(sqlalchemy.text(
+                        'INSERT INTO site_log (site_id) VALUES (:id)'), {'id': id})
+
+        metrics = Metrics()
+        editor = Editor(self.db, 'sites').fields([Field('name')]).join([Join()]).metrics(metrics)
+        out = editor.process({'action': 'remove', 'data': {
+            'row_1': {'name': 'Edinburgh'}, 'row_3': {'name': 'Paris'}}})
+
+        self.assertIn('Paris can not be removed', out['error'])
+        self.assertEqual(len(self.rows('SELECT * FROM sites')), 3)
+        self.assertEqual(self.rows('SELECT * FROM site_log'), [])
+        self.assertNotIn('editor_rows_written_total{', metrics.render())
+
+    def test_failed_join_remove_is_rolled_back(self):
+        class Join:
+            def remove(self, editor, ids):
+                editor._session.execute(sqlalchemy.text('INSERT INTO site_log (site_id) VALUES (1)'))
+                editor._session.execute(sqlalchemy.text('INSERT INTO no_such_table VALUES (1)'))
+
+        editor = Editor(self.db, 'sites').fields([Field('name')]).join([Join()])
+        out = editor.process({'action': 'remove', 'data': {'row_1': {'name': 'Edinburgh'}}})
+
+        self.assertIn('error', out)
+        self.assertEqual(len(self.rows('SELECT * FROM sites')), 3)
+        self.assertEqual(self.rows('SELECT * FROM site_log'), [])
+
+    def test_remove(self):
+        metrics = Metrics()
+        editor = Editor(self.db, 'sites').fields([Field('name')]).metrics(metrics)
+        out = editor.process({'action': 'remove', 'data': {
+            'row_1': {'name': 'Edinburgh'}, 'row_2': {'name': 'London'}}})
+
+        self.assertNotIn('error', out)
+        self.assertEqual(self.rows('SELECT name FROM sites'), [('Paris',)])
+        self.assertIn('editor_rows_written_total{table="sites",action="remove"} 2', metrics.render())
+
+
+class DeltaTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        with self.db.begin() as connection:
+            connection.exec_driver_sql('ALTER TABLE sites ADD COLUMN updated INTEGER')
+            connection.exec_driver_sql('UPDATE sites SET updated = 9 WHERE id < 3')
+            connection.exec_driver_sql('UPDATE sites SET updated = 11 WHERE id = 3')
+
+    def read(self, since):
+        editor = Editor(self.db, 'sites').fields([Field('name')]).updated_at('updated')
+
+        return editor.process({'draw': '1', 'since': since})
+
+    def test_since_includes_same_instant(self):
+        out = self.read('11')
+
+        self.assertTrue(out['delta'])
+        self.assertEqual([row['name'] for row in out['data']], ['Paris'])
+        self.assertEqual(out['version'], '11')
+
+    def test_invalid_since_is_full_read(self):
+        out = self.read('yesterday')
+
+        self.assertFalse(out['delta'])
+        self.assertEqual(len(out['data']), 3)
+
+    def test_change_log_after_commit(self):
+        log = ChangeLog()
+        editor = Editor(self.db, 'sites').fields([Field('name')]).change_log(log)
+        editor.process({'action': 'edit', 'data': {'row_1': {'name': 'Glasgow'}}})
+
+        self.assertEqual(log.since(0), (['1'], [], 1))
+
+        def fail(editor, id, values):
+            raise Exception('Failed')
+
+        editor = Editor(self.db, 'sites').fields([Field('name')]).change_log(log)
+        editor.on('writeEdit', fail)
+
+        with self.assertRaises(Exception):
+            editor.process({'action': 'edit', 'data': {'row_2': {'name': 'Leeds'}}})
+
+        # Which rows were written isn't known, so clients are told to reload
+        self.assertIsNone(log.since(1))
+
+
+class SessionTest(DatabaseTestCase):
+    def test_session_closed(self):
+        editor = Editor(self.db, 'sites').fields([Field('name')])
+        editor.process({'action': 'edit', 'data': {'row_1': {'name': 'Glasgow'}}})
+
+        self.assertIsNone(editor._Editor__session)
+        self.assertEqual(self.db.pool.checkedout(), 0)
+
+
+class ConfigurationTest(DatabaseTestCase):
+    def test_field_change_after_use(self):
+        name = Field('name')
+        editor = Editor(self.db, 'sites').fields([name])
+        editor.process({'action': 'edit', 'data': {'row_1': {'name': 'Glasgow'}}})
+
+        # The write routes cached by the first edit are rebuilt
+        name.set(False)
+        editor.process({'action': 'edit', 'data': {'row_2': {'name': 'Leeds'}}})
+
+        self.assertEqual(self.rows('SELECT name FROM sites ORDER BY id'),
+                         [('Glasgow',), ('London',), ('Paris',)])
+
+    def test_frozen_fields_refuse_changes(self):
+        name = Field('name')
+        Editor(self.db, 'sites').fields([name]).freeze()
+
+        with self.assertRaises(Exception):
+            name.set(False)
+
+        with self.assertRaises(Exception):
+            name.db_field('sites.name')
+
+
+class EventQueueTest(DatabaseTestCase):
+    def test_background_handler_context(self):
+        queue = EventQueue(workers=1)
+        seen = []
+
+        def post_edit(context, id, values, row):
+            with context.db().connect() as connection:
+                name = connection.exec_driver_sql('SELECT name FROM sites WHERE id = ' + id).scalar()
+
+            seen.append((type(context), context.table(), name))
+
+        editor = Editor(self.db, 'sites').fields([Field('name')]).event_queue(queue)
+        editor.on('postEdit', post_edit)
+        editor.process({'action': 'edit', 'data': {'row_1': {'name': 'Glasgow'}}})
+
+        self.assertTrue(queue.wait(5))
+        queue.shutdown()
+
+        self.assertEqual(seen, [(EventContext, ['sites'], 'Glasgow')])
+
+
+class JsonStreamTest(DatabaseTestCase):
+    def test_chunks(self):
+        editor = Editor(self.db, 'sites').fields([Field('name')])
+        out = editor.process({'draw': '1'})
+        whole = json.loads(editor.json(out))
+
+        for chunk in (None, 1, 2, 1000):
+            self.assertEqual(json.loads(b''.join(editor.json_stream(out, chunk))), whole)
+
+        with self.assertRaises(ValueError):
+            editor.json_stream(out, 0)
+
+
+class FieldTest(unittest.TestCase):
+    def test_recompile_on_rename(self):
+        field = Field('sites.name')
+        field.db_field('sites.title').name('site.title')
+        out = {}
+
+        field._write(out, {'sites.name': 'Edinburgh', 'sites.title': 'London'})
+
+        self.assertEqual(out, {'site': {'title': 'London'}})
+        self.assertEqual(field._db_parts, (None, 'sites', 'title'))
+
+
+if __name__ == '__main__':
+    unittest.main()
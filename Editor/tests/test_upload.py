@@ -0,0 +1,77 @@
+"""
+Tests for file uploads, run against a temporary SQLite database and upload
+directory.
+
+Run from the `Editor` directory:
+
+    python -m unittest discover tests
+"""
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import sqlalchemy
+
+from website.editor import Editor, Upload
+
+
+class File:
+    """
+    Uploaded file, as Werkzeug's `FileStorage` gives it.
+    """
+
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.stream = io.BytesIO(data)
+
+
+class UploadTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.uploads = os.path.join(self.dir, 'uploads')
+        self.db = sqlalchemy.create_engine(
+            'sqlite:///' + os.path.join(self.dir, 'test.db'))
+
+        with self.db.begin() as connection:
+            connection.exec_driver_sql(
+                'CREATE TABLE sites (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT)')
+            connection.exec_driver_sql(
+                'CREATE TABLE files (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT)')
+
+    def tearDown(self):
+        self.db.dispose()
+        shutil.rmtree(self.dir)
+
+    def rows(self, sql):
+        with self.db.connect() as connection:
+            return [tuple(row) for row in connection.exec_driver_sql(sql)]
+
+    def store(self, filename):
+        upload = Upload(os.path.join(self.uploads, '__NAME__')) \
+            .db('files', 'id', {'name': Upload.DB_FILE_NAME})
+
+        return upload._exec(Editor(self.db, 'sites'), File(filename, b'data'))
+
+    def test_name(self):
+        id, error = self.store('../notes.txt')
+
+        self.assertIsNone(error)
+        self.assertEqual(os.listdir(self.uploads), ['notes.txt'])
+        self.assertEqual(self.rows('SELECT name FROM files'), [('notes.txt',)])
+
+    def test_invalid_names_are_replaced(self):
+        for filename in ('..', '.', 'dir/', 'a/..'):
+            id, error = self.store(filename)
+
+            self.assertIsNone(error)
+
+        # Nothing escaped the upload directory or replaced it
+        self.assertEqual(sorted(os.listdir(self.dir)), ['test.db', 'uploads'])
+        self.assertEqual(os.listdir(self.uploads), ['upload'])
+        self.assertEqual(self.rows('SELECT DISTINCT name FROM files'), [('upload',)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Tests for the built-in validators.
+
+Run from the `Editor` directory:
+
+    python -m unittest discover tests
+"""
+import unittest
+
+from website.editor import Validate, ValidationOptions
+
+
+class ValidateTest(unittest.TestCase):
+    def test_none_and_empty(self):
+        numeric = Validate.numeric(cfg=ValidationOptions({'message': 'Bad', 'empty': False}))
+
+        self.assertIs(numeric(None, {}, None), True)
+        self.assertEqual(numeric('', {}, None), 'Bad')
+        self.assertIs(numeric('12', {}, None), True)
+        self.assertEqual(numeric('x', {}, None), 'Bad')
+
+    def test_required(self):
+        required = Validate.required(ValidationOptions({'message': 'Needed'}))
+
+        self.assertEqual(required(None, {}, None), 'Needed')
+        self.assertEqual(required('', {}, None), 'Needed')
+        self.assertIs(required('a', {}, None), True)
+
+    def test_db_values_batch(self):
+        validate = Validate.db_values(ValidationOptions({'message': 'Unknown', 'optional': False}), values=['a'])
+
+        self.assertEqual(validate.batch([None, '', 'a'], [{}, {}, {}], None), ['Unknown', True, True])
+
+
+
+class ValidationOptionsTest(unittest.TestCase):
+    def test_class_defaults(self):
+        self.assertEqual(ValidationOptions.message, 'Input not valid')
+        self.assertIs(ValidationOptions.empty, True)
+        self.assertIs(ValidationOptions.optional, True)
+
+        opts = ValidationOptions({'empty': False})
+
+        self.assertEqual(opts.message, 'Input not valid')
+        self.assertIs(opts.empty, False)
+        self.assertIs(ValidationOptions.empty, True)
+
+
+if __name__ == '__main__':
+    unittest.main()
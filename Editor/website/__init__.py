@@ -1,8 +1,10 @@
-from flask import Flask
 from os import path
 
 
 def create_app():
+    # Imported here so `website.editor` can be loaded without Flask
+    from flask import Flask
+
     app = Flask(__name__)
 
     from .examples import examples
@@ -17,6 +19,7 @@ def create_app():
     from .controllers.checkbox import checkbox
     from .controllers.compoundKey import compoundKey
     from .controllers.time import time
+    from .controllers.db import metrics
 
     app.register_blueprint(examples, url_prefix='/')
     app.register_blueprint(staff, url_prefix='/api')
@@ -30,5 +33,6 @@ def create_app():
     app.register_blueprint(checkbox, url_prefix='/api')
     app.register_blueprint(compoundKey, url_prefix='/api')
     app.register_blueprint(time, url_prefix='/api')
+    app.register_blueprint(metrics.blueprint(), url_prefix='/api')
 
     return app
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request
 from .db import db
 
 from ..editor import Editor, Field, Options, Validate, ValidationOptions, Formatter
@@ -24,5 +24,5 @@ def endpoint():
     editor.left_join('continent', 'continent.id', '=', 'team.continent')
     editor.left_join('country', 'country.id', '=', 'team.country')
 
-    data = editor.process(request.form.to_dict())
-    return jsonify(data)
+    data = editor.process(request.get_json(silent=True) or request.form)
+    return Response(editor.json(data), mimetype='application/json')
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request
 # import json
 
 from .db import db
@@ -26,5 +26,5 @@ def endpoint():
         ]
     )
 
-    data = editor.process(request.form.to_dict())
-    return jsonify(data)
+    data = editor.process(request.get_json(silent=True) or request.form)
+    return Response(editor.json(data), mimetype='application/json')
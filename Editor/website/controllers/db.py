@@ -6,15 +6,20 @@
 #   mssql pyodbc - sql server
 
 
+import os
+
 from sqlalchemy import create_engine
 
+from ..editor.metrics import Metrics
+
 db_config = {
     "type": "sqlite",
     "user": "",
     "password": "",
     "host": "localhost",
     "port": "",
-    "db": "/home/colin/temp/editor.db"
+    # `EDITOR_DB` can point the demo at another file, e.g. for load testing
+    "db": os.environ.get("EDITOR_DB", "/home/colin/temp/editor.db")
 }
 
 # db_config = {
@@ -68,3 +73,6 @@ else:
     raise Exception("Unknown connection type")
 
 db = create_engine(connection_string, echo=True)
+
+# Shared by the controllers, and served at /api/metrics
+metrics = Metrics()
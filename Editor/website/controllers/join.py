@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request
 
 from .db import db
 
@@ -20,5 +20,5 @@ def endpoint():
         ]
     ).left_join('sites', 'sites.id', '=', 'users.site')
 
-    data = editor.process(request.form.to_dict())
-    return jsonify(data)
+    data = editor.process(request.get_json(silent=True) or request.form)
+    return Response(editor.json(data), mimetype='application/json')
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request
 from .db import db
 
 from ..editor import Editor, Field, Options, Validate, ValidationOptions, Formatter
@@ -26,5 +26,5 @@ def endpoint():
     editor.left_join('dept', 'user_dept.dept_id', '=', 'dept.id')
     editor.left_join_remove(True)
 
-    data = editor.process(request.form.to_dict())
-    return jsonify(data)
+    data = editor.process(request.get_json(silent=True) or request.form)
+    return Response(editor.json(data), mimetype='application/json')
@@ -1,24 +1,40 @@
-from flask import Blueprint, request, jsonify
-from .db import db
+from flask import Blueprint, Response, request
+from .db import db, metrics
 
 from ..editor import Editor, Field, Options, Validate, ValidationOptions, Formatter
 
 joinSelf = Blueprint('joinSelf', __name__)
 
+# Built once and shared by all requests - `process()` runs each request on its
+# own context
+editor = Editor(db, 'users').debug(True).trace(True).fields(
+    [
+        Field('users.first_name'),
+        Field('users.last_name'),
+        Field('users.manager')
+            .options(Options().table('users').value('id').label(['first_name', 'last_name'])),
+        Field('manager.first_name'),
+        Field('manager.last_name'),
+    ]
+).left_join('users as manager', 'users.manager', '=', 'manager.id').metrics(metrics).freeze()
+
 @joinSelf.route('/joinSelf', methods=['GET', 'POST'])
 def endpoint():
+    data = editor.process(request.get_json(silent=True) or request.form)
+    return Response(editor.json(data), mimetype='application/json')
 
-    editor = Editor(db, 'users').debug(True).trace(True).fields(
-        [
-            Field('users.first_name'),
-            Field('users.last_name'),
-            Field('users.manager')
-                .options(Options().table('users').value('id').label(['first_name', 'last_name'])),
-            Field('manager.first_name'),
-            Field('manager.last_name'),
-        ]
-    ).left_join('users as manager', 'users.manager', '=', 'manager.id')
+@joinSelf.route('/joinSelf/export', methods=['GET'])
+def export():
+    format = request.args.get('format', 'csv')
 
-    data = editor.process(request.form.to_dict())
-    return jsonify(data)
+    return Response(
+        editor.export(request.args, format),
+        mimetype='text/csv' if format == 'csv' else 'application/x-ndjson'
+    )
 
+@joinSelf.route('/joinSelf/arrow', methods=['GET'])
+def arrow():
+    return Response(
+        editor.arrow(request.args),
+        mimetype='application/vnd.apache.arrow.stream'
+    )
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request
 from .db import db
 
 from ..editor import Editor, Field, Validate, ValidationOptions, Formatter
@@ -41,9 +41,9 @@ def endpoint():
             ])
     )
 
-    data = editor.process(request.form.to_dict())
+    data = editor.process(request.get_json(silent=True) or request.form)
 
     for item in data['data']:
         item.pop('DT_RowId', None)
 
-    return jsonify(data)
+    return Response(editor.json(data), mimetype='application/json')
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request
 # import json
 
 from .db import db
@@ -85,5 +85,5 @@ def endpoint():
         ]
     ).on('processed', processed).on('preGet', preGet).on('postGet', postGet).on('preRemove', preRemove).on('postRemove', postRemove).on('preCreate', preCreate).on('postCreateAll', postCreateAll).on('postCreate', postCreate).on('writeCreateAll', writeCreateAll)
 
-    data = editor.process(request.form.to_dict())
-    return jsonify(data)
+    data = editor.process(request.get_json(silent=True) or request.form)
+    return Response(editor.json(data), mimetype='application/json')
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, flash, jsonify, send_from_directory
+from flask import Blueprint, Response, render_template, request, flash, jsonify, send_from_directory
 from .db import db
 
 from ..editor import Editor, Field, Validate, ValidationOptions
@@ -16,5 +16,5 @@ def endpoint():
         ]
     )
 
-    data = editor.process(request.form.to_dict())
-    return data
+    data = editor.process(request.get_json(silent=True) or request.form)
+    return Response(editor.json(data), mimetype='application/json')
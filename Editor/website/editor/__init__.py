@@ -1,10 +1,73 @@
-from .editor import Editor as Editor
-from .field import Field as Field
-from .field import SetType as SetType
-from .validators import Validate as Validate
-from .formatters import Formatter as Formatter
-from .validation_options import ValidationOptions as ValidationOptions
-from .validation_host import ValidationHost as ValidationHost
-from .action import Action as Action
-from .nested_data import NestedData as NestedData
-from .options import Options as Options
\ No newline at end of file
+# Public classes are loaded on first access (PEP 562), so that importing the
+# package - or a single class from it - doesn't pull in every module and its
+# dependencies
+from typing import TYPE_CHECKING
+import importlib
+
+_exports = {
+    'Editor': '.editor',
+    'Field': '.field',
+    'SetType': '.field',
+    'Validate': '.validators',
+    'Formatter': '.formatters',
+    'ValidationOptions': '.validation_options',
+    'ValidationHost': '.validation_host',
+    'Action': '.action',
+    'NestedData': '.nested_data',
+    'Options': '.options',
+    'ChangeLog': '.change_log',
+    'Encoder': '.encoder',
+    'ReadReplicas': '.replicas',
+    'EventQueue': '.events',
+    'EventContext': '.events',
+    'Upload': '.upload',
+    'Diagnostics': '.diagnostics',
+    'StatementRecorder': '.statements',
+    'StatementBudget': '.statements',
+    'StatementBudgetExceeded': '.statements',
+    'Metrics': '.metrics',
+    'Profiler': '.profiling',
+}
+
+__all__ = list(_exports)
+
+if TYPE_CHECKING:
+    from .editor import Editor as Editor
+    from .field import Field as Field
+    from .field import SetType as SetType
+    from .validators import Validate as Validate
+    from .formatters import Formatter as Formatter
+    from .validation_options import ValidationOptions as ValidationOptions
+    from .validation_host import ValidationHost as ValidationHost
+    from .action import Action as Action
+    from .nested_data import NestedData as NestedData
+    from .options import Options as Options
+    from .change_log import ChangeLog as ChangeLog
+    from .encoder import Encoder as Encoder
+    from .replicas import ReadReplicas as ReadReplicas
+    from .events import EventQueue as EventQueue
+    from .events import EventContext as EventContext
+    from .upload import Upload as Upload
+    from .diagnostics import Diagnostics as Diagnostics
+    from .statements import StatementRecorder as StatementRecorder
+    from .statements import StatementBudget as StatementBudget
+    from .statements import StatementBudgetExceeded as StatementBudgetExceeded
+    from .metrics import Metrics as Metrics
+    from .profiling import Profiler as Profiler
+
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(
+            'module ' + repr(__name__) + ' has no attribute ' + repr(name))
+
+    value = getattr(importlib.import_module(_exports[name], __name__), name)
+
+    # Cache on the module so this is only called once per name
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -10,6 +10,7 @@ class Action(Enum):
         EDIT (int): Edit one or more rows.
         DELETE (int): Delete one or more rows.
         UPLOAD (int): Upload a file.
+        IMPORT (int): Bulk import rows from a CSV file.
         UNKNOWN (int): Unknown action.
     """
     READ = 1
@@ -17,4 +18,5 @@ class Action(Enum):
     EDIT = 3
     DELETE = 4
     UPLOAD = 5
+    IMPORT = 6
     UNKNOWN = -1
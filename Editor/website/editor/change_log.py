@@ -0,0 +1,138 @@
+import threading
+
+from collections import OrderedDict
+from typing import Optional, List, Tuple
+
+
+class ChangeLog:
+    """
+    Monotonic log of the rows that an Editor instance has created, edited and
+    removed. It is used to answer delta reads - a client that holds a version
+    number can ask for just the rows which have changed since that version,
+    rather than reloading the whole table.
+
+    A `ChangeLog` must outlive the request, so it would normally be created
+    once at module level for an endpoint and passed to `Editor.change_log` for
+    each request. Only the latest change for each row is kept, and the number
+    of rows tracked is bounded - a client whose version is older than the
+    oldest change retained will be told to do a full reload.
+    """
+
+    def __init__(self, limit: Optional[int] = 10000):
+        """
+        Creates an instance of ChangeLog.
+
+        :param limit: Maximum number of rows to track changes for.
+        :type limit: int, optional
+        """
+        self._lock = threading.Lock()
+        self._limit = limit
+        self._version = 0
+        self._floor = 0
+        self._entries = OrderedDict()
+
+    def version(self) -> int:
+        """
+        Get the current version of the log.
+
+        :return: Version number of the most recent change.
+        :rtype: int
+        """
+        return self._version
+
+    def upsert(self, id: str) -> int:
+        """
+        Record that a row has been created or edited.
+
+        :param id: Primary key value of the row (without the id prefix).
+        :type id: str
+        :return: Version number assigned to the change.
+        :rtype: int
+        """
+        return self.__record(id, False)
+
+    def remove(self, id: str) -> int:
+        """
+        Record that a row has been removed.
+
+        :param id: Primary key value of the row (without the id prefix).
+        :type id: str
+        :return: Version number assigned to the change.
+        :rtype: int
+        """
+        return self.__record(id, True)
+
+    def invalidate(self) -> int:
+        """
+        Record that rows have changed without saying which, e.g. after a bulk
+        import. Any client holding an earlier version will be told to do a
+        full reload.
+
+        :return: New version number.
+        :rtype: int
+        """
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._floor = self._version
+
+            return self._version
+
+    def since(self, version: int) -> Optional[Tuple[List[str], List[str], int]]:
+        """
+        Get the rows that have changed since a given version.
+
+        :param version: Version number held by the client.
+        :type version: int
+        :return: Tuple of the upserted ids, the removed ids and the current
+            version, or `None` if the log can't answer for that version and a
+            full reload is required.
+        :rtype: tuple or None
+        """
+        try:
+            version = int(version)
+        except (TypeError, ValueError):
+            return None
+
+        with self._lock:
+            if version < self._floor or version > self._version:
+                return None
+
+            upserted = []
+            removed = []
+
+            # Entries are held in version order, so walk back from the newest
+            # until we reach changes the client already has
+            for id in reversed(self._entries):
+                entry_version, is_removed = self._entries[id]
+
+                if entry_version <= version:
+                    break
+
+                if is_removed:
+                    removed.append(id)
+                else:
+                    upserted.append(id)
+
+            return upserted, removed, self._version
+
+    def __record(self, id: str, removed: bool) -> int:
+        """
+        Add an entry to the log, replacing any earlier entry for the same row.
+
+        :param id: Primary key value of the row.
+        :param removed: `True` if the row was removed.
+        :return: Version number assigned to the change.
+        """
+        with self._lock:
+            self._version += 1
+
+            self._entries.pop(id, None)
+            self._entries[id] = (self._version, removed)
+
+            if self._limit is not None and len(self._entries) > self._limit:
+                # Anyone older than the dropped entry can no longer be answered
+                _, (dropped, _) = self._entries.popitem(last=False)
+                self._floor = dropped
+
+            return self._version
@@ -0,0 +1,312 @@
+import argparse
+import importlib
+import re
+import sys
+
+import sqlalchemy
+
+from typing import Any, Dict, List, Optional
+
+from .utils import split_table_column
+
+# Patterns for the plan steps of each database. Tables are reported by their
+# alias when they have one
+_SQLITE_STEP = re.compile(r'^(SCAN|SEARCH)(?: TABLE)? (\S+)(?: AS (\S+))?')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\S+)(?: (\S+))?')
+_POSTGRES_SORT = re.compile(r'^\s*(?:->\s+)?(?:Incremental )?Sort\b')
+
+
+class Diagnostics:
+    """
+    Query plan inspection for an Editor configuration. The queries that Editor
+    generates - the read, a search, an order by each field and a refetch of a
+    row by its primary key - are run through the database's `EXPLAIN`
+    (`EXPLAIN QUERY PLAN` for SQLite). The plans are checked for:
+
+    * Full scans of a left joined table, meaning that the join key has no index.
+    * Sorts for an order, where an index on the sort column could be used.
+    * Full scans for a primary key lookup.
+
+    For each, a `CREATE INDEX` statement is suggested, unless the table already
+    has an index starting with the column (the planner can prefer a scan for a
+    small table). Searches use `LIKE '%...%'`, which can't use an index, so
+    their plans are reported but no index is suggested.
+
+    SQLite, PostgreSQL and MySQL / MariaDB are supported. The queries are only
+    planned, not run.
+
+    This can also be run from the command line, with the import path of an
+    Editor instance (or a function returning one):
+
+        python -m website.editor.diagnostics website.controllers.joinSelf:editor
+    """
+
+    def __init__(self, editor: Any, db: Optional[sqlalchemy.engine.Engine] = None):
+        """
+        Creates an instance of Diagnostics.
+
+        :param editor: Editor instance to inspect
+        :type editor: Editor
+        :param db: Engine to plan the queries on. If not given the Editor's
+            engine is used.
+        :type db: sqlalchemy.engine.Engine, optional
+        """
+        if editor.frozen():
+            editor = editor.context()
+
+        self._editor = editor
+        self._engine = editor._engine if db is None else db
+        self._indexes = {}
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Plan the Editor's queries and check the plans.
+
+        :return: The `queries` (each with its `kind`, `label`, `sql` and the
+            `plan` lines) and the `findings` (each with its `kind`, `table`,
+            `columns`, `detail` and the suggested `index`, or None)
+        :rtype: dict
+        """
+        editor = self._editor
+        primary, primary_alias = self.__table_name(editor.table()[0])
+        queries = []
+        findings = []
+
+        for kind, label, query in editor._plan_queries():
+            sql = str(query.compile(
+                dialect=self._engine.dialect, compile_kwargs={'literal_binds': True}))
+            lines, steps = self.__explain(sql)
+            queries.append({'kind': kind, 'label': label, 'sql': sql, 'plan': lines})
+
+            scanned = {step['table'] for step in steps if step['step'] == 'scan'}
+            sorts = any(step['step'] == 'sort' for step in steps)
+
+            if kind == 'read':
+                for join in editor._left_join:
+                    table, alias = self.__table_name(join['table'])
+                    c1, t1 = split_table_column(join['field1'])
+                    c2, t2 = split_table_column(join['field2'])
+                    column = c1 if t1 == alias else c2
+
+                    # By alias, as a self join's table is also the primary
+                    if alias in scanned:
+                        findings.append(self.__finding(
+                            'join', table, [column],
+                            'Left join on `' + join['field1'] + ' ' + join['operator'] + ' ' +
+                            join['field2'] + '` scans `' + join['table'] + '` for each row'))
+            elif kind == 'order' and sorts:
+                column, table = split_table_column(label)
+
+                if table is None or table in (primary, primary_alias):
+                    findings.append(self.__finding(
+                        'order', primary, [column],
+                        'Ordering by `' + label + '` sorts the rows'))
+                else:
+                    findings.append({
+                        'kind': 'order', 'table': table, 'columns': [column], 'index': None,
+                        'detail': 'Ordering by `' + label + '` sorts the rows. It is on a ' +
+                        'joined table, so an index can\'t be used for the order'
+                    })
+            elif kind == 'search' and len(scanned):
+                findings.append({
+                    'kind': 'search', 'table': primary, 'columns': [], 'index': None,
+                    'detail': 'Searches use `LIKE \'%...%\'`, which scans the table - ' +
+                    'an index can\'t be used for them'
+                })
+            elif kind == 'refetch' and (primary in scanned or primary_alias in scanned):
+                findings.append(self.__finding(
+                    'pkey', primary, [split_table_column(p)[0] for p in editor.pkey()],
+                    'Getting a row by its primary key scans `' + primary + '`'))
+
+        return {'queries': queries, 'findings': findings}
+
+    def report(self, sql: Optional[bool] = False) -> str:
+        """
+        Plan the Editor's queries and describe the results.
+
+        :param sql: Include the SQL of each query
+        :return: Report text
+        :rtype: str
+        """
+        result = self.run()
+        out = []
+
+        for query in result['queries']:
+            out.append('[' + query['kind'] + '] ' + query['label'])
+
+            if sql:
+                out.append('    ' + ' '.join(query['sql'].split()))
+
+            out += ['    ' + line for line in query['plan']]
+
+        out.append('')
+
+        if len(result['findings']) == 0:
+            out.append('No problems found')
+
+        for finding in result['findings']:
+            out.append(finding['kind'] + ': ' + finding['detail'])
+
+        indexes = []
+
+        for finding in result['findings']:
+            if finding['index'] is not None and finding['index'] not in indexes:
+                indexes.append(finding['index'])
+
+        if len(indexes):
+            out += ['', 'Suggested indexes:'] + indexes
+
+        return '\n'.join(out)
+
+    def __explain(self, sql: str) -> tuple:
+        """
+        Get the query plan for a query.
+
+        :param sql: SQL of the query
+        :return: Tuple of the plan lines and the plan steps - dicts with the
+            `step` (`scan`, `search` or `sort`) and the `table`
+        """
+        dialect = self._engine.dialect.name
+        lines = []
+        steps = []
+
+        with self._engine.connect() as connection:
+            if dialect == 'sqlite':
+                for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql):
+                    detail = row[3]
+                    lines.append(detail)
+                    match = _SQLITE_STEP.match(detail)
+
+                    if match is not None:
+                        # `SCAN x USING INDEX` is an ordered walk of an index,
+                        # and an automatic index is built for each query
+                        full = match.group(1) == 'SCAN' and ' USING ' not in detail
+                        steps.append({
+                            'step': 'scan' if full or 'AUTOMATIC' in detail else 'search',
+                            'table': match.group(3) or match.group(2)
+                        })
+                    elif detail.startswith('USE TEMP B-TREE FOR ORDER BY'):
+                        steps.append({'step': 'sort', 'table': None})
+            elif dialect == 'postgresql':
+                for row in connection.exec_driver_sql('EXPLAIN ' + sql):
+                    detail = row[0]
+                    lines.append(detail)
+                    match = _POSTGRES_SCAN.search(detail)
+
+                    if match is not None:
+                        alias = match.group(2)
+                        steps.append({
+                            'step': 'scan',
+                            'table': alias if alias and not alias.startswith('(') else match.group(1)
+                        })
+                    elif _POSTGRES_SORT.match(detail):
+                        steps.append({'step': 'sort', 'table': None})
+            elif dialect in ('mysql', 'mariadb'):
+                for row in connection.exec_driver_sql('EXPLAIN ' + sql).mappings():
+                    extra = row.get('Extra') or ''
+                    lines.append(str(row.get('table')) + ': ' + str(row.get('type')) + ' ' + extra)
+                    steps.append({
+                        'step': 'scan' if row.get('type') == 'ALL' else 'search',
+                        'table': row.get('table')
+                    })
+
+                    if 'Using filesort' in extra:
+                        steps.append({'step': 'sort', 'table': None})
+            else:
+                raise Exception(
+                    'Query plans are not supported for the `' + dialect + '` database')
+
+        return lines, steps
+
+    def __finding(self, kind: str, table: str, columns: List[str], detail: str) -> Dict[str, Any]:
+        """
+        Create a finding, suggesting an index unless the table has one that
+        starts with the columns.
+
+        :param kind: `join`, `order` or `pkey`
+        :param table: Table name
+        :param columns: Columns the index is needed on
+        :param detail: Description of the problem
+        :return: Finding
+        """
+        index = None
+
+        if self.__has_index(table, columns):
+            detail += ' (an index exists, but wasn\'t used)'
+        else:
+            quote = self._engine.dialect.identifier_preparer.quote
+            index = 'CREATE INDEX ' + quote('ix_' + table + '_' + '_'.join(columns)) + \
+                ' ON ' + quote(table) + ' (' + ', '.join(quote(c) for c in columns) + ');'
+
+        return {'kind': kind, 'table': table, 'columns': columns, 'detail': detail, 'index': index}
+
+    def __has_index(self, table: str, columns: List[str]) -> bool:
+        """
+        Check if a table has an index (including its primary key and unique
+        constraints) which starts with the given columns.
+
+        :param table: Table name
+        :param columns: Columns
+        :return: True if there is an index
+        """
+        if table not in self._indexes:
+            inspector = sqlalchemy.inspect(self._engine)
+            indexes = [index['column_names']
+                       for index in inspector.get_indexes(table)]
+            indexes.append(inspector.get_pk_constraint(table)['constrained_columns'])
+            indexes += [unique['column_names']
+                        for unique in inspector.get_unique_constraints(table)]
+
+            self._indexes[table] = indexes
+
+        return any(index[:len(columns)] == columns for index in self._indexes[table])
+
+    @staticmethod
+    def __table_name(table: str) -> tuple:
+        """
+        Split a table name from an Editor configuration into its name and alias.
+
+        :param table: Table name, optionally with ` as alias`
+        :return: Tuple of the table name and the alias (the name if no alias)
+        """
+        parts = table.split(' ')
+
+        if len(parts) == 3 and parts[1].lower() == 'as':
+            return parts[0], parts[2]
+
+        return table, table
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+
+    :param argv: Arguments, if not those of the process
+    :return: Exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m website.editor.diagnostics',
+        description='Check the query plans of an Editor configuration and suggest indexes.')
+    parser.add_argument(
+        'editor', help='Editor instance, or a function returning one, as `module:name`')
+    parser.add_argument('--sql', action='store_true',
+                        help='show the SQL of each query')
+    args = parser.parse_args(argv)
+
+    module, sep, name = args.editor.partition(':')
+
+    if not sep:
+        parser.error('The Editor must be given as `module:name`')
+
+    editor = getattr(importlib.import_module(module), name)
+
+    if callable(editor) and not hasattr(editor, '_plan_queries'):
+        editor = editor()
+
+    print(Diagnostics(editor).report(args.sql))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,21 +1,33 @@
-from sqlalchemy import create_engine, Table, MetaData, Column, Integer, String, select, or_, and_
+from sqlalchemy import create_engine, Table, MetaData, Column, Integer, String, select, or_, and_, tuple_
 
-import sqlalchemy.orm
+import sqlalchemy
 import json
 import re
+import contextlib
 import copy
+import csv
+import io
+import time
 import zlib
 
 from datetime import datetime
 
-from typing import Callable, Dict, Union, List, Optional, Any
+from typing import Callable, Dict, Union, List, Optional, Any, Iterator
 
 
 
 
 from .field import Field
 from .action import Action
+from .change_log import ChangeLog
+from .encoder import Encoder, default_encoder
+from .metrics import Metrics
+from .profiling import Profiler
+from .events import EventContext, EventQueue
+from .replicas import ReadReplicas
 from .set_type import SetType
+from .statements import StatementBudget, StatementRecorder, statement_context
+from .validation_host import ValidationHost
 
 from .nested_data import NestedData
 from .table import Table
@@ -30,6 +42,24 @@ class Editor(NestedData):
     # Constants
     version = '0.0.1'
 
+    # Maximum number of bound parameters to use in a single statement, by
+    # dialect. Bulk operations are split into chunks to stay under these.
+    param_limits = {
+        'sqlite': 999,
+        'mssql': 2000,
+        'oracle': 1000,
+        'postgresql': 32000,
+        'mysql': 10000,
+        'mariadb': 10000
+    }
+
+    # Events which happen after the data has been written, and can't affect
+    # the outcome, so can be run by an `event_queue`
+    background_events = frozenset([
+        'postCreate', 'postEdit', 'postRemove',
+        'postCreateAll', 'postEditAll', 'postRemoveAll'
+    ])
+
     def __trace(self, string: str):
         """
         Print trace information if tracing is enabled.
@@ -40,7 +70,7 @@ class Editor(NestedData):
         if self._trace:
             print(string)
 
-    def __init__(self, db: sqlalchemy.engine.Engine, table: str = None, pkey: Optional[list] = None):
+    def __init__(self, db: sqlalchemy.engine.Engine, table: str = None, pkey: Optional[list] = None, read_db: Optional[Union[sqlalchemy.engine.Engine, List[sqlalchemy.engine.Engine], ReadReplicas]] = None):
         """
         Initialize the Editor instance.
 
@@ -50,6 +80,8 @@ class Editor(NestedData):
         :type table: str, optional
         :param pkey: The primary key column(s).
         :type pkey: list, optional
+        :param read_db: Engine(s) for read replicas. See `read_db()`.
+        :type read_db: sqlalchemy.engine.Engine or list or ReadReplicas, optional
         """
         # Setup initial values
         self._pkey = ['id']
@@ -61,7 +93,6 @@ class Editor(NestedData):
         self._debug = False
         self._trace = False
         self._fields = []
-        self._debug_info = []
         self._validators = []
         self._do_validate = True
         self._custom_get = None
@@ -70,13 +101,21 @@ class Editor(NestedData):
         self._write = True
         self._read_table_names = []
         self._events = {}
-
-        # Get the output ready to go
-        self._out = {}
-        self._out['debug'] = []
-        self._out['data'] = {}
-        self._out['fieldErrors'] = []
-        self._out['cancelled'] = []
+        self._change_log = None
+        self._updated_at = None
+        self._encoder = None
+        self._routes = None
+        self._read_replicas = None
+        self._event_queue = None
+        self._statement_recorder = None
+        self._statement_budget = None
+        self._metrics = None
+        self._profiler = None
+        self._frozen = False
+        self._context = False
+
+        # Per request state
+        self.__reset()
 
         # Store stuff passed in
         if table is not None:
@@ -86,7 +125,123 @@ class Editor(NestedData):
             self.pkey(pkey)
 
         self._engine = db
-        self._session = sqlalchemy.orm.Session(self._engine)
+
+        if read_db is not None:
+            self.read_db(read_db)
+
+    def __reset(self) -> None:
+        """
+        Set up the state used while processing a single request - the output
+        buffer, debug information, submitted data and database session. This
+        is kept apart from the configuration so a frozen template can hand a
+        fresh copy of it to each request context.
+        """
+        self._out = {}
+        self._out['debug'] = []
+        self._out['data'] = {}
+        self._out['fieldErrors'] = []
+        self._out['cancelled'] = []
+        self._debug_info = []
+        self._process_data = None
+        self._upload_data = None
+        self._timing = None
+        self._changes = []
+        self.__session = None
+
+    def __check_frozen(self) -> None:
+        """
+        Raise an error if the configuration can't be changed.
+        """
+        if self._frozen:
+            raise Exception(
+                'The Editor configuration is frozen. Make any changes before '
+                'calling `freeze()`.')
+
+    def freeze(self) -> 'Editor':
+        """
+        Make this Editor a read-only template that can be shared by requests.
+
+        Build the Editor, its fields and options once (e.g. at import time)
+        and freeze it. Each call to `process()` on the template is then run on
+        a lightweight per-request context (see `context()`), so concurrent
+        requests don't share an output buffer, debug information, submitted
+        data or database session. The configuration itself can't be changed
+        once frozen - the Editor, its fields and their options all refuse
+        changes, so event handlers should be added before freezing.
+
+        :return: Self for chaining.
+        :rtype: Editor
+        """
+        if self._frozen:
+            return self
+
+        # Work that would otherwise be done on the first request is done now,
+        # so that contexts only ever read the shared configuration
+        self._prep_join()
+        self.__routes()
+
+        for field in self._fields:
+            if field is not None:
+                field._freeze()
+
+        self._frozen = True
+
+        # The template itself never processes a request
+        del self._out
+        del self._debug_info
+        del self._process_data
+        del self._upload_data
+        del self._timing
+        del self.__session
+
+        return self
+
+    def frozen(self) -> bool:
+        """
+        Check if the Editor is a frozen template.
+
+        :return: `True` if `freeze()` has been called.
+        :rtype: bool
+        """
+        return self._frozen
+
+    def context(self) -> 'Editor':
+        """
+        Create the per-request execution context for a frozen template. The
+        context shares the template's configuration and has its own request
+        state. It can be used directly when access to more than the output of
+        `process()` is needed (e.g. `inData()`, `json()`).
+
+        :return: Editor context for a single request.
+        :rtype: Editor
+        """
+        if not self._frozen:
+            raise Exception('`context()` can only be used on a frozen Editor')
+
+        if self._context:
+            raise Exception('`context()` can only be used on the template')
+
+        ctx = copy.copy(self)
+        ctx._context = True
+        ctx.__reset()
+
+        return ctx
+
+    @property
+    def _session(self) -> Any:
+        """
+        The ORM session used for writes. It is created on first use, so that
+        `sqlalchemy.orm` is only imported by requests that write.
+
+        :return: SQLAlchemy session for the primary engine.
+        :rtype: sqlalchemy.orm.Session
+        """
+        if self.__session is None:
+            import sqlalchemy.orm
+
+            self.__session = sqlalchemy.orm.Session(self._engine)
+
+        return self.__session
 
     def debug(self, debug: bool = None) -> Union[bool, 'Editor']:
         """
@@ -102,6 +257,7 @@ class Editor(NestedData):
             return self._debug
 
         if debug is True or debug is False:
+            self.__check_frozen()
             self._debug = debug
         elif self._debug is True:
             self._debug_info.append(debug)
@@ -117,6 +273,8 @@ class Editor(NestedData):
         :return: Self for chaining.
         :rtype: Editor
         """
+        self.__check_frozen()
+
         self._trace = trace
         return self
 
@@ -135,10 +293,33 @@ class Editor(NestedData):
         if flag is None:
             return self._do_validate
 
+        self.__check_frozen()
+
         self._do_validate = flag
 
         return self
 
+    def encoder(self, encoder: Optional[Encoder] = None) -> Union[Encoder, 'Editor']:
+        """
+        Get or set the JSON encoder used by `json()` and `json_stream()`.
+
+        By default a shared encoder is used which picks the fastest JSON library
+        available (`orjson`, then `msgspec`, then the standard library).
+
+        :param encoder: Encoder to use, or None to get the current encoder.
+        :type encoder: Encoder, optional
+        :return: Either the current encoder or self for chaining.
+        :rtype: Encoder or Editor
+        """
+        if encoder is None:
+            return self._encoder if self._encoder is not None else default_encoder()
+
+        self.__check_frozen()
+
+        self._encoder = encoder
+
+        return self
+
     def action(self, data: dict) -> Action:
         """
         Determine the request type from an HTTP request.
@@ -161,9 +342,166 @@ class Editor(NestedData):
             return Action.EDIT
         if data['action'] == 'create':
             return Action.CREATE
+        if data['action'] == 'import':
+            return Action.IMPORT
+        if data['action'] == 'upload':
+            return Action.UPLOAD
 
         return Action.UNKNOWN
 
+    def change_log(self, log: Optional[ChangeLog] = None) -> Union[ChangeLog, 'Editor']:
+        """
+        Get or set the change log used for delta reads.
+
+        When a change log is set, Editor records every row it creates, edits and
+        removes in it. A read request which includes a `since` parameter (the
+        `version` returned by a previous read) will then return only the rows
+        which have been upserted since that version, plus a `removed` list of
+        the `DT_RowId`s that have been deleted. The log must outlive the request,
+        so create it once per endpoint, not once per request.
+
+        :param log: Change log to use, or None to get the current log.
+        :type log: ChangeLog, optional
+        :return: Either current change log or self for chaining.
+        :rtype: ChangeLog or Editor
+        """
+        if log is None:
+            return self._change_log
+
+        self.__check_frozen()
+
+        self._change_log = log
+
+        return self
+
+    def event_queue(self, queue: Optional[EventQueue] = None) -> Union[EventQueue, 'Editor']:
+        """
+        Get or set the queue used to run post-write events in the background.
+
+        When set, the handlers for `postCreate`, `postEdit`, `postRemove` and
+        their `All` versions are run by the queue's worker threads, rather than
+        before `process()` returns. All other events are still run during the
+        request. The handlers are given copies of the data, as the request
+        carries on using its own, and an `EventContext` with the database
+        engine in place of the Editor. The Editor must not be used from a
+        background handler. The queue must outlive the request, so create it
+        once, not once per request.
+
+        :param queue: Event queue to use, or None to get the current queue.
+        :type queue: EventQueue, optional
+        :return: Either current event queue or self for chaining.
+        :rtype: EventQueue or Editor
+        """
+        if queue is None:
+            return self._event_queue
+
+        self.__check_frozen()
+
+        self._event_queue = queue
+
+        return self
+
+    def metrics(self, metrics: Optional[Metrics] = None) -> Union[Metrics, 'Editor']:
+        """
+        Get or set the metrics that requests processed by this Editor are
+        recorded in - request counts and times, errors, cancellations,
+        validation failures, rows read and written, and the time taken by each
+        phase of the request. Like the engine, the metrics should be created
+        once, not once per request.
+
+        :param metrics: Metrics to record in, or None to get the current metrics.
+        :type metrics: Metrics, optional
+        :return: Either current metrics or self for chaining.
+        :rtype: Metrics or Editor
+        """
+        if metrics is None:
+            return self._metrics
+
+        self.__check_frozen()
+
+        self._metrics = metrics
+
+        return self
+
+    def profiler(self, profiler: Optional[Profiler] = None) -> Union[Profiler, 'Editor']:
+        """
+        Get or set the profiler for requests processed by this Editor. A
+        sample of the requests, and any that are slow, are profiled and the
+        profiles kept, tagged with the table and action. Like the engine, the
+        profiler should be created once, not once per request.
+
+        :param profiler: Profiler to use, or None to get the current profiler.
+        :type profiler: Profiler, optional
+        :return: Either current profiler or self for chaining.
+        :rtype: Profiler or Editor
+        """
+        if profiler is None:
+            return self._profiler
+
+        self.__check_frozen()
+
+        self._profiler = profiler
+
+        return self
+
+    def statement_recorder(self, recorder: Optional[StatementRecorder] = None) -> Union[StatementRecorder, 'Editor']:
+        """
+        Get or set the recorder for the SQL statements run by this Editor.
+
+        The recorder is attached to the Editor's engine and its read replicas,
+        and the statements run while processing a request are attributed to
+        the Editor's table and the request's action. Like the engine, the
+        recorder should be created once, not once per request.
+
+        :param recorder: Statement recorder to use, or None to get the current
+            recorder.
+        :type recorder: StatementRecorder, optional
+        :return: Either current recorder or self for chaining.
+        :rtype: StatementRecorder or Editor
+        """
+        if recorder is None:
+            return self._statement_recorder
+
+        self.__check_frozen()
+
+        self._statement_recorder = recorder
+        recorder.attach(self._engine)
+
+        if self._read_replicas is not None:
+            for engine in self._read_replicas.engines():
+                recorder.attach(engine)
+
+        return self
+
+    def statement_budget(self, budget: Optional[StatementBudget] = None) -> Union[StatementBudget, 'Editor']:
+        """
+        Get or set the budget for the number of SQL statements run by each
+        request processed by this Editor. Statements that are repeated in a
+        request (a probable N+1) are reported, and with the budget's
+        `raise_error` set, `process()` raises `StatementBudgetExceeded` if a
+        request runs more statements than its budget. Like the engine, the
+        budget should be created once, not once per request.
+
+        :param budget: Statement budget to use, or None to get the current
+            budget.
+        :type budget: StatementBudget, optional
+        :return: Either current budget or self for chaining.
+        :rtype: StatementBudget or Editor
+        """
+        if budget is None:
+            return self._statement_budget
+
+        self.__check_frozen()
+
+        self._statement_budget = budget
+        budget.attach(self._engine)
+
+        if self._read_replicas is not None:
+            for engine in self._read_replicas.engines():
+                budget.attach(engine)
+
+        return self
+
     def pkey(self, pkey: list = None) -> Union[List, 'Editor']:
         """
         Get or set primary key value(s).
@@ -176,6 +514,8 @@ class Editor(NestedData):
         if pkey is None:
             return self._pkey
 
+        self.__check_frozen()
+
         if isinstance(pkey, str):
             self._pkey = [pkey]
         else:
@@ -306,7 +646,10 @@ class Editor(NestedData):
 
             raise Exception("Unknown field: " + field)
 
+        self.__check_frozen()
+
         self._fields.append(field)
+        self._routes = None
 
         return self
 
@@ -322,7 +665,10 @@ class Editor(NestedData):
         if fields is None or len(fields) == 0:
             return self._fields
 
+        self.__check_frozen()
+
         self._fields += fields
+        self._routes = None
 
         return self
 
@@ -335,6 +681,8 @@ class Editor(NestedData):
         :return: Self for chaining.
         :rtype: Editor
         """
+        self.__check_frozen()
+
         self._custom_get = fn
         return self
 
@@ -356,6 +704,8 @@ class Editor(NestedData):
         if id is None:
             return self._id_prefix
 
+        self.__check_frozen()
+
         self._id_prefix = id
 
         return self
@@ -389,6 +739,8 @@ class Editor(NestedData):
         if join == None or len(join) == 0:
             return self._join
 
+        self.__check_frozen()
+
         self._join += join
 
         return self
@@ -432,12 +784,15 @@ class Editor(NestedData):
         :return: Self for chaining.
         :rtype: Editor
         """
+        self.__check_frozen()
+
         if hasattr(field1, '__call__'):
             raise Exception(
                 'Left joins with functions not currently supported')
         else:
             self._left_join.append(
                 {'field1': field1, 'field2': field2, 'operator': operator, 'table': table})
+            self._routes = None
 
         return self
 
@@ -455,6 +810,8 @@ class Editor(NestedData):
         if not remove:
             return self._left_join_remove
 
+        self.__check_frozen()
+
         self._left_join_remove = remove
 
         return self
@@ -472,6 +829,8 @@ class Editor(NestedData):
         :return: Self for chaining.
         :rtype: Editor
         """
+        self.__check_frozen()
+
         if name not in self._events:
             self._events[name] = []
 
@@ -495,10 +854,47 @@ class Editor(NestedData):
         if schema is None:
             return self._schema
 
+        self.__check_frozen()
+
         self._schema = schema
 
         return self
 
+    def read_db(self, db: Optional[Union[sqlalchemy.engine.Engine, List[sqlalchemy.engine.Engine], ReadReplicas]] = None, strategy: Optional[str] = 'round_robin') -> Union[ReadReplicas, 'Editor']:
+        """
+        Get or set the read replicas.
+
+        When set, read requests, the lookups for field options and the
+        `Validate.db_values` checks are sent to the read engines, spreading
+        the load over them. Writes, and the read of the written rows that is
+        returned to the client, always use the primary engine given to the
+        constructor so the client sees its own changes. So do reads with a
+        `change_log`, as its versions are those of the primary.
+
+        :param db: Engine, list of engines or `ReadReplicas` instance, or None
+            to get the current replicas.
+        :type db: sqlalchemy.engine.Engine or list or ReadReplicas, optional
+        :param strategy: `round_robin` or `least_loaded` - how to pick the
+            engine for each read. Ignored if a `ReadReplicas` instance is given.
+        :type strategy: str, optional
+        :return: Either the current replicas or self for chaining.
+        :rtype: ReadReplicas or Editor
+        """
+        if db is None:
+            return self._read_replicas
+
+        self.__check_frozen()
+
+        self._read_replicas = db if isinstance(
+            db, ReadReplicas) else ReadReplicas(db, strategy)
+
+        for watcher in (self._statement_recorder, self._statement_budget):
+            if watcher is not None:
+                for engine in self._read_replicas.engines():
+                    watcher.attach(engine)
+
+        return self
+
     def read_table(self, table: Optional[Union[str, List[str]]] = None) -> Union[List, 'Editor']:
         """
         Get or set CRUD read table name.
@@ -517,6 +913,8 @@ class Editor(NestedData):
         if table is None or len(table) == 0:
             return self._read_table_names
 
+        self.__check_frozen()
+
         if isinstance(table, str):
             self._read_table_names.append(table)
         else:
@@ -541,11 +939,43 @@ class Editor(NestedData):
         if table is None or len(table) == 0:
             return self._table
 
+        self.__check_frozen()
+
         if isinstance(table, str):
             self._table.append(table)
         else:
             self._table += table
 
+        self._routes = None
+
+        return self
+
+    def updated_at(self, column: Optional[str] = None) -> Union[str, 'Editor']:
+        """
+        Get or set the column that records when a row was last changed.
+
+        This is an alternative source for delta reads when no `change_log` is
+        configured, and will also pick up changes made outside of Editor. A read
+        request with a `since` parameter will return only the rows whose value
+        in this column is greater than or equal to `since`, so rows written in
+        the same instant as the version aren't missed. Those rows are sent
+        again, and the client replaces them by id. The `version` is null while
+        the table is empty, and an empty `since`, or one which isn't a value of
+        the column, gets a full read. Note that removed rows can't be detected
+        this way.
+
+        :param column: Column name, or None to get the current value.
+        :type column: str, optional
+        :return: Either the current column name or self for chaining.
+        :rtype: str or Editor
+        """
+        if column is None:
+            return self._updated_at
+
+        self.__check_frozen()
+
+        self._updated_at = column
+
         return self
 
     def _trigger(self, name: str, *args: Any) -> Optional[Any]:
@@ -561,6 +991,18 @@ class Editor(NestedData):
         if name not in self._events:
             return
 
+        if self._event_queue is not None and name in self.background_events:
+            # Copy the handlers and the arguments, so the job isn't affected
+            # by later changes. The rows are also in the response, which the
+            # request goes on to change and encode while the job runs. The
+            # handlers don't get the Editor, as its session isn't thread safe
+            context = EventContext(
+                self._engine, self.table(), self.pkey(), self.id_prefix())
+
+            self._event_queue.submit(
+                name, tuple(self._events[name]), context, copy.deepcopy(args))
+            return
+
         for event in self._events[name]:
             res = event(self, *args)
             if res != None:
@@ -593,41 +1035,149 @@ class Editor(NestedData):
 
         self._trigger('writeEdit', id, values)
 
+        # Recorded in the change log once the writes are committed
+        if get_id != id:
+            self._changes.append((id, True))
+
+        self._changes.append((get_id, False))
+
         return get_id
 
     def _upload(self, data: Any) -> None:
         """
-        Handle file uploads.
+        Handle file uploads. The file is stored by the `Upload` configured for
+        the field named by `uploadField`, and its id and information added to
+        the output.
 
         :param data: Data to upload
         """
-        pass
+        field = self._find_field(data.get('uploadField'), 'name')
+        upload = field.upload() if field is not None else None
+
+        if upload is None:
+            self._out['error'] = 'File uploaded to a field that does not have upload options configured'
+            return
+
+        file = self._upload_data.get('upload') if self._upload_data else None
+
+        if file is None:
+            self._out['error'] = 'No file was uploaded'
+            return
+
+        cancel = self._trigger('preUpload', data)
+        if cancel == False:
+            return
+
+        id, error = upload._exec(self, file)
+
+        if error is not None:
+            self._out['fieldErrors'].append({
+                'name': field.name(),
+                'status': error
+            })
+            return
+
+        files = self.__file_data(upload.table(), [id])
+
+        self._out['files'] = files if files is not None else {}
+        self._out['upload'] = {'id': id}
+
+        self._trigger('postUpload', id, self._out['files'], file, data)
 
     def __file_clean(self) -> None:
         """
-        Clean up files.
+        Clean up files which are no longer referenced, for the fields with an
+        upload that has a `db_clean` function.
         """
-        pass
+        for field in self._fields:
+            upload = field.upload()
+
+            if upload is not None:
+                upload._clean(self, field)
 
-    def __file_data(self, limit_table: Optional[str] = None, ids: Optional[List[str]] = None, data: Optional[Any] = None) -> None:
+    def __file_data(self, limit_table: Optional[str] = None, ids: Optional[List[str]] = None, data: Optional[Any] = None, db: Optional[sqlalchemy.engine.Engine] = None) -> Optional[Dict[str, Dict[str, Any]]]:
         """
-        Get file data.
+        Get file data. The files table for each upload is read with a single
+        query for all of the files referenced, rather than one per row.
 
         :param limit_table: Table to limit the query to
         :param ids: List of IDs to query
-        :param data: Additional data for the query
+        :param data: Rows to get the referenced files for, if `ids` is not given
+        :param db: Engine to read from, if not the primary engine
+        :return: File information, by table and then id, or None if there are
+            no upload fields
         """
-        pass
+        uploads = self.__file_data_fields(limit_table, ids, data)
+
+        if uploads is None:
+            return None
+
+        files = {}
+        engine = self._engine if db is None else db
+
+        for upload, wanted in uploads.items():
+            table = upload.table()
 
-    def __file_data_fields(self, limit_table: Optional[str] = None, ids: Optional[List[str]] = None, data: Optional[Any] = None) -> None:
+            if table not in files:
+                files[table] = {}
+
+            if len(wanted):
+                files[table].update(upload.data(engine, wanted))
+
+        return files
+
+    def __file_data_fields(self, limit_table: Optional[str] = None, ids: Optional[List[str]] = None, data: Optional[Any] = None) -> Optional[Dict[Any, set]]:
         """
-        Get file data fields.
+        Get the ids of the files to read for each upload.
 
         :param limit_table: Table to limit the query to
         :param ids: List of IDs to query
-        :param data: Additional data for the query
+        :param data: Rows to get the referenced files for, if `ids` is not given
+        :return: Set of file ids for each upload, or None if there are no
+            upload fields
+        """
+        uploads = None
+
+        for field in self._fields:
+            upload = field.upload()
+
+            if upload is None or upload.table() is None:
+                continue
+
+            if limit_table is not None and upload.table() != limit_table:
+                continue
+
+            if uploads is None:
+                uploads = {}
+
+            if upload not in uploads:
+                # Fields can share an upload, so its files are read together
+                uploads[upload] = set()
+
+            if ids is not None:
+                uploads[upload].update(ids)
+            elif data is not None:
+                read = field._read_name
+
+                for row in data:
+                    val = read(row)
+
+                    if val is not None and val != '' and val is not False:
+                        uploads[upload].add(val)
+
+        return uploads
+
+    def _reader(self) -> sqlalchemy.engine.Engine:
+        """
+        Get the engine to use for a read that doesn't need to see this
+        request's writes.
+
+        :return: A read replica engine, or the primary engine if there are none.
         """
-        pass
+        if self._read_replicas is None:
+            return self._engine
+
+        return self._read_replicas.engine()
 
     def _find_field(self, name: str, type: str) -> Optional[Field]:
         """
@@ -637,6 +1187,9 @@ class Editor(NestedData):
         :param type: Type of name to search for ('name' or 'db')
         :return: Found field or None if not found
         """
+        if type == 'db':
+            return self.__routes()['db'].get(name)
+
         for field in self._fields:
             if field is None:
                 continue
@@ -688,158 +1241,644 @@ class Editor(NestedData):
             a = joined_table.split(' ')
             return a[2]
 
-    def __get(self, id: Optional[Union[str, List[str]]] = None, http: Optional[Any] = None) -> Dict[str, Any]:
+    def __query(self) -> tuple:
         """
-        Get records by ID or HTTP request.
+        Build the select query for the configured fields and left joins.
 
-        :param id: ID(s) of the record(s) to get
-        :param http: HTTP request object
-        :return: Dictionary of records
+        :return: Tuple of the query and the table objects by name or alias.
         """
-        response = {}
-        options = {}
+        # Generate primary table object
+        table = self.table()[0]
 
-        cancel = self._trigger('preGet', id)
-        if (cancel is False):
-            return {}
+        # An array of table objects
+        tables = {}
+        tables[table] = self.__get_table(table)
 
-        if self._custom_get is not None:
-            response = self._custom_get(id, http)
-        else:
-            fields = self.fields()
+        # And now generate the join table objects - leave aliases until the end
+        alias_tables = []
 
-            # Generate primary table object
-            table = self.table()[0]
+        for left_join in self._left_join:
+            joined_table = left_join['table']
 
-            # An array of table objects
-            tables = {}
-            tables[table] = self.__get_table(table)
+            # Check for aliases
+            if joined_table.lower().find(' as ') == -1:
+                if joined_table not in tables:
+                    tables[joined_table] = self.__get_table(joined_table)
+            else:
+                a = joined_table.split(' ')
+                alias_tables.append([a[0], a[2]])
 
-            # And now generate the join table objects - leave aliases until the end
-            alias_tables = []
+        for alias in alias_tables:
+            if alias[0] not in tables:
+                raise ValueError(
+                    'Alias "' + alias[0] + '" present but table not defined')
 
-            for left_join in self._left_join:
-                joined_table = left_join['table']
+            tables[alias[1]] = tables[alias[0]].alias(alias[1])
+            # tables[alias[1]] .alias()
 
-                # Check for aliases
-                if joined_table.lower().find(' as ') == -1:
-                    if joined_table not in tables:
-                        tables[joined_table] = self.__get_table(joined_table)
-                else:
-                    a = joined_table.split(' ')
-                    alias_tables.append([a[0], a[2]])
+        # Now build up the query
+        query = sqlalchemy.select()
 
-            for alias in alias_tables:
-                if alias[0] not in tables:
-                    raise ValueError(
-                        'Alias "' + alias[0] + '" present but table not defined')
+        # pkeys first
+        for pkey in self._pkey:
+            query = self.__add_to_query(query, pkey, table, tables)
 
-                tables[alias[1]] = tables[alias[0]].alias(alias[1])
-                # tables[alias[1]] .alias()
+        # ... then the fields, unless they're also pkeys
+        for field in self._fields:
+            db_field = field.db_field()
+            if db_field not in self._pkey:
+                query = self.__add_to_query(
+                    query, field.db_field(), table, tables)
 
-            # Now build up the query
-            query = sqlalchemy.select()
+        for left_join in self._left_join:
+            jt = self.__get_table_from_join(left_join['table'])
 
-            # pkeys first
-            for pkey in self._pkey:
-                query = self.__add_to_query(query, pkey, table, tables)
+            if jt == split_table_column(left_join['field1'])[1]:
+                lc, lt = split_table_column(left_join['field1'])
+                rc, rt = split_table_column(left_join['field2'])
+            else:
+                lc, lt = split_table_column(left_join['field2'])
+                rc, rt = split_table_column(left_join['field1'])
 
-            # ... then the fields, unless they're also pkeys
-            for field in self._fields:
-                db_field = field.db_field()
-                if db_field not in self._pkey:
-                    query = self.__add_to_query(
-                        query, field.db_field(), table, tables)
+            query = query.join(
+                tables[lt].get(), tables[lt].get().c[lc] == tables[rt].get().c[rc], isouter=True
+            )
 
-            for left_join in self._left_join:
-                jt = self.__get_table_from_join(left_join['table'])
+        return query, tables
 
-                if jt == split_table_column(left_join['field1'])[1]:
-                    lc, lt = split_table_column(left_join['field1'])
-                    rc, rt = split_table_column(left_join['field2'])
-                else:
-                    lc, lt = split_table_column(left_join['field2'])
-                    rc, rt = split_table_column(left_join['field1'])
+    def __where_ids(self, query: sqlalchemy.sql.Select, tables: Dict[str, Table], id_list: List[str]) -> sqlalchemy.sql.Select:
+        """
+        Limit a query to the rows with the given ids.
 
-                query = query.join(
-                    tables[lt].get(), tables[lt].get().c[lc] == tables[rt].get().c[rc], isouter=True
-                )
+        :param query: SQLAlchemy Select object
+        :param tables: Table objects by name or alias
+        :param id_list: Row ids
+        :return: Updated query
+        """
+        table = self.table()[0]
+        or_conditions = []
 
-            if id is not None:
-                # Put IDs into an array an iterate through
-                id_list = id if isinstance(id, list) else [id]
+        for i in id_list:
+            and_conditions = []
 
-                or_conditions = []
+            idvals = self.pkey_to_object(i, True)
 
-                for i in id_list:
-                    and_conditions = []
+            # COLIN POSTGRES
+            for idval in idvals:
+                pk = split_table_column(idval)[0]
+                val = idvals[idval]
+                and_conditions.append(
+                    tables[table].get().c[pk].__eq__(val))
 
-                    idvals = self.pkey_to_object(i, True)
+            or_conditions.append(and_(*and_conditions))
 
-                    # COLIN POSTGRES
-                    for idval in idvals:
-                        pk = split_table_column(idval)[0]
-                        val = idvals[idval]
-                        and_conditions.append(
-                            tables[table].get().c[pk].__eq__(val))
+        return query.where(or_(*or_conditions))
 
-                    or_conditions.append(and_(*and_conditions))
+    def _plan_queries(self) -> List[tuple]:
+        """
+        Build the queries that Editor runs, for `Diagnostics` to get their
+        query plans: the read, a global search, an order by each field and a
+        refetch of a row by its primary key.
 
-                query = query.where(or_(*or_conditions))
+        :return: List of tuples of the query's kind (`read`, `search`, `order`
+            or `refetch`), a label and the query
+        """
+        query, tables = self.__query()
+        out = [('read', self.table()[0], query)]
 
-            sql_stmt = str(query.compile(
-                compile_kwargs={"literal_binds": True}))
-            print(sql_stmt)
+        fields = [field for field in self._fields
+                  if field.http() and field._apply('get')]
+        columns = {str(i): {'data': field.name()} for i, field in enumerate(fields)}
 
-            # Execute the query and fetch results
-            result = self._session.execute(query).fetchall()
+        if len(columns):
+            out.append(('search', 'all columns', self.__filter_order(
+                query, {'columns': columns, 'search': {'value': 'x'}}, tables)))
 
-            # Field options and SearchPane options (TK)
-            if id == None:
-                for field in fields:
-                    opts = field._options_exec(self._engine)
-                    if opts != None:
-                        options[field.name()] = opts
+        for idx, field in zip(columns, fields):
+            out.append(('order', field.db_field(), self.__filter_order(
+                query, {'columns': columns, 'order': [{'column': idx}]}, tables)))
 
-            # TK not sure if this is a good idea here - will it be used later?
-            self._session.close()
+        id = self._pkey_separator().join('0' for pkey in self._pkey)
+        out.append(('refetch', ', '.join(self._pkey),
+                    self.__where_ids(query, tables, [id])))
 
-            self.__trace(result)
-            self.debug(str(sql_stmt))
+        return out
 
-            out = []
-            for this_row in result:
-                # The_mapping contains an object with the key/value
-                row = this_row._mapping
-                val = self.pkey_to_value(row, True)
-                inner = {"DT_RowId":  self.id_prefix() + val}
+    def __filter_order(self, query: sqlalchemy.sql.Select, http: Dict[str, Any], tables: Dict[str, Table]) -> sqlalchemy.sql.Select:
+        """
+        Apply the search and ordering parameters sent by DataTables to a query.
+        The global search matches a row if any searchable column contains the
+        value, and each column's own search must also match. Columns are
+        matched to fields by their `data` property.
 
-                for field in self._fields:
-                    if field._apply('get') and field.http():
-                        field._write(inner, row)
+        :param query: SQLAlchemy Select object
+        :param http: Request parameters, nested
+        :param tables: Table objects by name or alias
+        :return: Updated query
+        """
+        primary = self.table()[0]
+        columns = http.get('columns') or {}
+        by_name = {field.name(): field for field in self._fields}
+        exprs = {}
 
-                out.append(inner)
+        if isinstance(columns, list):
+            columns = dict(enumerate(columns))
 
-            # Build a DT respobnse object
-            response = {
-                'data': out,
-                # 'draw': None,
-                # 'files': {},
-                'options': options
-                # 'recordsFiltered': None,
-                # 'recordstotal': None,
-                # 'searchPanes': None,
-                # 'searchBuilder': None,
-            }
+        for idx, column in columns.items():
+            field = by_name.get(column.get('data')) if isinstance(column, dict) else None
 
-            # TK stuff for row based joins
+            if field is not None and field.http():
+                c, t = split_table_column(field.db_field())
+                exprs[str(idx)] = (column, tables[primary if t is None else t].get().c[c])
 
-        self.__trace(response)
+        def matches(expr: Any, value: str) -> Any:
+            return sqlalchemy.cast(expr, String).contains(value, autoescape=True)
 
-        self._trigger('postGet', id, response['data'])
-        return response
+        search = http.get('search')
+        value = search.get('value') if isinstance(search, dict) else None
 
-    def _insert(self, values: Dict[str, Any]) -> Optional[str]:
+        if value:
+            searchable = [matches(expr, value) for column, expr in exprs.values()
+                          if column.get('searchable') not in ('false', False)]
+
+            if len(searchable):
+                query = query.where(or_(*searchable))
+
+        for column, expr in exprs.values():
+            col_search = column.get('search')
+            value = col_search.get('value') if isinstance(col_search, dict) else None
+
+            if value and column.get('searchable') not in ('false', False):
+                query = query.where(matches(expr, value))
+
+        order = http.get('order') or {}
+
+        if isinstance(order, list):
+            order = dict(enumerate(order))
+
+        # Keys sent by the client which aren't indexes are ignored
+        indexes = []
+
+        for key in order:
+            try:
+                indexes.append((int(key), key))
+            except (TypeError, ValueError):
+                continue
+
+        for index, key in sorted(indexes):
+            item = order[key]
+
+            if not isinstance(item, dict):
+                continue
+
+            match = exprs.get(str(item.get('column')))
+
+            if match is None or match[0].get('orderable') in ('false', False):
+                continue
+
+            direction = str(item.get('dir', 'asc')).lower()
+            query = query.order_by(
+                match[1].desc() if direction == 'desc' else match[1].asc())
+
+        return query
+
+    def __export(self, http: Dict[str, Any], format: str, chunk: int) -> Iterator[bytes]:
+        """
+        Generator for `export()`. Rows are fetched from the database `chunk`
+        at a time, and formatted and encoded a chunk at a time, so only one
+        chunk is held in memory.
+
+        :param http: Request parameters, nested
+        :param format: `csv` or `ndjson`
+        :param chunk: Number of rows per chunk
+        :return: Iterator of encoded chunks
+        """
+        names = [field.name() for field in self._fields
+                 if field._apply('get') and field.http()]
+
+        if format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+
+            writer.writerow(names)
+            yield buffer.getvalue().encode('utf-8')
+
+        encode = self.encoder().encode
+
+        for keys, rows in self.__partitions(http, chunk):
+            if format == 'csv':
+                buffer.seek(0)
+                buffer.truncate()
+
+                ids, fields = self.__read_columns(keys, rows)
+                writer.writerows(zip(*[
+                    [Editor.__csv_value(val) for val in values]
+                    for field, values in fields
+                ]))
+
+                yield buffer.getvalue().encode('utf-8')
+            else:
+                yield b''.join(
+                    encode(row) + b'\n' for row in self.__rows_to_data(keys, rows))
+
+    def __partitions(self, http: Dict[str, Any], chunk: int) -> Iterator[tuple]:
+        """
+        Read all rows matching the DataTables search parameters, in the order
+        requested, `chunk` rows at a time.
+
+        :param http: Request parameters, nested
+        :param chunk: Number of rows per chunk
+        :return: Iterator of the result's column labels and a chunk of rows
+        """
+        query, tables = self.__query()
+        query = self.__filter_order(query, http, tables)
+
+        with self._reader().connect() as connection:
+            result = connection.execution_options(yield_per=chunk).execute(query)
+            keys = list(result.keys())
+
+            for rows in result.partitions(chunk):
+                yield keys, rows
+
+    def __arrow(self, http: Dict[str, Any], chunk: int, cancelled: bool) -> Iterator[bytes]:
+        """
+        Generator for `arrow()`. Each chunk of rows becomes one record batch.
+
+        :param http: Request parameters, nested
+        :param chunk: Number of rows per record batch
+        :param cancelled: Write the schema only, with no rows
+        :return: Iterator of Arrow IPC stream pieces
+        """
+        import pyarrow
+
+        buffer = io.BytesIO()
+        writer = None
+        schema = None
+
+        def flush() -> bytes:
+            out = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return out
+
+        partitions = () if cancelled else self.__partitions(http, chunk)
+
+        for keys, rows in partitions:
+            ids, fields = self.__read_columns(keys, rows)
+
+            if schema is None:
+                # Column types are taken from the first chunk. Columns with
+                # nothing but nulls in it are assumed to be strings.
+                arrays = []
+
+                for field, values in fields:
+                    array = pyarrow.array(values)
+
+                    if pyarrow.types.is_null(array.type):
+                        array = array.cast(pyarrow.string())
+
+                    arrays.append(array)
+
+                schema = pyarrow.schema([
+                    pyarrow.field(field.name(), array.type)
+                    for (field, values), array in zip(fields, arrays)
+                ])
+                writer = pyarrow.ipc.new_stream(buffer, schema)
+            else:
+                arrays = []
+
+                for (field, values), type in zip(fields, schema.types):
+                    try:
+                        arrays.append(pyarrow.array(values, type=type))
+                    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+                        raise Exception(
+                            'Values for field `' + field.name() + '` do not '
+                            'match the column type `' + str(type) + '`. Use a '
+                            'get formatter to give the field a single type.')
+
+            writer.write_batch(
+                pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+
+            yield flush()
+
+        if writer is None:
+            # No rows - the schema can only be given as strings
+            schema = pyarrow.schema([
+                pyarrow.field(field.name(), pyarrow.string())
+                for field in self._fields
+                if field._apply('get') and field.http()
+            ])
+            writer = pyarrow.ipc.new_stream(buffer, schema)
+
+        writer.close()
+
+        yield flush()
+
+    @staticmethod
+    def __csv_value(val: Any) -> Any:
+        """
+        Convert a value for writing into a CSV cell.
+
+        :param val: Formatted field value
+        :return: Value for the csv writer
+        """
+        if val is None:
+            return ''
+
+        if isinstance(val, (list, dict)):
+            return default_encoder().encode(val).decode('utf-8')
+
+        if hasattr(val, 'isoformat'):
+            return val.isoformat()
+
+        # A spreadsheet would run a cell starting with one of these as a
+        # formula, so it is quoted to keep it as text (CSV injection)
+        if isinstance(val, str) and val[:1] in ('=', '+', '-', '@', '\t', '\r'):
+            return "'" + val
+
+        return val
+
+    def __get(self, id: Optional[Union[str, List[str]]] = None, http: Optional[Any] = None, db: Optional[sqlalchemy.engine.Engine] = None) -> Dict[str, Any]:
+        """
+        Get records by ID or HTTP request.
+
+        :param id: ID(s) of the record(s) to get
+        :param http: HTTP request object
+        :param db: Engine to read from, if not the primary engine
+        :return: Dictionary of records
+        """
+        response = {}
+        options = {}
+
+        cancel = self._trigger('preGet', id)
+        if (cancel is False):
+            return {}
+
+        if self._custom_get is not None:
+            response = self._custom_get(id, http)
+        else:
+            fields = self.fields()
+            table = self.table()[0]
+            query, tables = self.__query()
+
+            if id is not None:
+                query = self.__where_ids(
+                    query, tables, id if isinstance(id, list) else [id])
+
+            if http is not None and 'since' in http and self._updated_at is not None:
+                # Rows written in the same instant as the version are sent
+                # again, rather than lost - the client replaces them by id
+                c, t = split_table_column(self._updated_at)
+                query = query.where(
+                    tables[table if t is None else t].get().c[c] >= http['since'])
+
+            if self._debug:
+                self.debug(str(query.compile(
+                    compile_kwargs={"literal_binds": True})))
+
+            # Execute the query and fetch results
+            with (self._engine if db is None else db).connect() as connection:
+                result = connection.execute(query)
+                keys = list(result.keys())
+                rows = result.fetchall()
+
+            # Field options and SearchPane options (TK)
+            if id == None:
+                for field in fields:
+                    opts = field._options_exec(self._engine if db is None else db)
+                    if opts != None:
+                        options[field.name()] = opts
+
+            self.__trace(rows)
+
+            out = self.__rows_to_data(keys, rows)
+
+            # Build a DT respobnse object
+            response = {
+                'data': out,
+                # 'draw': None,
+                'options': options
+                # 'recordsFiltered': None,
+                # 'recordstotal': None,
+                # 'searchPanes': None,
+                # 'searchBuilder': None,
+            }
+
+            files = self.__file_data(None, None, out, db)
+
+            if files is not None:
+                response['files'] = files
+
+            # TK stuff for row based joins
+
+        self.__trace(response)
+
+        self._trigger('postGet', id, response['data'])
+        return response
+
+    def __read_columns(self, keys: List[str], rows: List[Any]) -> tuple:
+        """
+        Apply the get formatters to a result set a column at a time, rather
+        than a row at a time. Formatters which have a `batch` function are
+        given the whole column, others are called for each value.
+
+        :param keys: Column labels of the result set
+        :param rows: Rows of the result set
+        :return: Tuple of the primary key values for the rows, and a list of
+            `(field, values)` for each field that is read
+        """
+        count = len(rows)
+        columns = dict(zip(keys, map(list, zip(*rows)))) if count else {
+            key: [] for key in keys}
+
+        mappings = None
+
+        def data() -> List[Any]:
+            # Row mappings are only needed by formatters, so create on demand
+            nonlocal mappings
+
+            if mappings is None:
+                mappings = [row._mapping for row in rows]
+
+            return mappings
+
+        fields = []
+
+        for field in self._fields:
+            if field._apply('get') and field.http():
+                fields.append((field, field._get_column(columns, count, data)))
+
+        return self.__pkey_column(columns), fields
+
+    def __pkey_column(self, columns: Dict[str, List[Any]]) -> List[str]:
+        """
+        Get the primary key values for a result set held as columns. This is
+        the column-wise version of `pkey_to_value`.
+
+        :param columns: Result set values by column label
+        :return: Primary key value for each row
+        """
+        parts = []
+
+        for column in self._pkey:
+            values = columns.get(column)
+
+            if values is None or None in values:
+                raise Exception(
+                    "Primary key element is not available in the data set")
+
+            parts.append([val.isoformat() if isinstance(val, datetime) else str(val)
+                          for val in values])
+
+        if len(parts) == 1:
+            return parts[0]
+
+        return [self._pkey_separator().join(vals) for vals in zip(*parts)]
+
+    def __rows_to_data(self, keys: List[str], rows: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Build the `data` array for DataTables from a result set.
+
+        :param keys: Column labels of the result set
+        :param rows: Rows of the result set
+        :return: List of row objects, each with a `DT_RowId`
+        """
+        ids, fields = self.__read_columns(keys, rows)
+        prefix = self.id_prefix()
+
+        out = [{'DT_RowId': prefix + id} for id in ids]
+
+        for field, values in fields:
+            write = field._write_name
+
+            for inner, val in zip(out, values):
+                write(inner, val)
+
+        return out
+
+    def __get_delta(self, http: Dict[str, Any], db: Optional[sqlalchemy.engine.Engine] = None) -> Dict[str, Any]:
+        """
+        Get the records which have changed since the version given by the
+        client in the `since` parameter. If there is no `since` parameter (or
+        it is empty), or the change log can't answer for it, a full read is
+        done.
+
+        :param http: HTTP request data
+        :param db: Engine to read from, if not the primary engine
+        :return: Dictionary of records, with `version` and `delta` set
+        """
+        if http.get('since') in (None, ''):
+            # No version yet (e.g. the table was empty), so a full read
+            http = {k: v for k, v in http.items() if k != 'since'}
+
+        if self._change_log is not None:
+            # The change log's version describes the primary. Rows read from
+            # a replica that is behind it would be stale or missing, and the
+            # client, having moved on to the new version, would never ask
+            # for them again
+            db = None
+
+        # Get the version before reading, so any change made while reading
+        # will be picked up again on the next delta
+        version = self.__version(db)
+        changes = None
+
+        if 'since' in http and self._change_log is not None:
+            changes = self._change_log.since(http['since'])
+
+            if changes is None:
+                # Log can't answer, so the client needs everything
+                http = {k: v for k, v in http.items() if k != 'since'}
+        elif 'since' in http:
+            since = self.__since(http['since'], version)
+
+            if since is None:
+                # Not a value of the `updated_at` column, so a full read
+                http = {k: v for k, v in http.items() if k != 'since'}
+            else:
+                http = {**http, 'since': since}
+
+        if changes is not None:
+            upserted, removed, version = changes
+            response = self.__get(upserted, None, db) if len(upserted) else {'data': []}
+            response['removed'] = [self.id_prefix() + id for id in removed]
+            response['delta'] = True
+        elif 'since' in http and self._change_log is None:
+            # Rows filtered on the `updated_at` column by `__get`
+            response = self.__get(None, http, db)
+            response['removed'] = []
+            response['delta'] = True
+        else:
+            response = self.__get(None, http, db)
+            response['delta'] = False
+
+        # The latest `updated_at` value is sent as a string, whatever its type
+        response['version'] = version if self._change_log is not None or version is None else str(version)
+
+        return response
+
+    def __log_changes(self) -> None:
+        """
+        Record the rows written by the request in the change log. Called once
+        the writes have been committed, so a write which is rolled back never
+        advances the version.
+        """
+        if self._change_log is not None:
+            for id, removed in self._changes:
+                if removed:
+                    self._change_log.remove(id)
+                else:
+                    self._change_log.upsert(id)
+
+        self._changes = []
+
+    @staticmethod
+    def __since(since: Any, latest: Any) -> Any:
+        """
+        Convert the `since` version from a request into the type of the
+        `updated_at` column's values, as the database driver gives them, so it
+        is compared with the column as a value rather than relying on how each
+        database converts a string.
+
+        :param since: Version given by the client
+        :param latest: Latest `updated_at` value, from `__version`
+        :return: Version as a value of the column, or None if it isn't valid
+            for the column
+        """
+        kind = type(latest)
+
+        if latest is None or not isinstance(since, str) or kind is str:
+            return since
+
+        try:
+            if hasattr(kind, 'fromisoformat'):
+                # Dates and times, which are sent to the client with `str()`
+                return kind.fromisoformat(since)
+
+            return kind(since)
+        except (TypeError, ValueError, ArithmeticError):
+            return None
+
+    def __version(self, db: Optional[sqlalchemy.engine.Engine] = None) -> Any:
+        """
+        Get the current version of the data for delta reads.
+
+        :param db: Engine to read from, if not the primary engine
+        :return: The change log version, or the latest `updated_at` value
+            (None if the table is empty).
+        """
+        if self._change_log is not None:
+            return self._change_log.version()
+
+        c, t = split_table_column(self._updated_at)
+        table = self.__get_table(self.table()[0] if t is None else t).get()
+
+        query = sqlalchemy.select(sqlalchemy.func.max(table.c[c]))
+
+        with (self._engine if db is None else db).connect() as connection:
+            return connection.execute(query).scalar()
+
+    def _insert(self, values: Dict[str, Any]) -> Optional[str]:
         """
         Insert a new record.
 
@@ -852,7 +1891,7 @@ class Editor(NestedData):
         for field in self._fields:
             val = field.val('set', values)
             if val is not None:
-                self._write_prop(all, field.name(), val)
+                field._write_name(all, val)
 
         # Only allow a composite insert if the values for the key are
         # submitted. This is required because there is no reliable way in MySQL
@@ -877,6 +1916,9 @@ class Editor(NestedData):
 
         self._trigger('writeCreate', id, values)
 
+        # Recorded in the change log once the writes are committed
+        self._changes.append((id, False))
+
         return id
 
     def _insert_or_update(self, id: Optional[str], values: Dict[str, Any]) -> Optional[str]:
@@ -955,25 +1997,17 @@ class Editor(NestedData):
         action = 'create' if where is None else 'edit'
         table_alias = self.__alias(table, 'alias')
 
-        for field in self._fields:
-            table_part = self._part(field.db_field())
-
-            part = self._part(field.db_field(), 'db')
-            if part is not  None:
-                table_part = part + '.' + table_part
+        # Fields that apply to this table and can be written for this action
+        # (only separated by table when a join is being used)
+        routes = self.__routes()['tables']
+        route = routes.get(table_alias if len(self._left_join) else None)
 
-            # Does this field apply to the table (only check when a join is being used)
-            if len(self._left_join) and table_part != table_alias:
+        for field, column in route[action] if route is not None else []:
+            # Check if this field was submitted
+            if not field._submitted(values):
                 continue
 
-            # Check if this field should be set, based on options and submitted data
-            if not field._apply(action, values):
-                continue
-
-            # Some database's (specifically pg) don't like having the table
-            # name prefixing the column name.
-            field_part = self._part(field.db_field(), 'column')
-            set[field_part] = field.val('set', values)
+            set[column] = field.val('set', values)
 
         if len(set) == 0:
             return None
@@ -1062,6 +2096,73 @@ class Editor(NestedData):
 
         return None
 
+    def __routes(self) -> Dict[str, Any]:
+        """
+        Get the routing of fields to tables for writes. This is worked out once
+        for the Editor's configuration, so the write path only needs to check
+        which of a table's fields were submitted, rather than checking every
+        field for every table on every row.
+
+        :return: Dictionary with:
+            `tables` - for each table alias (or `None` when no join is used), the
+            `(field, column)` pairs which can be written on `create` and `edit`.
+            `removable` - the table aliases that have a field which can be set.
+            `unqualified` - if any field has no table part.
+            `db` - fields by their database column name.
+        """
+        # A frozen Editor's fields can't be changed, otherwise the routes are
+        # rebuilt if any field has been changed since they were worked out
+        if self._routes is not None and (self._frozen or self._routes['generation'] == Field._generation):
+            return self._routes
+
+        generation = Field._generation
+        joined = len(self._left_join) > 0
+        tables = {}
+        removable = set()
+        unqualified = False
+        db = {}
+
+        for field in self._fields:
+            if field is None:
+                continue
+
+            db_field = field.db_field()
+            set_type = field.set()
+
+            if db_field not in db:
+                db[db_field] = field
+
+            # Some database's (specifically pg) don't like having the table
+            # name prefixing the column name, so the column is used alone
+            part, table, column = field._db_parts
+            table_part = table if part is None else part + '.' + table
+
+            route = tables.setdefault(table_part if joined else None, {
+                'create': [],
+                'edit': []
+            })
+
+            if set_type != SetType.NONE and set_type != SetType.EDIT:
+                route['create'].append((field, column))
+
+            if set_type != SetType.NONE and set_type != SetType.CREATE:
+                route['edit'].append((field, column))
+
+            if '.' not in db_field:
+                unqualified = True
+            elif set_type != SetType.NONE:
+                removable.add(table)
+
+        self._routes = {
+            'tables': tables,
+            'removable': removable,
+            'unqualified': unqualified,
+            'db': db,
+            'generation': generation
+        }
+
+        return self._routes
+
     def __get_table(self, requested_table: Optional[str] = None, requested_fields: Optional[List[str]] = None) -> Table:
         """
         Get a table object that contains the SQLAlchemy table setup.
@@ -1090,6 +2191,9 @@ class Editor(NestedData):
                 table.columns(left_join['field1'])
                 table.columns(left_join['field2'])
 
+            if self._updated_at is not None:
+                table.columns(self._updated_at)
+
         else:
             table.columns(requested_fields)
 
@@ -1201,30 +2305,49 @@ class Editor(NestedData):
         if len(ids) == 0:
             return
 
-        # Row based joins - remove first as the host row will be removed which is a dependency
-        for join in self._join:
-            join.remove(self, ids)
-
-        if self._left_join_remove:
-            for join in self._left_join:
-                # Which side of the join refers to the parent table?
-                if join['field1'].startswith(join['table']):
-                    parent_link = join['field2']
-                    child_link = join['field1']
-                else:
-                    parent_link = join['field1']
-                    child_link = join['field2']
+        # All of the deletes happen in a single transaction
+        rowcount = {}
+
+        try:
+            # Row based joins - remove first as the host row will be removed
+            # which is a dependency. In the transaction, so they are rolled
+            # back if a later delete fails
+            for join in self._join:
+                join.remove(self, ids)
+
+            if self._left_join_remove:
+                for join in self._left_join:
+                    # Which side of the join refers to the parent table?
+                    if join['field1'].startswith(join['table']):
+                        parent_link = join['field2']
+                        child_link = join['field1']
+                    else:
+                        parent_link = join['field1']
+                        child_link = join['field2']
 
-                # Only delete on the primary key, since that is what the ids refer
-                # to - otherwise we'd be deleting random data! Note that this
-                # won't work with compound keys since the parent link would be
-                # over multiple fields.
-                if parent_link == self._pkey[0] and len(self._pkey) == 1:
-                    self.__remove_table(join['table'], ids, [child_link])
+                    # Only delete on the primary key, since that is what the ids refer
+                    # to - otherwise we'd be deleting random data! Note that this
+                    # won't work with compound keys since the parent link would be
+                    # over multiple fields.
+                    if parent_link == self._pkey[0] and len(self._pkey) == 1:
+                        rowcount[join['table']] = self.__remove_table(
+                            join['table'], ids, [child_link])
 
-        tables = self.table()
-        for table in tables:
-            self.__remove_table(table, ids)
+            tables = self.table()
+            for table in tables:
+                rowcount[table] = self.__remove_table(table, ids)
+
+            self._session.commit()
+        except Exception as e:
+            self._session.rollback()
+            self.__trace(e)
+            self._out['error'] = 'An SQL error occurred: ' + str(e)
+            return
+
+        self.debug({'rowcount': rowcount})
+
+        self._changes.extend((id, True) for id in ids)
+        self.__log_changes()
 
         for id in ids:
             self._trigger('postRemove', id,
@@ -1232,55 +2355,333 @@ class Editor(NestedData):
 
         self._trigger('postRemoveAll', ids, data)
 
-    def __remove_table(self, table: str, ids: List[str], pkey: Optional[List[str]] = None) -> None:
+    def __remove_table(self, table: str, ids: List[str], pkey: Optional[List[str]] = None) -> int:
         """
-        Remove records from a specific table.
+        Remove records from a specific table. Compound keys are matched on all
+        of their columns, and large numbers of ids are split into chunks so
+        the statements stay within the database's parameter limit. The
+        transaction is not committed here.
 
         :param table: The name of the table.
         :param ids: List of record IDs to remove.
         :param pkey: Primary key fields, if different from the default.
+        :return: Number of rows removed.
         """
         if pkey is None:
             pkey = self.pkey()
 
-        count = 0
-        fields = self.fields()
+        routes = self.__routes()
         table_alias = self.__alias(table, 'alias')
         table_orig = self.__alias(table, 'orig')
 
         # Check that there is actually a field which has a set option for this table
-        for field in fields:
-            db_field = field.db_field()
-            if '.' not in db_field or (self._part(db_field, 'table') == table_alias and field.set() != SetType.NONE):
-                count += 1
+        if not routes['unqualified'] and table_alias not in routes['removable']:
+            return 0
+
+        sqla_table = self.__get_table(table_orig).get()
+        columns = [sqla_table.c[split_table_column(column)[0]]
+                   for column in pkey]
+        values = []
+
+        for id in ids:
+            cond = self.pkey_to_object(id, True, pkey)
+            values.append(tuple(cond[column] for column in pkey))
+
+        limit = self.param_limits.get(self._engine.dialect.name, 999)
+        size = max(1, limit // len(columns))
+        count = 0
+
+        for i in range(0, len(values), size):
+            stmt = sqla_table.delete().where(
+                self.__in(columns, values[i:i + size]))
 
-        if count > 0:
-            sqla_table = self.__get_table(table_orig).get()
-            ids_to_delete = []
+            if self._debug:
+                self.debug(str(stmt.compile(
+                    compile_kwargs={"literal_binds": True})))
+
+            res = self._session.execute(stmt)
+            count += res.rowcount
+
+        return count
+
+    def __in(self, columns: List[Any], values: List[tuple]) -> Any:
+        """
+        Build a condition matching rows whose columns equal any of the given
+        value tuples.
+
+        :param columns: SQLAlchemy columns to match
+        :param values: Tuples of values, one value per column
+        :return: SQLAlchemy condition
+        """
+        if len(columns) == 1:
+            return columns[0].in_([val[0] for val in values])
+
+        # SQL Server doesn't support row values, so needs the long form
+        if self._engine.dialect.name == 'mssql':
+            return or_(*[
+                and_(*[column == v for column, v in zip(columns, val)])
+                for val in values
+            ])
+
+        return tuple_(*columns).in_(values)
+
+    def bulk_import(self, file: Any, chunk: Optional[int] = 1000, delimiter: Optional[str] = ',', error_limit: Optional[int] = 1000) -> Dict[str, Any]:
+        """
+        Import rows from a CSV file into the Editor's table.
+
+        The first line of the file gives the field names (as `Field.name()`)
+        of the columns. Columns which don't match a field are ignored. The
+        file is read as a stream, `chunk` rows at a time. Each chunk goes
+        through the same steps as a `create`:
+        * Validation. Each validator is run over the chunk's values for a
+          field, so validators with a `batch` function (`Validate.db_values`)
+          can check them all together.
+        * Set formatters and set values.
+        * Writing, with an `executemany` insert per chunk.
+
+        All of the rows are written in a single transaction. A row which fails
+        validation, or which the database rejects, is left out and reported.
+        The other rows are still imported. The per row events (`preCreate`,
+        `writeCreate`, `postCreate` etc) are not triggered. Only a single table
+        without joins can be imported into.
+
+        :param file: CSV data - a file object (text or binary, e.g. an upload's
+            `stream`), a string or bytes.
+        :param chunk: Number of rows to validate and write at a time.
+        :param delimiter: CSV field delimiter.
+        :param error_limit: Maximum number of row errors to report in detail.
+        :return: Report with the number of `rows` read, the number `imported`
+            and `failed`, the `errors` for the failed rows (`row` is the line
+            number in the file) and the `ignored` columns.
+        """
+        if self._frozen and not self._context:
+            return self.context().bulk_import(file, chunk, delimiter, error_limit)
+
+        if len(self.table()) != 1 or len(self._left_join) or len(self._join):
+            raise Exception(
+                'Bulk import is only available for a single table without joins')
+
+        route = self.__routes()['tables'].get(None)
+
+        if route is None:
+            raise Exception(
+                'Bulk import is not available for an Editor without fields')
+
+        reader = csv.reader(Editor.__text_stream(file), delimiter=delimiter)
+        header = next(reader, [])
+        by_name = {field.name(): field for field in self._fields}
+        columns = []
+        ignored = []
+        report = {'rows': 0, 'imported': 0, 'failed': 0, 'errors': [], 'ignored': ignored}
+
+        for idx, name in enumerate(header):
+            name = name.strip()
+            field = by_name.pop(name, None)
+
+            if field is None:
+                ignored.append(name)
+            else:
+                columns.append((idx, field._write_name))
 
-            for id in ids:
-                cond = self.pkey_to_object(id, True, pkey)
-                ids_to_delete.append(cond[pkey[0]])
+        table = self.table()[0]
+        insert = self.__get_table(table).get().insert()
+        rows = []
+        lines = []
 
+        with self._engine.connect() as connection, Editor.__transaction(connection):
+            hosts = [ValidationHost(Action.CREATE, None, field, self, connection)
+                     for field in self._fields]
+
+            for cells in reader:
+                if len(cells) == 0:
+                    continue
+
+                values = {}
+                count = len(cells)
+
+                for idx, write in columns:
+                    write(values, cells[idx] if idx < count else '')
+
+                rows.append(values)
+                lines.append(reader.line_num)
+
+                if len(rows) == chunk:
+                    self.__import_chunk(connection, insert, route['create'], hosts, rows, lines, report, error_limit)
+                    rows = []
+                    lines = []
+
+            if len(rows):
+                self.__import_chunk(connection, insert, route['create'], hosts, rows, lines, report, error_limit)
+
+        if self._change_log is not None and report['imported'] > 0:
+            # The ids of the new rows aren't known, so clients must reload
+            self._change_log.invalidate()
+
+        return report
+
+    def __import_chunk(self, connection: Any, insert: Any, route: List[tuple], hosts: List[ValidationHost], rows: List[Dict[str, Any]], lines: List[int], report: Dict[str, Any], error_limit: int) -> None:
+        """
+        Validate and write a chunk of rows for `bulk_import`.
+
+        :param connection: Connection, in the import's transaction
+        :param insert: Insert statement for the table
+        :param route: `(field, column)` pairs which can be written on create
+        :param hosts: Validation host for each field
+        :param rows: Rows of submitted data
+        :param lines: Line number in the file for each row
+        :param report: Import report, which is updated
+        :param error_limit: Maximum number of errors to report in detail
+        """
+        errors = {}
+
+        def fail(i: int, name: Optional[str], status: str) -> None:
+            if i not in errors:
+                errors[i] = []
+
+            errors[i].append({'row': lines[i], 'name': name, 'status': status})
+
+        if self._do_validate:
+            for field, host in zip(self._fields, hosts):
+                for i, status in field._validate_batch(rows, self, lines, Action.CREATE, host).items():
+                    fail(i, field.db_field(), status)
+
+        compound = len(self._pkey) > 1
+        groups = {}
+
+        for i, values in enumerate(rows):
+            if i in errors:
+                continue
+
+            if compound:
+                all = {}
+
+                for field in self._fields:
+                    val = field.val('set', values)
+                    if val is not None:
+                        field._write_name(all, val)
+
+                try:
+                    self._pkey_validate_insert(all)
+                except Exception as e:
+                    fail(i, None, str(e).strip())
+                    continue
+
+            set = {}
+
+            for field, column in route:
+                if field._submitted(values):
+                    set[column] = field.val('set', values)
+
+            if len(set):
+                # executemany needs the same columns for every row
+                key = tuple(set)
+
+                if key not in groups:
+                    groups[key] = []
+
+                groups[key].append((i, set))
+
+        def write(items: List[tuple]) -> None:
             try:
-                c, t = split_table_column(pkey[0])
-                stmt = sqla_table.delete().where(
-                    sqla_table.c[c].in_(ids_to_delete))
+                with connection.begin_nested():
+                    connection.execute(insert, [set for i, set in items])
 
-                sql_stmt = str(stmt.compile(
-                    compile_kwargs={"literal_binds": True}))
-                self.debug(str(sql_stmt))
+                report['imported'] += len(items)
+            except sqlalchemy.exc.SQLAlchemyError as e:
+                if len(items) == 1:
+                    fail(items[0][0], None, 'An SQL error occurred: ' + str(getattr(e, 'orig', e)))
+                else:
+                    # Split to find the rows the database rejected, so a few
+                    # bad rows don't need every row to be written on its own
+                    half = len(items) // 2
+                    write(items[:half])
+                    write(items[half:])
 
-                res = self._session.execute(stmt)
-                # TK COLIN need to add some error handling into this
-                # https://docs.sqlalchemy.org/en/20/tutorial/data_update.html#tutorial-update-delete-rowcount
-                # can check this to determine iif the operation worked - =0 fail, >0 success
-                # print(res.rowcount)
-                self._session.commit()
-            except Exception as e:
-                # TK COLIN do something here
-                self._trace(e)
-                pass
+        for items in groups.values():
+            write(items)
+
+        report['rows'] += len(rows)
+        report['failed'] += len(errors)
+
+        for i in sorted(errors):
+            space = error_limit - len(report['errors'])
+
+            if space <= 0:
+                break
+
+            report['errors'] += errors[i][:space]
+
+    @staticmethod
+    @contextlib.contextmanager
+    def __transaction(connection: Any) -> Iterator[None]:
+        """
+        Run a transaction in which savepoints can be nested.
+
+        pysqlite doesn't send a `BEGIN` until the first write, so a `SAVEPOINT`
+        before that would start a transaction of its own, and its `RELEASE`
+        would commit it. As SQLAlchemy documents for SQLite, the driver's
+        transaction handling is turned off (for this connection only, until
+        the transaction ends) and the transaction is begun explicitly.
+
+        :param connection: Connection, not in a transaction
+        """
+        driver = connection.connection.driver_connection
+        level = getattr(driver, 'isolation_level', None)
+        pysqlite = connection.dialect.name == 'sqlite' and \
+            connection.dialect.driver == 'pysqlite' and level is not None
+
+        if pysqlite:
+            driver.isolation_level = None
+
+        try:
+            with connection.begin():
+                if pysqlite:
+                    connection.exec_driver_sql('BEGIN')
+
+                yield
+        finally:
+            if pysqlite:
+                driver.isolation_level = level
+
+    @staticmethod
+    def __text_stream(file: Any) -> Any:
+        """
+        Get a text stream to read CSV from.
+
+        :param file: File object (text or binary), string or bytes
+        :return: Text stream
+        """
+        if isinstance(file, str):
+            return io.StringIO(file, newline='')
+
+        if isinstance(file, (bytes, bytearray)):
+            file = io.BytesIO(file)
+
+        # Uploaded files (e.g. Werkzeug's FileStorage) wrap the stream
+        file = getattr(file, 'stream', file)
+
+        if isinstance(file.read(0), bytes):
+            # `utf-8-sig` drops the byte order mark that spreadsheets can add
+            return io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+
+        return file
+
+    @staticmethod
+    def __import_file(upload: Optional[Dict[str, Any]]) -> Any:
+        """
+        Get the file to import from the uploaded files given to `process()` -
+        the one called `upload`, or otherwise the first.
+
+        :param upload: Uploaded files
+        :return: File, or None if there isn't one
+        """
+        if not upload:
+            return None
+
+        if 'upload' in upload:
+            return upload['upload']
+
+        return next(iter(upload.values()), None)
 
     def _validate(self, errors: List[Dict[str, Any]], data: Dict[str, Any], action: Action) -> bool:
         """
@@ -1299,13 +2700,16 @@ class Editor(NestedData):
 
         fields = self.fields()
 
+        # One host per field, updated for each row, rather than one per value
+        hosts = [ValidationHost(action, None, field, self) for field in fields]
+
         # cycle through all the ids in the request
         for id in data['data']:
             values = data['data'][id]
 
             # then go through all the fields
-            for field in fields:
-                validation = field._validate(values, self, id, action)
+            for field, host in zip(fields, hosts):
+                validation = field._validate(values, self, id, action, host)
                 if validation != True:
                     errors.append({
                         'id': id,
@@ -1347,6 +2751,8 @@ class Editor(NestedData):
         if fn is None:
             return self._validators
 
+        self.__check_frozen()
+
         self._validators.append(fn)
 
         return self
@@ -1361,6 +2767,8 @@ class Editor(NestedData):
         if val is None:
             return self._write
 
+        self.__check_frozen()
+
         if isinstance(val, bool):
             self._write = val
 
@@ -1409,25 +2817,47 @@ submitted with a specific value.
                 break
 
         action = self.action(data)
-        if 'action' in data and action != Action.UPLOAD and len(data['data']) == 0:
+        if 'action' in data and action not in (Action.UPLOAD, Action.IMPORT) and len(data['data']) == 0:
             self._out['error'] = 'No data detected. Have you used {extended: true} for `bodyParser`?'
 
         if 'error' not in self._out:
             if action == Action.READ:
-                out_data = self.__get(None, data)
+                reader = self._reader()
+
+                if self._change_log is not None or self._updated_at is not None:
+                    out_data = self.__get_delta(data, reader)
+                else:
+                    out_data = self.__get(None, data, reader)
                 for key, value in out_data.items():
                     self._out[key] = value
+
+                self.__lap('read', read=len(out_data.get('data') or []))
+            elif action == Action.IMPORT and self._write:
+                file = self.__import_file(upload)
+                delimiter = data.get('delimiter', ',')
+
+                if file is None:
+                    self._out['error'] = 'No file was uploaded for the import'
+                elif not isinstance(delimiter, str) or len(delimiter) != 1:
+                    self._out['error'] = 'The import delimiter must be a single character'
+                else:
+                    self._out['import'] = self.bulk_import(file, delimiter=delimiter)
+                    self.__lap('import', written=self._out['import']['imported'])
             elif action == Action.UPLOAD and self._write:
                 self._upload(data)
+                self.__lap('upload', written=1 if 'upload' in self._out else 0)
             elif action == Action.DELETE and self._write:
                 self.__remove(data)
                 self.__file_clean()
+                self.__lap('write', written=0 if 'error' in self._out else
+                           len(data['data']) - len(self._out['cancelled']))
             elif (action == Action.EDIT or action == Action.CREATE) and self._write:
                 keys = data['data'].keys()
                 eventName = 'Create' if action == Action.CREATE else 'Edit'
 
-                # Pre events so they can occur before validation, and they all happen together
-                for id_src in keys:
+                # Pre events so they can occur before validation, and they all happen together.
+                # A copy of the keys, since cancelled rows are removed
+                for id_src in list(keys):
                     cancel = None
                     values = data['data'][id_src]
 
@@ -1445,8 +2875,11 @@ submitted with a specific value.
                         # Tell the client-side we aren't updating this row
                         self._out['cancelled'].append(id_src)
 
+                self.__lap('pre')
+
                 # Field validation
                 valid = self._validate(self._out['fieldErrors'], data, action)
+                self.__lap('validate')
 
                 pkeys = []
                 just_keys = []
@@ -1484,9 +2917,19 @@ submitted with a specific value.
                     self._trigger(f'write{eventName}All',
                                   just_keys, submitted_data)
 
+                    # Commit anything the joins and events left open, and only
+                    # then tell delta readers about the rows
+                    self._session.commit()
+                    self.__log_changes()
+                    self.__lap('write', written=len(just_keys))
+
                     # Get the data that was updated in a single query
                     return_data = self.__get(just_keys)
                     self._out['data'] = return_data['data']
+                    self.__lap('read', read=len(return_data['data']))
+
+                    if 'files' in return_data:
+                        self._out['files'] = return_data['files']
 
                     # post events
                     for key in pkeys:
@@ -1498,46 +2941,285 @@ submitted with a specific value.
 
                     # File tidy up
                     self.__file_clean()
+                    self.__lap('post')
 
         self._trigger('processed', action, data, self._out)
 
         self._out['debug'] = self._debug_info
 
+    def __lap(self, phase: str, read: Optional[int] = 0, written: Optional[int] = 0) -> None:
+        """
+        Record the end of a phase of processing a request, for the metrics. The
+        phase's time is the time since the last phase ended.
+
+        :param phase: Name of the phase that has finished
+        :param read: Number of rows read in the phase
+        :param written: Number of rows written in the phase
+        """
+        timing = self._timing
+
+        if timing is None:
+            return
+
+        now = time.perf_counter()
+        timing['phases'].append((phase, now - timing['last']))
+        timing['last'] = now
+        timing['read'] += read
+        timing['written'] += written
+
     def __convert_data_to_dict(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Convert data keys from string format to nested dictionary format.
 
+        Keys are in the format "data[57][last_name]", with a trailing `[]`
+        indicating an array value ("data[57][tags][]"). Data which is already
+        nested (e.g. a JSON request body) is copied, down to the `data`
+        mapping which is changed while processing, rather than converted. A
+        multi-value mapping, such as Flask's `request.form`, can be passed in
+        to get all of the values for array keys.
+
         :param data: Data with string keys.
         :return: Data as nested dictionary.
         """
-        # strings are in the format "data[57][last_name]"
+        multi = hasattr(data, 'getlist')
+        items = data.lists() if multi else data.items()
+
+        if not multi and not any('[' in key for key in data):
+            # Rows are removed from `data` as they are cancelled, which mustn't
+            # change the caller's object
+            data = dict(data)
+
+            if isinstance(data.get('data'), dict):
+                data['data'] = dict(data['data'])
+
+            return data
+
         nested_dict = {}
-        for key, value in data.items():
-            keys = key.split('[')
+
+        for key, value in items:
+            keys = split_bracket_key(key)
             current_dict = nested_dict
+
+            if len(keys) > 1 and keys[-1] == '':
+                # Array - `key[]`
+                for k in keys[:-2]:
+                    current_dict = current_dict.setdefault(k, {})
+
+                arr = current_dict.setdefault(keys[-2], [])
+
+                if isinstance(value, list):
+                    arr.extend(value)
+                else:
+                    arr.append(value)
+
+                continue
+
+            if multi:
+                value = value[0]
+
             for k in keys[:-1]:
-                k = k.rstrip(']')
                 current_dict = current_dict.setdefault(k, {})
-            current_dict[keys[-1].rstrip(']')] = value
+
+            current_dict[keys[-1]] = value
 
         return nested_dict
 
-    def process(self, data: Dict[str, Any], files: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def process(self, data: Union[Dict[str, Any], str, bytes], files: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Process incoming data and files.
 
+        The data can be the submitted form (`request.form`), a dictionary that
+        is already nested such as a parsed JSON body (`request.get_json()`), or
+        a raw JSON body as a string or bytes (`request.get_data()`).
+
         :param data: Data to process.
         :param files: Files to process, if any.
         :return: Output data after processing.
         """
+        if self._frozen and not self._context:
+            return self.context().process(data, files)
+
         self.debug('Editor Python libraries - version ' + self.version)
 
+        if isinstance(data, (str, bytes, bytearray)):
+            data = self.encoder().decode(data) if len(data) else {}
+
         # Convert the strings into a nested dictionary
         dict = self.__convert_data_to_dict(data)
         self.__trace(dict)
 
-        self.__process(dict, files)
+        # The action as the client names it (`remove` rather than `DELETE`),
+        # for the statement, budget, profiler and metrics labels
+        action = self.action(dict)
+        action = 'remove' if action == Action.DELETE else action.name.lower()
+
+        if self._metrics is not None:
+            start = time.perf_counter()
+            self._timing = {'last': start, 'phases': [], 'read': 0, 'written': 0}
+
+        failed = True
+
+        if self._statement_recorder is None:
+            token = None
+        else:
+            token = statement_context.set((self.table()[0], action))
+
+        budget = self._statement_budget
+        tally = budget._start() if budget is not None else None
+        report = None
+        profile = self._profiler._start() if self._profiler is not None else None
+
+        try:
+            self.__process(dict, files)
+            failed = False
+        finally:
+            if self.__session is not None:
+                # Reads don't use the session, so it is only open if the
+                # request wrote
+                self.__session.close()
+                self.__session = None
+
+            if failed and action in ('create', 'edit', 'remove') and self._change_log is not None:
+                # A write failed part way through, so which of the rows were
+                # committed isn't known - clients need to reload
+                self._change_log.invalidate()
+
+            self._changes = []
+
+            if profile is not None:
+                self._profiler._finish(
+                    profile, self.table()[0], action)
+
+            if token is not None:
+                statement_context.reset(token)
+
+            if tally is not None:
+                report = budget._finish(
+                    tally, self.table()[0], action)
+
+            if self._metrics is not None:
+                self._metrics.observe(
+                    self.table()[0], action,
+                    time.perf_counter() - start, self._out, self._timing, failed)
+
+        if report is not None:
+            budget._enforce(report)
 
         self.__trace(self._out)
 
         return self._out
+
+    def json(self, out: Optional[Dict[str, Any]] = None) -> bytes:
+        """
+        Encode the response from `process()` as JSON, ready to be sent to the
+        client. Dates, times and Decimals from the database are handled.
+
+        :param out: Data to encode. If not given the output from `process()` is used.
+        :return: UTF-8 encoded JSON.
+        """
+        return self.encoder().encode(self.__output(out))
+
+    def json_stream(self, out: Optional[Dict[str, Any]] = None, chunk: Optional[int] = 1000) -> Iterator[bytes]:
+        """
+        Encode the response from `process()` as JSON in pieces, suitable for a
+        streamed HTTP response. The `data` rows are encoded `chunk` at a time
+        rather than building one large string.
+
+        :param out: Data to encode. If not given the output from `process()` is used.
+        :param chunk: Number of rows to encode in each piece, or None for all
+            of the rows in one piece.
+        :return: Iterator of UTF-8 encoded JSON pieces.
+        """
+        return self.encoder().stream(self.__output(out), chunk)
+
+    def export(self, http: Optional[Dict[str, Any]] = None, format: Optional[str] = 'csv', chunk: Optional[int] = 1000) -> Iterator[bytes]:
+        """
+        Export all of the rows, using the configured fields, left joins and
+        get formatters, as CSV or newline delimited JSON. The rows are read
+        from the database and encoded in chunks as the returned iterator is
+        consumed, so the whole table is never held in memory. This makes it
+        suitable for a streamed HTTP response, e.g.
+        `Response(editor.export(request.args), mimetype='text/csv')`.
+
+        The `search`, `columns` and `order` parameters that DataTables sends,
+        if present in `http`, filter and order the rows. A CSV export has a
+        header row with the field names. An NDJSON export writes each row as
+        it would be in a read's `data` array. The `preGet` event can cancel
+        the export, in which case there are no rows. CSV cells that a
+        spreadsheet would treat as a formula (starting with `=`, `+`, `-`,
+        `@`, a tab or a carriage return) are prefixed with `'`.
+
+        :param http: Request parameters, e.g. `request.args`.
+        :param format: `csv` or `ndjson`.
+        :param chunk: Number of rows to read and encode at a time.
+        :return: Iterator of UTF-8 encoded pieces of the export.
+        """
+        if self._frozen and not self._context:
+            return self.context().export(http, format, chunk)
+
+        if format not in ('csv', 'ndjson'):
+            raise ValueError('Unknown export format: ' + str(format))
+
+        if self._custom_get is not None:
+            raise Exception('Export is not available with a custom `get` function')
+
+        http = self.__convert_data_to_dict(http if http is not None else {})
+        self._prep_join()
+
+        if self._trigger('preGet', None) is False:
+            return iter(())
+
+        return self.__export(http, format, chunk)
+
+    def arrow(self, http: Optional[Dict[str, Any]] = None, chunk: Optional[int] = 10000) -> Iterator[bytes]:
+        """
+        Read the rows as an Apache Arrow IPC stream, for analytics clients
+        (e.g. `pyarrow.ipc.open_stream`, `pandas.read_feather` or
+        `polars.read_ipc_stream`). Each field, after its get formatter, is a
+        typed column named by the field's name. There is no `DT_RowId`.
+
+        The rows are read and converted `chunk` at a time, each chunk being a
+        record batch, so like `export()` the whole table isn't held in memory.
+        The DataTables search and order parameters in `http` are applied, and
+        `preGet` can cancel the read. The column types are taken from the
+        first batch. Requires the `pyarrow` package.
+
+        :param http: Request parameters, e.g. `request.args`.
+        :param chunk: Number of rows in each record batch.
+        :return: Iterator of pieces of the Arrow IPC stream.
+        """
+        if self._frozen and not self._context:
+            return self.context().arrow(http, chunk)
+
+        try:
+            import pyarrow
+        except ImportError:
+            raise Exception('The `pyarrow` package is required for Arrow output')
+
+        if self._custom_get is not None:
+            raise Exception('Arrow output is not available with a custom `get` function')
+
+        http = self.__convert_data_to_dict(http if http is not None else {})
+        self._prep_join()
+
+        # A cancelled read still gives a valid, empty, stream
+        cancelled = self._trigger('preGet', None) is False
+
+        return self.__arrow(http, chunk, cancelled)
+
+    def __output(self, out: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Get the data to encode for `json()` and `json_stream()`.
+
+        :param out: Data given by the caller, if any.
+        :return: Data to encode.
+        """
+        if out is not None:
+            return out
+
+        if self._frozen and not self._context:
+            raise Exception(
+                'A frozen Editor has no output of its own - pass the result of '
+                '`process()` or use a `context()`')
+
+        return self._out
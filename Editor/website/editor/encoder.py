@@ -0,0 +1,192 @@
+import json
+import datetime
+import decimal
+
+from typing import Any, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _default(obj: Any) -> Any:
+    """
+    Convert the types that come from database drivers, but which JSON has no
+    representation for, into something that it does.
+
+    :param obj: Value that could not be serialised
+    :return: JSON compatible value
+    """
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8')
+
+    raise TypeError(
+        f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class Encoder:
+    """
+    JSON encoder for Editor responses, writing bytes ready to be sent to the
+    client. The fastest available backend is used - `orjson`, then `msgspec`,
+    falling back to the standard library. Dates, times and Decimals from the
+    database are handled natively (Decimals are written as strings, matching
+    Flask's `jsonify`).
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        """
+        Creates an instance of Encoder.
+
+        :param backend: `orjson`, `msgspec` or `json`. If not given the fastest
+            one installed is used.
+        :type backend: str, optional
+        """
+        if backend is None:
+            if orjson is not None:
+                backend = 'orjson'
+            elif msgspec is not None:
+                backend = 'msgspec'
+            else:
+                backend = 'json'
+
+        if backend == 'orjson':
+            if orjson is None:
+                raise Exception('The `orjson` package is not installed')
+
+            options = orjson.OPT_NON_STR_KEYS
+
+            def encode(obj):
+                return orjson.dumps(obj, default=_default, option=options)
+
+            self._encode = encode
+            self._decode = orjson.loads
+        elif backend == 'msgspec':
+            if msgspec is None:
+                raise Exception('The `msgspec` package is not installed')
+
+            self._encode = msgspec.json.Encoder(
+                enc_hook=_default, decimal_format='string').encode
+            self._decode = msgspec.json.decode
+        elif backend == 'json':
+            encoder = json.JSONEncoder(
+                default=_default, ensure_ascii=False, separators=(',', ':'))
+
+            def encode(obj):
+                return encoder.encode(obj).encode('utf-8')
+
+            self._encode = encode
+            self._decode = json.loads
+        else:
+            raise ValueError('Unknown JSON encoder backend: ' + str(backend))
+
+        self._backend = backend
+
+    def backend(self) -> str:
+        """
+        Get the name of the backend in use.
+
+        :return: Backend name
+        :rtype: str
+        """
+        return self._backend
+
+    def encode(self, obj: Any) -> bytes:
+        """
+        Encode a value as JSON.
+
+        :param obj: Value to encode
+        :return: UTF-8 encoded JSON
+        :rtype: bytes
+        """
+        return self._encode(obj)
+
+    def decode(self, data: Any) -> Any:
+        """
+        Decode a JSON string.
+
+        :param data: JSON as `str` or `bytes`
+        :return: Decoded value
+        """
+        return self._decode(data)
+
+    def stream(self, out: dict, chunk: Optional[int] = 1000) -> Iterator[bytes]:
+        """
+        Encode an Editor response as a sequence of byte chunks, so a large
+        `data` array doesn't need to be held in memory as a single string.
+        Rows are encoded `chunk` at a time.
+
+        :param out: Response to encode
+        :param chunk: Number of rows to encode in each piece, or None to
+            encode them all in one piece
+        :return: Iterator of JSON pieces which together form the response
+        :rtype: iterator
+        """
+        # Checked here, rather than when the first piece is asked for
+        if chunk is not None and chunk <= 0:
+            raise ValueError('The chunk size must be greater than zero')
+
+        return self.__stream(out, chunk)
+
+    def __stream(self, out: dict, chunk: Optional[int]) -> Iterator[bytes]:
+        """
+        Generator for `stream`.
+        """
+        rows = out.get('data')
+        sep = b''
+
+        yield b'{'
+
+        for key, value in out.items():
+            if key == 'data' and isinstance(rows, list):
+                continue
+
+            yield sep + self._encode(key) + b':' + self._encode(value)
+            sep = b','
+
+        if isinstance(rows, list):
+            yield sep + b'"data":['
+
+            if chunk is None:
+                chunk = max(len(rows), 1)
+
+            for i in range(0, len(rows), chunk):
+                # Encode the slice as an array and strip its brackets
+                part = self._encode(rows[i:i + chunk])[1:-1]
+                yield part if i == 0 else b',' + part
+
+            yield b']'
+
+        yield b'}'
+
+
+_default_encoder = None
+
+
+def default_encoder() -> Encoder:
+    """
+    Get the shared encoder, using the fastest backend available.
+
+    :return: Encoder instance
+    :rtype: Encoder
+    """
+    global _default_encoder
+
+    if _default_encoder is None:
+        _default_encoder = Encoder()
+
+    return _default_encoder
@@ -0,0 +1,237 @@
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class EventContext:
+    """
+    What a handler run by an `EventQueue` is given in place of the Editor.
+    The Editor, and its database session, belong to the request's thread and
+    can't be used from a worker thread, so the handler gets a copy of the
+    configuration it is likely to need, and the database engine. An engine
+    can be shared by threads - a handler which needs the database opens its
+    own connection (`context.db().connect()` or `.begin()`).
+    """
+
+    __slots__ = ('_db', '_table', '_pkey', '_id_prefix')
+
+    def __init__(self, db: Any, table: List[str], pkey: List[str], id_prefix: str):
+        """
+        Creates an instance of EventContext.
+
+        :param db: Database engine.
+        :param table: Editor's table names.
+        :param pkey: Editor's primary key column names.
+        :param id_prefix: Editor's row id prefix.
+        """
+        self._db = db
+        self._table = list(table)
+        self._pkey = list(pkey)
+        self._id_prefix = id_prefix
+
+    def db(self) -> Any:
+        """
+        Get the database engine of the Editor that triggered the event.
+
+        :return: Database engine.
+        :rtype: sqlalchemy.engine.Engine
+        """
+        return self._db
+
+    def table(self) -> List[str]:
+        """
+        Get the table names of the Editor that triggered the event.
+
+        :return: Table names.
+        :rtype: list
+        """
+        return self._table
+
+    def pkey(self) -> List[str]:
+        """
+        Get the primary key column names of the Editor that triggered the
+        event.
+
+        :return: Primary key column names.
+        :rtype: list
+        """
+        return self._pkey
+
+    def id_prefix(self) -> str:
+        """
+        Get the row id prefix of the Editor that triggered the event.
+
+        :return: Row id prefix.
+        :rtype: str
+        """
+        return self._id_prefix
+
+
+class EventQueue:
+    """
+    Bounded worker pool that runs Editor's post-write event handlers
+    (`postCreate`, `postEdit`, `postRemove` and their `All` versions) in the
+    background, so slow handlers such as audit logging or notifications don't
+    delay the response. Pre, validation and write events are always run in
+    the request, as they can cancel or change the operation.
+
+    A queue must outlive the request, so it would normally be created once at
+    module level and passed to `Editor.event_queue`. A thread pool is used, as
+    handlers are often closures, which can't be sent to another process.
+
+    Handlers are given an `EventContext`, not the Editor. The Editor and its
+    database session must not be used from a background handler, as the
+    request's thread carries on using them - a handler which has captured the
+    Editor in a closure must not use it either.
+
+    At most `limit` events can be waiting or running. When the queue is full
+    `submit` waits for space, for up to `timeout` seconds, and then runs the
+    handlers in the calling thread instead. This slows the requests down,
+    rather than letting the backlog grow without bound. Errors thrown by
+    handlers are logged and passed to `on_error`, if given.
+
+    Handlers run after `process()` may have returned, so they must not modify
+    the data they are given, and they don't have access to the web framework's
+    request context. The order in which handlers for different events run is
+    not guaranteed.
+    """
+
+    def __init__(self, workers: Optional[int] = 4, limit: Optional[int] = 1000, timeout: Optional[float] = None, on_error: Optional[Callable[[str, Exception], None]] = None):
+        """
+        Creates an instance of EventQueue.
+
+        :param workers: Number of worker threads.
+        :type workers: int, optional
+        :param limit: Maximum number of events waiting or running.
+        :type limit: int, optional
+        :param timeout: Seconds to wait for space when the queue is full,
+            before running the handlers in the calling thread. `None` waits
+            for as long as it takes.
+        :type timeout: float, optional
+        :param on_error: Function called with the event name and the exception
+            when a handler fails.
+        :type on_error: callable, optional
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='editor-events')
+        self._slots = threading.BoundedSemaphore(limit)
+        self._timeout = timeout
+        self._on_error = on_error
+        self._idle = threading.Condition()
+        self._pending = 0
+        self._errors = 0
+
+    def submit(self, name: str, handlers: Sequence[Callable], editor: Any, args: tuple) -> bool:
+        """
+        Queue the handlers for an event.
+
+        :param name: Event name.
+        :param handlers: Handlers to run, in order.
+        :param editor: Passed to each handler as its first argument - an
+            `EventContext` when called by Editor.
+        :param args: Event arguments passed to each handler.
+        :return: `True` if queued, `False` if the queue was full (or shut down)
+            and the handlers were run in the calling thread.
+        :rtype: bool
+        """
+        if not self._slots.acquire(timeout=self._timeout):
+            self.__run(name, handlers, editor, args)
+            return False
+
+        with self._idle:
+            self._pending += 1
+
+        try:
+            self._executor.submit(self.__job, name, handlers, editor, args)
+        except RuntimeError:
+            # Pool has been shut down
+            self.__done()
+            self.__run(name, handlers, editor, args)
+            return False
+
+        return True
+
+    def pending(self) -> int:
+        """
+        Get the number of events waiting or running.
+
+        :return: Number of events.
+        :rtype: int
+        """
+        return self._pending
+
+    def errors(self) -> int:
+        """
+        Get the number of handler errors there have been.
+
+        :return: Number of errors.
+        :rtype: int
+        """
+        return self._errors
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for all queued events to finish.
+
+        :param timeout: Maximum number of seconds to wait.
+        :type timeout: float, optional
+        :return: `True` if the queue is empty, `False` if the timeout expired.
+        :rtype: bool
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def shutdown(self, wait: Optional[bool] = True) -> None:
+        """
+        Stop the worker threads. Events submitted afterwards are run in the
+        calling thread.
+
+        :param wait: Wait for queued events to finish first.
+        :type wait: bool, optional
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __job(self, name: str, handlers: Sequence[Callable], editor: Any, args: tuple) -> None:
+        """
+        Run an event's handlers on a worker thread.
+        """
+        try:
+            self.__run(name, handlers, editor, args)
+        finally:
+            self.__done()
+
+    def __done(self) -> None:
+        """
+        Release the space held by an event.
+        """
+        self._slots.release()
+
+        with self._idle:
+            self._pending -= 1
+
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def __run(self, name: str, handlers: Sequence[Callable], editor: Any, args: tuple) -> None:
+        """
+        Run an event's handlers, reporting rather than raising any errors so
+        that one failing handler doesn't stop the others.
+        """
+        for handler in handlers:
+            try:
+                handler(editor, *args)
+            except Exception as e:
+                with self._idle:
+                    self._errors += 1
+
+                logger.exception('Error in Editor `%s` event handler', name)
+
+                if self._on_error is not None:
+                    try:
+                        self._on_error(name, e)
+                    except Exception:
+                        logger.exception('Error in EventQueue error handler')
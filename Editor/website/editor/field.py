@@ -1,6 +1,7 @@
+import itertools
+
 from enum import Enum
-import bleach
-from typing import Union, Callable, Dict, Optional, List
+from typing import Any, Union, Callable, Dict, Optional, List
 
 from .validation_host import ValidationHost
 from .action import Action
@@ -8,6 +9,12 @@ from .set_type import SetType
 from .nested_data import NestedData
 
 from .options import Options
+from .upload import Upload
+from .xss import clean as xss_clean
+
+
+# Source of `Field._generation` values
+_generations = itertools.count(1)
 
 
 class Field(NestedData):
@@ -24,6 +31,15 @@ class Field(NestedData):
     with by the editable table.
     """
 
+    __slots__ = ('_db_field', '_name', '_read_name', '_write_name',
+                 '_name_exists', '_read_db_field', '_db_parts', '_validator', '_set_formatter',
+                 '_get_formatter', '_set_value', '_get_value', '_http', '_opts',
+                 '_get', '_set', '_xss', '_upload', '_frozen')
+
+    # Changed whenever a field's set type, column or name is changed, so an
+    # Editor knows that the write routes it has cached are out of date
+    _generation = 0
+
     def __init__(self, db_field: str, name: Optional[str] = None):
         """
         Creates an instance of Field.
@@ -39,6 +55,7 @@ class Field(NestedData):
 
         self._db_field = db_field
         self._name = db_field if name == None else name
+        self.__compile()
 
         # Internal variables
         self._validator = []
@@ -50,6 +67,9 @@ class Field(NestedData):
         self._opts = None
         self._get = True
         self._set = SetType.BOTH
+        self._xss = xss_clean
+        self._upload = None
+        self._frozen = False
 
     ###################
     # Public functions
@@ -66,7 +86,11 @@ class Field(NestedData):
         if db_field is None:
             return self._db_field
 
+        self.__check_frozen()
+
         self._db_field = db_field
+        self.__compile()
+        self.__routes_changed()
 
         return self
 
@@ -83,6 +107,8 @@ class Field(NestedData):
         if flag is None:
             return self._get
 
+        self.__check_frozen()
+
         self._get = flag
 
         return self
@@ -105,6 +131,8 @@ class Field(NestedData):
         if formatter is None:
             return self._get_formatter
 
+        self.__check_frozen()
+
         self._get_formatter = formatter
 
         return self
@@ -118,6 +146,8 @@ class Field(NestedData):
         Editor will use `bleach` by default for this operation, which is built
         into the software and no additional configuration is required, but a
         custom function can be used if you wish to use a different formatter.
+        The default skips values which have no markup or control characters,
+        and caches the result for others (see `xss.sanitizer`).
 
         If you wish to disable this option (which you would only do if you are
         absolutely confident that your validation will pick up on any XSS inputs)
@@ -138,9 +168,11 @@ class Field(NestedData):
         if flag == None:
             return self._xss
 
+        self.__check_frozen()
+
         if flag == True:
             # Use default
-            self._xss = bleach.clean
+            self._xss = xss_clean
         elif flag == False:
             # No XSS validation
             self._xss = None
@@ -160,20 +192,17 @@ class Field(NestedData):
         :rtype: callable or str
         """
 
-        if self._xss is None:
+        xss = self._xss
+
+        if xss is None:
             return val
 
         # An array of strings
         if isinstance(val, list):
-            out = []
-
-            for i in range(len(val)):
-                out.append(self._xss(val[i]))
-
-            return out
+            return [xss(v) for v in val]
 
         # Single string
-        return self._xss(val)
+        return xss(val)
 
     def validator(self, val: Optional[Callable[[str, Dict, ValidationHost], bool]] = None, set_formatted: bool = False) -> Union['Field', list]:
         """
@@ -201,6 +230,8 @@ class Field(NestedData):
         if val is None:
             return self._validator
 
+        self.__check_frozen()
+
         self._validator.append(
             {'set_formatted': set_formatted, 'validator': val})
         return self
@@ -223,6 +254,8 @@ class Field(NestedData):
         if flag is None:
             return self._set
 
+        self.__check_frozen()
+
         if flag == True:
             self._set = SetType.BOTH
         elif flag == False:
@@ -230,6 +263,8 @@ class Field(NestedData):
         else:
             self._set = flag
 
+        self.__routes_changed()
+
         return self
 
     def set_formatter(self, formatter: Optional[Callable[[str, Dict], str]] = None) -> Union['Field', Callable[[str, Dict], str]]:
@@ -253,6 +288,8 @@ class Field(NestedData):
         if formatter is None:
             return self._set_formatter
 
+        self.__check_frozen()
+
         self._set_formatter = formatter
 
         return self
@@ -273,6 +310,8 @@ class Field(NestedData):
         if val is None:
             return self._set_value
 
+        self.__check_frozen()
+
         self._set_value = val
 
         return self
@@ -293,6 +332,8 @@ class Field(NestedData):
         if val is None:
             return self._get_value
 
+        self.__check_frozen()
+
         self._get_value = val
 
         return self
@@ -311,6 +352,8 @@ class Field(NestedData):
         if set is None:
             return self._http
 
+        self.__check_frozen()
+
         self._http = set
 
         return self
@@ -332,7 +375,11 @@ class Field(NestedData):
         if name is None:
             return self._name
 
+        self.__check_frozen()
+
         self._name = name
+        self.__compile()
+        self.__routes_changed()
         return self
 
     def options(self, opts: Optional[Options] = None) -> Union[Options, 'Field']:
@@ -354,35 +401,76 @@ class Field(NestedData):
         if opts is None:
             return self._opts
 
+        self.__check_frozen()
+
         self._opts = opts
         return self
 
-    def __read_prop(self, name: str, data: Dict) -> str:
+    def upload(self, upload: Optional[Upload] = None) -> Union[Upload, 'Field']:
         """
-        Get a nested property value.
+        Get/Set the upload configuration for the field. The field's value is
+        the id of the uploaded file, and the information for the referenced
+        files is sent to the client in the `files` property.
 
-        :param name: Property name
-        :type name: str
-        :param data: Data set to check
-        :type data: dict
-        :return: Property value or None
-        :rtype: str
+        :param upload: Upload configuration
+        :type upload: Upload, optional
+        :return: Upload or self for chaining
+        :rtype: Upload or Field
         """
-        if '.' not in name:
-            return data[name] if name in data else None
+        if upload is None:
+            return self._upload
 
-        names = name.split('.')
-        inner = data
+        self.__check_frozen()
 
-        for i in range(len(names) - 1):
-            if names[i] not in inner:
-                return False
+        self._upload = upload
+        return self
+
+    def __check_frozen(self) -> None:
+        """
+        Raise an error if the configuration can't be changed.
+        """
+        if self._frozen:
+            raise Exception(
+                'The Field configuration is frozen, as its Editor is. Make any '
+                'changes before calling `Editor.freeze()`.')
+
+    @staticmethod
+    def __routes_changed() -> None:
+        """
+        Tell Editors to rebuild their cached write routes.
+        """
+        Field._generation = next(_generations)
+
+    def __compile(self) -> None:
+        """
+        Resolve the field's name into accessor functions for reading, writing
+        and checking the existence of its value in nested data, and its
+        database column into a reader for the database rows and its `db`,
+        `table` and `column` parts. This is done once, rather than splitting
+        the names for every row.
 
-            inner = inner[names[i]]
+        :rtype: None
+        """
+        db_field = self._db_field
 
-        idx = names[len(names) - 1]
+        self._read_name = self._compile_read(self._name)
+        self._write_name = self._compile_write(self._name)
+        self._name_exists = self._compile_exists(self._name)
 
-        return inner[idx] if idx in inner else None
+        # Database rows are keyed by the full column name, so it is not nested
+        def read_db_field(data: Dict) -> Any:
+            return data[db_field] if db_field in data else None
+
+        self._read_db_field = read_db_field
+
+        parts = db_field.split('.')
+
+        if len(parts) == 3:
+            self._db_parts = tuple(parts)
+        elif len(parts) == 2:
+            self._db_parts = (None, parts[0], parts[1])
+        else:
+            self._db_parts = (None, None, db_field)
 
     def __format(self, val: str, data: Dict, formatter: Callable[[str, Dict], str]) -> str:
         """
@@ -414,15 +502,14 @@ class Field(NestedData):
             if self._get_value != None:
                 val = self._get_value() if callable(self._get_value) else self._get_value
             else:
-                db_field = self.db_field()
-                val = data[db_field] if db_field in data else None
+                val = self._read_db_field(data)
 
             return self.__format(val, data, self._get_formatter)
 
         if self._set_value != None:
             val = self._set_value() if callable(self._set_value) else self._set_value
         else:
-            val = self.__read_prop(self.name(), data)
+            val = self._read_name(data)
 
         return self.__format(val, data, self._set_formatter)
 
@@ -430,6 +517,18 @@ class Field(NestedData):
     # Protected methods, used by Editor class and not generally for public use
     ################################
 
+    def _freeze(self) -> None:
+        """
+        Protected function to stop the field, and its options, from being
+        changed, as it is shared by the requests of a frozen Editor.
+
+        :rtype: None
+        """
+        self._frozen = True
+
+        if self._opts is not None:
+            self._opts._freeze()
+
     def _write(self, out: Dict, src_data: Dict) -> None:
         """
         Protected function to write data into an object.
@@ -440,9 +539,49 @@ class Field(NestedData):
         :type src_data: dict
         :rtype: None
         """
-        self._write_prop(out, self.name(), self.val('get', src_data))
+        self._write_name(out, self.val('get', src_data))
+
+    def _get_column(self, columns: Dict[str, List], count: int, rows: Callable[[], List[Dict]]) -> List:
+        """
+        Protected function to get the formatted values of this field for a
+        whole result set, held as columns. A get formatter with a `batch`
+        attribute is given the whole column at once, otherwise it is called
+        for each value.
+
+        :param columns: Values by database column name
+        :type columns: dict
+        :param count: Number of rows
+        :type count: int
+        :param rows: Function returning the rows of the result set, for
+            formatters which need the rest of the row's data
+        :type rows: callable
+        :return: Formatted values
+        :rtype: list
+        """
+        if self._get_value != None:
+            if callable(self._get_value):
+                values = [self._get_value() for i in range(count)]
+            else:
+                values = [self._get_value] * count
+        else:
+            values = columns.get(self._db_field)
+
+            if values is None:
+                values = [None] * count
+
+        formatter = self._get_formatter
+
+        if formatter is None:
+            return values
+
+        batch = getattr(formatter, 'batch', None)
+
+        if batch is not None:
+            return batch(values, rows())
+
+        return [formatter(val, row) for val, row in zip(values, rows())]
 
-    def _validate(self, data: Dict, editor, id: str, action: str) -> Union[bool, str]:
+    def _validate(self, data: Dict, editor, id: str, action: str, host: Optional[ValidationHost] = None) -> Union[bool, str]:
         """
         Protected function to execute the configured validators.
 
@@ -452,6 +591,9 @@ class Field(NestedData):
         :param id: Row ID
         :param action: Action being performed
         :type action: str
+        :param host: Host to reuse, rather than creating one for this call. Its
+            `id` is updated to the row being validated.
+        :type host: ValidationHost, optional
         :return: `True` if successful, or string containing the error
         :rtype: bool or str
         """
@@ -460,8 +602,12 @@ class Field(NestedData):
         if len(self._validator) == 0:
             return True
 
-        val = self.__read_prop(self.name(), data)
-        host = ValidationHost(action, id, self, editor)
+        val = self._read_name(data)
+
+        if host is None:
+            host = ValidationHost(action, id, self, editor)
+        else:
+            host.id = id
 
         # Iterate through all the validators
         for v in self._validator:
@@ -475,6 +621,66 @@ class Field(NestedData):
         # No validation errors, so must be valid
         return True
 
+    def _validate_batch(self, rows: List[Dict], editor, ids: List, action: str, host: ValidationHost) -> Dict[int, str]:
+        """
+        Protected function to execute the configured validators for many rows
+        at once. A validator with a `batch` attribute is given all of the
+        values still valid at that point in a single call, others are called
+        for each value. As with `_validate`, only the first error for each row
+        is reported.
+
+        :param rows: Data sets
+        :type rows: list
+        :param editor: Editor instance
+        :param ids: Row IDs, used for the `host`
+        :type ids: list
+        :param action: Action being performed
+        :param host: Host to give to the validators
+        :type host: ValidationHost
+        :return: Error message by row index, for the rows that failed
+        :rtype: dict
+        """
+        errors = {}
+
+        if len(self._validator) == 0:
+            return errors
+
+        read = self._read_name
+        pending = list(range(len(rows)))
+
+        for v in self._validator:
+            validator = v['validator']
+            pending_rows = [rows[i] for i in pending]
+
+            if v['set_formatted']:
+                values = [self.val('set', row) for row in pending_rows]
+            else:
+                values = [read(row) for row in pending_rows]
+
+            batch = getattr(validator, 'batch', None)
+
+            if batch is not None:
+                host.id = None
+                results = batch(values, pending_rows, host)
+            else:
+                results = []
+
+                for i, val, row in zip(pending, values, pending_rows):
+                    host.id = ids[i]
+                    results.append(validator(val, row, host))
+
+            still = []
+
+            for i, res in zip(pending, results):
+                if res != True:
+                    errors[i] = res
+                else:
+                    still.append(i)
+
+            pending = still
+
+        return errors
+
     def _apply(self, action: str, data: dict = None) -> bool:
         """
         Protected function to determine if a field is required.
@@ -500,11 +706,23 @@ class Field(NestedData):
                 return False
 
         # Check it was in the submitted data
-        if self.set_value() == None and not self._prop_exists(self.name(), data):
-            return False
+        return self._submitted(data)
+
+    def _submitted(self, data: dict) -> bool:
+        """
+        Protected function to determine if a value for the field is available
+        to be written - either a set value, or in the submitted data.
+
+        :param data: Data set
+        :type data: dict
+        :return: True if there is a value to write, otherwise False
+        :rtype: bool
+        """
+        if self._set_value != None:
+            return True
 
         # In the data set, so use it
-        return True
+        return self._name_exists(data)
 
     def _options_exec(self, db) -> any:
         """
@@ -1,5 +1,102 @@
-from datetime import datetime
-from typing import Callable, Dict, Optional, Union
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+# Formats which can be parsed by `fromisoformat`, with the length of a value
+# and the separator between the date and time parts
+_ISO_FORMATS = {
+    '%Y-%m-%d': (10, None),
+    '%Y-%m-%d %H:%M:%S': (19, ' '),
+    '%Y-%m-%dT%H:%M:%S': (19, 'T'),
+}
+
+_TIME_DATE = date(1900, 1, 1)
+
+
+def _parser(format: str) -> Callable[[str], datetime]:
+    """
+    Get a function which parses a string in the given format. ISO8601 formats
+    use `fromisoformat`, which is much faster than `strptime`, falling back to
+    `strptime` for anything `fromisoformat` wouldn't parse the same way.
+
+    :param str format: datetime format of the strings
+    :return: Parsing function
+    :rtype: function
+    """
+    if format == '%H:%M:%S':
+        def parse_time(val: str) -> datetime:
+            if len(val) == 8 and val[2] == ':' and val[5] == ':':
+                try:
+                    # strptime uses 1900-01-01 for the date part
+                    return datetime.combine(_TIME_DATE, time.fromisoformat(val))
+                except ValueError:
+                    pass
+
+            return datetime.strptime(val, format)
+
+        return parse_time
+
+    if format not in _ISO_FORMATS:
+        return lambda val: datetime.strptime(val, format)
+
+    length, separator = _ISO_FORMATS[format]
+
+    def parse(val: str) -> datetime:
+        if len(val) == length and val[4] == '-' and val[7] == '-' and (separator is None or val[10] == separator):
+            try:
+                return datetime.fromisoformat(val)
+            except ValueError:
+                pass
+
+        return datetime.strptime(val, format)
+
+    return parse
+
+
+def _memoize(convert: Callable[[Any], Any], cache: Optional[int]) -> Callable[[Any], Any]:
+    """
+    Wrap a conversion function with a bounded cache of its results. Columns
+    often have many rows sharing the same value (dates in particular), so
+    this saves parsing and formatting each one again.
+
+    :param convert: Function that converts a single value
+    :param int cache: Maximum number of values to hold in the cache. `0` disables it.
+    :return: Caching version of the function
+    :rtype: function
+    """
+    if not cache:
+        return convert
+
+    cached = lru_cache(maxsize=cache)(convert)
+
+    def memo(val):
+        try:
+            return cached(val)
+        except TypeError:
+            # Unhashable value - can't be cached
+            return convert(val)
+
+    memo.cache_info = cached.cache_info
+
+    return memo
+
+
+def _batch(memo: Callable[[Any], Any], skip: tuple = (None,)) -> Callable[[List, List], List]:
+    """
+    Create the column-batch variant of a formatter, which formats a whole
+    column of values in one call.
+
+    :param memo: Function that converts a single value
+    :param tuple skip: Values which are not converted, and instead give `None`
+    :return: Function that takes a list of values and a list of the rows
+        they came from, and returns a list of the formatted values
+    :rtype: function
+    """
+    def batch(values: List, data: List) -> List:
+        return [None if val in skip else memo(val) for val in values]
+
+    return batch
 
 
 class Formatter:
@@ -10,80 +107,126 @@ class Formatter:
     The methods in this class return a function for use with the formatter
     methods. Each method may define its own parameters that configure how
     the formatter operates. For example the date / time formatters take
-    information on the formatting to be used.    
+    information on the formatting to be used.
+
+    The date / time formatters cache the values they have converted and also
+    have a `batch` attribute - a function that takes a list of values (and a
+    list of the rows they came from) to format a whole column in one call.
     """
     @staticmethod
-    def sql_date_to_format(format: str) -> Callable[[str, Dict], str]:
+    def sql_date_to_format(format: str, cache: Optional[int] = 1024) -> Callable[[str, Dict], str]:
         """
         Convert from SQL date / date time format (ISO8601) to a format given
         by the options parameter. Typically used with a get formatter.
 
         Uses datetime - formats are defined by datetime.
         :param str format: datetime format to apply to date
+        :param int cache: Number of formatted values to cache
         :return: Configured formatter function  
         :rtype: function      
         """
+        parse = _parser('%Y-%m-%d')
+
+        def convert(val: Union[str, datetime]):
+            if isinstance(val, str):
+                try:
+                    # Date or date time string
+                    date_obj = datetime.fromisoformat(val)
+                except ValueError:
+                    date_obj = parse(val)
+            else:
+                # Date / datetime object from the driver
+                date_obj = val
+
+            # Format the date object to the desired format
+            return date_obj.strftime(format)
+
+        memo = _memoize(convert, cache)
 
         def func(val: Union[str, datetime], data: Dict):
             if val is None:
                 return None
 
-            # Parse the date string assuming it's in 'YYYY-MM-DD' format
-            date_obj = datetime.strptime(
-                val, '%Y-%m-%d') if isinstance(val, str) else val
+            return memo(val)
 
-            # Format the date object to the desired format
-            return date_obj.strftime(format)
+        func.batch = _batch(memo)
 
         return func
 
     @staticmethod
-    def format_to_sql_date(format: str) -> Callable[[str, Dict], str]:
+    def format_to_sql_date(format: str, cache: Optional[int] = 1024) -> Callable[[str, Dict], str]:
         """
         Convert to SQL date / date time format (ISO8601) from a format given
         by the options parameter. Typically used with a set formatter.
 
         Uses datetime - formats are defined by datetime.
         :param str format: datetime format to apply to date
+        :param int cache: Number of formatted values to cache
         :return: Configured formatter function      
         :rtype: function      
         """
+        parse = _parser(format)
+
+        def convert(val: str):
+            if isinstance(val, (date, datetime)):
+                date_obj = val
+            else:
+                # Parse the date string using the provided format
+                date_obj = parse(val)
+
+            # Format the date object to the desired SQL date format (YYYY-MM-DD)
+            return date_obj.strftime('%Y-%m-%d')
+
+        memo = _memoize(convert, cache)
 
         def func(val: str, data: Dict):
             if val is None or val == '':
                 return None
 
-            # Parse the date string using the provided format
-            date_obj = datetime.strptime(val, format)
-            # Format the date object to the desired SQL date format (YYYY-MM-DD)
-            return date_obj.strftime('%Y-%m-%d')
+            return memo(val)
+
+        func.batch = _batch(memo, (None, ''))
 
         return func
 
     @staticmethod
-    def date_time(from_format: str, to_format: str) -> Callable[[str, Dict], str]:
+    def date_time(from_format: str, to_format: str, cache: Optional[int] = 1024) -> Callable[[str, Dict], str]:
         """
         Convert one datetime format to another
 
         Uses datetime - formats are defined by datetime.
         :param str from: From format
         :param str to: To format
+        :param int cache: Number of formatted values to cache
         :return: Configured formatter function    
         :rtype: function      
         """
-        def func(val: str, data: Dict):
-            if val is None:
-                return None
+        parse = _parser(from_format)
+
+        def convert(val: str):
+            if isinstance(val, (date, datetime, time)):
+                # Already parsed by the driver
+                return val.strftime(to_format)
 
             # Parse the date string using the provided 'from' format
             try:
-                date_obj = datetime.strptime(val, from_format)
+                date_obj = parse(val)
             except ValueError:
                 return None  # Handle the case where parsing fails
 
             # Format the date object to the desired 'to' format
             return date_obj.strftime(to_format)
 
+        memo = _memoize(convert, cache)
+
+        def func(val: str, data: Dict):
+            if val is None:
+                return None
+
+            return memo(val)
+
+        func.batch = _batch(memo)
+
         return func
 
     @staticmethod
@@ -0,0 +1,292 @@
+import bisect
+import threading
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .nested_data import NestedData
+from .xss import clean as xss_clean
+
+# Default histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: Any) -> str:
+    """
+    Escape a label value for the Prometheus text format.
+
+    :param value: Label value
+    :return: Escaped value
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    """
+    Format a set of labels for the Prometheus text format.
+
+    :param names: Label names
+    :param values: Label values
+    :return: Labels, including the braces, or an empty string if there are none
+    """
+    if len(names) == 0:
+        return ''
+
+    return '{' + ','.join(
+        name + '="' + _escape(value) + '"' for name, value in zip(names, values)) + '}'
+
+
+def _number(value: float) -> str:
+    """
+    Format a sample value for the Prometheus text format.
+
+    :param value: Value
+    :return: Formatted value
+    """
+    if value == float('inf'):
+        return '+Inf'
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    Metrics for Editor endpoints, rendered in the Prometheus text exposition
+    format. An instance is given to `Editor.metrics` for each Editor to be
+    measured, and records, split by table and action:
+
+    * `editor_requests_total` - requests processed.
+    * `editor_errors_total` - requests which gave an error, or raised one.
+    * `editor_cancelled_total` - rows cancelled by a `pre*` event.
+    * `editor_validation_failures_total` - field validation errors.
+    * `editor_rows_read_total` and `editor_rows_written_total`.
+    * `editor_request_duration_seconds` - histogram of `process()` times.
+    * `editor_phase_duration_seconds` - histogram of the time in each phase
+      of the request (`read`, `pre`, `validate`, `write`, `post`, `upload`
+      and `import`).
+
+    The hit and miss counts of Editor's caches (the XSS sanitiser and the
+    nested property accessors, plus any added with `cache`) are read when the
+    metrics are rendered, as are the statistics of a `StatementRecorder` if
+    one is given.
+
+    A single instance would normally be created at module level and shared by
+    all of the Editors, then served with `blueprint`.
+    """
+
+    def __init__(self, buckets: Optional[Sequence[float]] = BUCKETS, recorder: Optional[Any] = None):
+        """
+        Creates an instance of Metrics.
+
+        :param buckets: Upper bounds of the histogram buckets, in seconds
+        :type buckets: list, optional
+        :param recorder: Statement recorder to include the statistics of
+        :type recorder: StatementRecorder, optional
+        """
+        self._buckets = tuple(sorted(buckets))
+        self._recorder = recorder
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._caches = {
+            'xss': xss_clean.cache_info,
+            'nested_exists': NestedData._compile_exists.cache_info,
+            'nested_read': NestedData._compile_read.cache_info,
+            'nested_write': NestedData._compile_write.cache_info,
+        }
+
+    def cache(self, name: str, info: Callable[[], Any]) -> 'Metrics':
+        """
+        Add a cache to report the hit rate of.
+
+        :param name: Name for the `cache` label
+        :param info: Function returning an object with `hits` and `misses`
+            attributes, such as the `cache_info` of an `lru_cache`
+        :return: Self for chaining
+        :rtype: Metrics
+        """
+        self._caches[name] = info
+        return self
+
+    def observe(self, table: str, action: str, duration: float, out: Dict[str, Any], timing: Optional[Dict[str, Any]] = None, failed: Optional[bool] = False) -> None:
+        """
+        Record a request. Called by `Editor.process()`.
+
+        :param table: Editor table
+        :param action: Action name
+        :param duration: Time taken, in seconds
+        :param out: Response from `process()`
+        :param timing: Phase times and row counts recorded by Editor
+        :param failed: The request raised an error
+        """
+        labels = (table, action)
+        failed = failed or bool(out.get('error'))
+
+        with self._lock:
+            self.__inc('editor_requests_total', labels, 1)
+            self.__observe('editor_request_duration_seconds', labels, duration)
+
+            if failed:
+                self.__inc('editor_errors_total', labels, 1)
+
+            if len(out.get('cancelled') or []):
+                self.__inc('editor_cancelled_total', labels, len(out['cancelled']))
+
+            if len(out.get('fieldErrors') or []):
+                self.__inc('editor_validation_failures_total', labels, len(out['fieldErrors']))
+
+            if timing is not None:
+                if timing['read']:
+                    self.__inc('editor_rows_read_total', labels, timing['read'])
+
+                if timing['written']:
+                    self.__inc('editor_rows_written_total', labels, timing['written'])
+
+                for phase, seconds in timing['phases']:
+                    self.__observe('editor_phase_duration_seconds', labels + (phase,), seconds)
+
+    def render(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        :return: Metrics text
+        :rtype: str
+        """
+        out = []
+
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {labels: list(values) for labels, values in series.items()}
+                          for name, series in self._histograms.items()}
+
+        for name, help in _COUNTERS:
+            series = counters.get(name, {})
+            out.append('# HELP ' + name + ' ' + help)
+            out.append('# TYPE ' + name + ' counter')
+
+            for labels, value in sorted(series.items()):
+                out.append(name + _labels(('table', 'action'), labels) + ' ' + _number(value))
+
+        for name, help, names in _HISTOGRAMS:
+            out.append('# HELP ' + name + ' ' + help)
+            out.append('# TYPE ' + name + ' histogram')
+
+            for labels, values in sorted(histograms.get(name, {}).items()):
+                count = 0
+
+                for bound, hits in zip(self._buckets + (float('inf'),), values):
+                    count += hits
+                    out.append(name + '_bucket' + _labels(names + ('le',), labels + (_number(bound),)) +
+                               ' ' + str(count))
+
+                out.append(name + '_sum' + _labels(names, labels) + ' ' + _number(values[-1]))
+                out.append(name + '_count' + _labels(names, labels) + ' ' + str(count))
+
+        out += self.__render_caches()
+
+        if self._recorder is not None:
+            out += self.__render_statements()
+
+        return '\n'.join(out) + '\n'
+
+    def blueprint(self, name: Optional[str] = 'editor_metrics', url: Optional[str] = '/metrics') -> Any:
+        """
+        Create a Flask blueprint which serves the metrics.
+
+        :param name: Blueprint name
+        :param url: URL of the metrics, relative to the blueprint's prefix
+        :return: Flask blueprint
+        """
+        from flask import Blueprint, Response
+
+        blueprint = Blueprint(name, __name__)
+
+        @blueprint.route(url, methods=['GET'])
+        def metrics():
+            return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+        return blueprint
+
+    def __inc(self, name: str, labels: Tuple, value: int) -> None:
+        """
+        Add to a counter. The lock must be held.
+        """
+        series = self._counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + value
+
+    def __observe(self, name: str, labels: Tuple, value: float) -> None:
+        """
+        Add an observation to a histogram. The lock must be held. Each series
+        is a count per bucket (not cumulative), then the sum.
+        """
+        series = self._histograms.setdefault(name, {})
+        values = series.get(labels)
+
+        if values is None:
+            values = series[labels] = [0] * (len(self._buckets) + 1) + [0.0]
+
+        values[bisect.bisect_left(self._buckets, value)] += 1
+        values[-1] += value
+
+    def __render_caches(self) -> List[str]:
+        """
+        Render the cache hit and miss counts, and the hit ratios.
+        """
+        infos = [(name, info()) for name, info in sorted(self._caches.items())]
+        out = []
+
+        for metric, type, help in (
+            ('editor_cache_hits_total', 'counter', 'Cache lookups that were found in the cache.'),
+            ('editor_cache_misses_total', 'counter', 'Cache lookups that were not in the cache.'),
+            ('editor_cache_hit_ratio', 'gauge', 'Fraction of cache lookups that were found in the cache.')
+        ):
+            out.append('# HELP ' + metric + ' ' + help)
+            out.append('# TYPE ' + metric + ' ' + type)
+
+            for name, info in infos:
+                total = info.hits + info.misses
+
+                if type == 'gauge':
+                    value = info.hits / total if total else 0.0
+                else:
+                    value = info.hits if metric == 'editor_cache_hits_total' else info.misses
+
+                out.append(metric + _labels(('cache',), (name,)) + ' ' + _number(value))
+
+        return out
+
+    def __render_statements(self) -> List[str]:
+        """
+        Render the statistics of the statement recorder.
+        """
+        stats = self._recorder.snapshot()
+        out = []
+
+        for metric, key, type, help in (
+            ('editor_sql_statements_total', 'count', 'counter', 'SQL statements run, by fingerprint.'),
+            ('editor_sql_seconds_total', 'total', 'counter', 'Time spent running SQL statements, by fingerprint.'),
+            ('editor_sql_seconds_max', 'max', 'gauge', 'Longest time taken by an SQL statement, by fingerprint.'),
+            ('editor_sql_slow_total', 'slow', 'counter', 'SQL statements over the slow threshold, by fingerprint.')
+        ):
+            out.append('# HELP ' + metric + ' ' + help)
+            out.append('# TYPE ' + metric + ' ' + type)
+
+            for stat in stats:
+                out.append(metric + _labels(('statement',), (stat['statement'],)) +
+                           ' ' + _number(stat[key]))
+
+        return out
+
+
+_COUNTERS = (
+    ('editor_requests_total', 'Requests processed by Editor.'),
+    ('editor_errors_total', 'Requests which resulted in an error.'),
+    ('editor_cancelled_total', 'Rows cancelled by a pre-event handler.'),
+    ('editor_validation_failures_total', 'Field validation errors.'),
+    ('editor_rows_read_total', 'Rows read and returned to the client.'),
+    ('editor_rows_written_total', 'Rows created, edited, removed, uploaded or imported.'),
+)
+
+_HISTOGRAMS = (
+    ('editor_request_duration_seconds', 'Time taken to process a request.', ('table', 'action')),
+    ('editor_phase_duration_seconds', 'Time taken by each phase of a request.', ('table', 'action', 'phase')),
+)
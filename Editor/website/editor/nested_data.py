@@ -1,103 +1,174 @@
-from typing import Callable, Dict, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict
 
 class NestedData:
     """
     Class that provides methods to read and write from nested JSON objects,
     using dot notation strings for the nesting. This class should be extended
-    by any wishing to use these abilities.    
+    by any wishing to use these abilities.
+
+    The dotted names are resolved once into accessor functions, which are
+    cached, so reading and writing the same property for many rows doesn't
+    split the name each time.
     """
 
+    # No instance state, so subclasses can use `__slots__`
+    __slots__ = ()
+
     @staticmethod
-    def _prop_exists(name: str, data: Dict) -> bool:
+    @lru_cache(maxsize=1024)
+    def _compile_exists(name: str) -> Callable[[Dict], bool]:
         """
-        Check if a nested property exists in a data set.
+        Create a function that checks if a nested property exists in a data set.
 
         :param str name: Property name, with nested properties separated by dots.
-        :param dict data: Data set to check.
-        :return: `True` if the property exists, `False` otherwise.
-        :rtype: bool
+        :return: Function that takes the data set and returns `True` if the
+            property exists, `False` otherwise.
+        :rtype: function
         """
 
-        if data == None:
-            return False
-
         if '.' not in name:
-            return True if name in data else False
+            def exists(data: Dict) -> bool:
+                if data == None:
+                    return False
 
-        names = name.split('.')
-        inner = data
+                return name in data
 
-        for i in range(len(names) - 1):
-            if names[i] not in inner:
+            return exists
+
+        names = tuple(name.split('.'))
+        parents = names[:-1]
+        idx = names[-1]
+
+        def exists(data: Dict) -> bool:
+            if data == None:
                 return False
 
-            inner = inner[names[i]]
+            inner = data
+
+            for n in parents:
+                if n not in inner:
+                    return False
+
+                inner = inner[n]
 
-        return True if names[len(names) - 1] in inner else False
+            return idx in inner
+
+        return exists
 
     @staticmethod
-    def _read_prop(name: str, data: Dict) -> str:
+    @lru_cache(maxsize=1024)
+    def _compile_read(name: str) -> Callable[[Dict], Any]:
         """
-        Get a nested property value from a data set.
+        Create a function that gets a nested property value from a data set.
 
         :param str name: Property name, with nested properties separated by dots.
-        :param dict data: Data set to check.
-        :return: Value of the nested property, or `None` if the property does not exist.
-        :rtype: str
+        :return: Function that takes the data set and returns the value of the
+            nested property, or `None` if the property does not exist.
+        :rtype: function
         """
 
         if '.' not in name:
-            return data[name] if name in data else None
+            def read(data: Dict) -> Any:
+                return data[name] if name in data else None
 
-        names = name.split('.')
-        inner = data
+            return read
 
-        for i in range(len(names) - 1):
-            if names[i] not in inner:
-                return False
+        names = tuple(name.split('.'))
+        parents = names[:-1]
+        idx = names[-1]
+
+        def read(data: Dict) -> Any:
+            inner = data
 
-            inner = inner[names[i]]
+            for n in parents:
+                if n not in inner:
+                    return False
 
-        idx = names[len(names) - 1]
-        return inner[idx] if idx in inner else None
+                inner = inner[n]
+
+            return inner[idx] if idx in inner else None
+
+        return read
 
     @staticmethod
-    def _write_prop(out: dict, name: str, value: str) -> None:
+    @lru_cache(maxsize=1024)
+    def _compile_write(name: str) -> Callable[[Dict, Any], None]:
         """
-        Write a value to a nested data object.
+        Create a function that writes a value to a nested data object.
 
-        :param dict out: Data object to write value into.
         :param str name: Property name, with nested properties separated by dots.
-        :param str value: Value to write.
-        :return: None
+        :return: Function that takes the data object and the value to write.
+        :rtype: function
         """
 
         if '.' not in name:
-            out[name] = value
-            return
+            def write(out: Dict, value: Any) -> None:
+                out[name] = value
+
+            return write
+
+        names = tuple(name.split('.'))
+        parents = names[:-1]
+        idx = names[-1]
+
+        def write(out: Dict, value: Any) -> None:
+            inner = out
+
+            for n in parents:
+                if n not in inner:
+                    inner[n] = {}
+                elif not isinstance(inner[n], dict):
+                    raise Exception(
+                        'A property with the name `' + name + '` already exists. ' +
+                        'This can occur if you have properties which share a prefix - ' +
+                        'for example `name` and `name.first`.'
+                    )
 
-        names = name.split('.')
-        inner = out
+                inner = inner[n]
 
-        for i in range(len(names) - 1):
-            loop_name = names[i]
-            if loop_name not in inner:
-                inner[loop_name] = {}
-            elif not isinstance(inner[loop_name], dict):
+            if idx in inner:
                 raise Exception(
-                    'A property with the name `' + name + '` already exists. ' +
-                    'This can occur if you have properties which share a prefix - ' +
-                    'for example `name` and `name.first`.'
+                    'Duplicate field detected - a field with the name ' +
+                    '`' + name + '` already exists'
                 )
 
-            inner = inner[loop_name]
+            inner[idx] = value
 
-        idx = names[len(names) - 1]
+        return write
 
-        if idx in inner:
-            raise Exception(
-                'Duplicate field detected - a field with the name ' +
-                '`' + name + '` already exists'
-            )
+    @staticmethod
+    def _prop_exists(name: str, data: Dict) -> bool:
+        """
+        Check if a nested property exists in a data set.
+
+        :param str name: Property name, with nested properties separated by dots.
+        :param dict data: Data set to check.
+        :return: `True` if the property exists, `False` otherwise.
+        :rtype: bool
+        """
+        return NestedData._compile_exists(name)(data)
+
+    @staticmethod
+    def _read_prop(name: str, data: Dict) -> str:
+        """
+        Get a nested property value from a data set.
 
-        inner[idx] = value
+        :param str name: Property name, with nested properties separated by dots.
+        :param dict data: Data set to check.
+        :return: Value of the nested property, or `None` if the property does not exist.
+        :rtype: str
+        """
+        return NestedData._compile_read(name)(data)
+
+    @staticmethod
+    def _write_prop(out: dict, name: str, value: str) -> None:
+        """
+        Write a value to a nested data object.
+
+        :param dict out: Data object to write value into.
+        :param str name: Property name, with nested properties separated by dots.
+        :param str value: Value to write.
+        :return: None
+        """
+        NestedData._compile_write(name)(out, value)
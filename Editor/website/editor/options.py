@@ -1,5 +1,4 @@
 import sqlalchemy
-import sqlalchemy.orm
 
 from typing import Union, Dict, Optional, List
 
@@ -15,6 +14,9 @@ class Options:
     Options` instances are used with the {@link Field.options} method.
     """
 
+    __slots__ = ('_table', '_value', '_label', '_left_join', '_limit',
+                 '_renderer', '_where', '_order', '_manual_opts', '_frozen')
+
     def __init__(self,):
         self._table = ''
         self._value = ''
@@ -25,6 +27,7 @@ class Options:
         self._where = None
         self._order = ''
         self._manual_opts = []
+        self._frozen = False
 
     ########################################
     # Public method
@@ -37,6 +40,8 @@ class Options:
         :return: Self for chaining
         :rtype: Options
         """
+        self.__check_frozen()
+
         if value is None:
             value = label
 
@@ -54,6 +59,8 @@ class Options:
         if label == None:
             return self._label
 
+        self.__check_frozen()
+
         if isinstance(label, str):
             self._label = [label]
         else:
@@ -73,6 +80,8 @@ class Options:
         :rtype: Options
         """
         # TK COLIN not sure that we'll support the functions here
+        self.__check_frozen()
+
         self._left_join.append(
             {'field1': field1, 'field2': field2, 'operator': operator, 'table': table})
 
@@ -89,6 +98,8 @@ class Options:
         if limit is None:
             return self._limit
 
+        self.__check_frozen()
+
         self._limit = limit
 
         if True:
@@ -107,6 +118,8 @@ class Options:
         if order is None:
             return self._order
 
+        self.__check_frozen()
+
         self._order = order
 
         if True:
@@ -124,6 +137,8 @@ class Options:
         if table is None:
             return self._table
 
+        self.__check_frozen()
+
         self._table = table
         return self
 
@@ -138,6 +153,8 @@ class Options:
         if value is None:
             return self._value
 
+        self.__check_frozen()
+
         self._value = value
         return self
 
@@ -151,6 +168,8 @@ class Options:
         if where is None:
             return self._where
 
+        self.__check_frozen()
+
         self._where = where
 
         if True:
@@ -158,6 +177,22 @@ class Options:
         return self
 
     # Internal functions (to package)
+    def __check_frozen(self) -> None:
+        """
+        Raise an error if the configuration can't be changed.
+        """
+        if self._frozen:
+            raise Exception(
+                'The Options configuration is frozen, as its Editor is. Make any '
+                'changes before calling `Editor.freeze()`.')
+
+    def _freeze(self) -> None:
+        """
+        Stop the options from being changed, as they are shared by the requests
+        of a frozen Editor.
+        """
+        self._frozen = True
+
     def _exec(self, db: sqlalchemy.engine.Engine) -> Dict:
         label = self._label
         value = self._value
@@ -186,7 +221,6 @@ class Options:
             table.append_column(sqlalchemy.Column(field))
 
         metadata.create_all(db)
-        session = sqlalchemy.orm.create_session(bind=db)
 
         query = sqlalchemy.select().distinct()
 
@@ -195,7 +229,8 @@ class Options:
 
         sql_stmt = sqlalchemy.inspect(query)
 
-        result = session.execute(query).fetchall()
+        with db.connect() as connection:
+            result = connection.execute(query).fetchall()
 
         # TK where
         # TK order
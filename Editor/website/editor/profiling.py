@@ -0,0 +1,305 @@
+import collections
+import marshal
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+from typing import Any, Dict, List, Optional
+
+
+class Profiler:
+    """
+    Opt-in profiling of `Editor.process()`, to find out where the time goes in
+    the requests of an endpoint that is slow under load. Two kinds of request
+    are profiled:
+
+    * A fraction (`sample`) of all requests, with `cProfile`, which records
+      every function call but slows the request down.
+    * Any request slower than `threshold` seconds, by sampling the stack of
+      the thread processing it every `interval` seconds. The cost of this is
+      small, so it can be left running, and as it isn't known in advance which
+      requests will be slow, the stacks of all requests are sampled, but only
+      kept for the slow ones.
+
+    Each profile is tagged with the Editor's table and the action, and the
+    last `limit` are kept. They can be read with `pstats` (see `stats`) or
+    written as pstats files with `dump`, for use with tools such as
+    `snakeviz`. For a stack-sampled profile, the call counts are the number
+    of samples a function was seen in, and the times are the request's
+    duration shared out by the samples.
+
+    A profiler would normally be created once at module level and given to
+    `Editor.profiler`.
+    """
+
+    def __init__(self, sample: Optional[float] = 0.0, threshold: Optional[float] = None, limit: Optional[int] = 20, interval: Optional[float] = 0.005):
+        """
+        Creates an instance of Profiler.
+
+        :param sample: Fraction of the requests to profile with `cProfile`,
+            from 0 to 1.
+        :type sample: float, optional
+        :param threshold: Time in seconds over which a request's stack samples
+            are kept. None disables the stack sampling.
+        :type threshold: float, optional
+        :param limit: Number of profiles to keep.
+        :type limit: int, optional
+        :param interval: Time in seconds between stack samples.
+        :type interval: float, optional
+        """
+        self._sample = sample
+        self._threshold = threshold
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._traces = collections.deque(maxlen=limit)
+        self._active = {}
+        self._wake = threading.Event()
+        self._sampler = None
+
+    def traces(self) -> List[Dict[str, Any]]:
+        """
+        Get the profiles that have been kept, oldest first.
+
+        :return: List of dicts with the `table`, `action`, `kind` (`profile`
+            for cProfile or `sample` for stack sampling), request `duration`
+            in seconds, `time` it finished (a Unix timestamp), number of
+            `samples` (stack sampling only) and the `stats` in the `pstats`
+            format
+        :rtype: list
+        """
+        with self._lock:
+            return list(self._traces)
+
+    def stats(self, trace: Dict[str, Any]) -> Any:
+        """
+        Load a profile into `pstats` for sorting and printing.
+
+        :param trace: Profile from `traces`
+        :return: Profile statistics
+        :rtype: pstats.Stats
+        """
+        import pstats
+
+        return pstats.Stats(_Stats(trace['stats']))
+
+    def dump(self, directory: str) -> List[str]:
+        """
+        Write the profiles to a directory as pstats files, named by the time,
+        table, action and kind of profile.
+
+        :param directory: Directory to write to. It is created if needed.
+        :return: Paths of the files written
+        :rtype: list
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+
+        for i, trace in enumerate(self.traces()):
+            name = '%s-%03d-%s-%s-%s.pstats' % (
+                time.strftime('%Y%m%d-%H%M%S', time.localtime(trace['time'])), i,
+                trace['table'], trace['action'], trace['kind'])
+            path = os.path.join(directory, re.sub(r'[^\w.-]+', '_', name))
+
+            with open(path, 'wb') as f:
+                marshal.dump(trace['stats'], f)
+
+            paths.append(path)
+
+        return paths
+
+    def reset(self) -> 'Profiler':
+        """
+        Clear the profiles.
+
+        :return: Self for chaining
+        :rtype: Profiler
+        """
+        with self._lock:
+            self._traces.clear()
+
+        return self
+
+    def _start(self) -> Optional[Dict[str, Any]]:
+        """
+        Start profiling a request, if it is sampled or could be slow. Called by
+        `Editor.process()`.
+
+        :return: Handle for `_finish`, or None if the request isn't profiled
+        """
+        sampled = self._sample > 0 and random.random() < self._sample
+
+        if not sampled and self._threshold is None:
+            return None
+
+        handle = {
+            'start': time.perf_counter(),
+            'profile': None,
+            'keep': sampled,
+            'thread': threading.get_ident(),
+            # Stacks are recorded up to the caller, `process()`
+            'root': sys._getframe(1),
+            'samples': collections.Counter(),
+        }
+
+        if sampled:
+            import cProfile
+
+            profile = cProfile.Profile()
+
+            try:
+                profile.enable()
+                handle['profile'] = profile
+            except ValueError:
+                # Another profiler is running (Python 3.12+ allows only one),
+                # so the stack is sampled instead
+                pass
+
+        if handle['profile'] is None:
+            with self._lock:
+                self._active[id(handle)] = handle
+
+                if self._sampler is None:
+                    self._sampler = threading.Thread(
+                        target=self.__sample_loop, name='editor-profiler', daemon=True)
+                    self._sampler.start()
+
+            self._wake.set()
+
+        return handle
+
+    def _finish(self, handle: Dict[str, Any], table: str, action: str) -> None:
+        """
+        Stop profiling a request and keep the profile if it was sampled or was
+        slow. Called by `Editor.process()`.
+
+        :param handle: Handle from `_start`
+        :param table: Editor table
+        :param action: Action name
+        """
+        duration = time.perf_counter() - handle['start']
+        profile = handle['profile']
+        trace = {'table': table, 'action': action, 'duration': duration, 'time': time.time()}
+
+        if profile is not None:
+            profile.disable()
+            profile.create_stats()
+
+            trace.update(kind='profile', samples=None, stats=profile.stats)
+        else:
+            with self._lock:
+                del self._active[id(handle)]
+                samples = dict(handle['samples'])
+
+            if not handle['keep'] and duration < self._threshold:
+                return
+
+            count = sum(samples.values())
+
+            # The samples are spread over the request, so the time each one
+            # stands for is taken from the duration, rather than the interval
+            # (which the sleep between samples overruns)
+            trace.update(kind='sample', samples=count,
+                         stats=self.__sample_stats(samples, duration / count if count else 0.0))
+
+        with self._lock:
+            self._traces.append(trace)
+
+    def __sample_loop(self) -> None:
+        """
+        Sample the stacks of the requests being profiled, in a background
+        thread. It waits while there are no requests to sample.
+        """
+        while True:
+            self._wake.wait()
+            time.sleep(self._interval)
+
+            with self._lock:
+                active = list(self._active.values())
+
+                if len(active) == 0:
+                    self._wake.clear()
+                    continue
+
+            frames = sys._current_frames()
+            stacks = []
+
+            for handle in active:
+                frame = frames.get(handle['thread'])
+                stack = []
+
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+
+                    if frame is handle['root']:
+                        break
+
+                    frame = frame.f_back
+
+                stacks.append((handle, tuple(reversed(stack))))
+
+            del frames
+
+            with self._lock:
+                for handle, stack in stacks:
+                    # The request may have finished while its stack was read
+                    if len(stack) and self._active.get(id(handle)) is handle:
+                        handle['samples'][stack] += 1
+
+    @staticmethod
+    def __sample_stats(samples: Dict[tuple, int], period: float) -> Dict[tuple, tuple]:
+        """
+        Convert stack samples to the `pstats` format. Each sample counts as a
+        call of each function in its stack, taking `period` seconds.
+
+        :param samples: Counts of each stack, outermost function first
+        :param period: Time that each sample stands for, in seconds
+        :return: Statistics keyed by function, of the call count, primitive
+            call count, own time, cumulative time and callers
+        """
+        stats = {}
+
+        for stack, count in samples.items():
+            seconds = count * period
+            seen = set()
+
+            for i, func in enumerate(stack):
+                entry = stats.get(func)
+
+                if entry is None:
+                    entry = stats[func] = [0, 0, 0.0, 0.0, {}]
+
+                leaf = i == len(stack) - 1
+
+                if leaf:
+                    entry[2] += seconds
+
+                # Recursive functions are only counted once per sample
+                if func not in seen:
+                    seen.add(func)
+                    entry[0] += count
+                    entry[1] += count
+                    entry[3] += seconds
+
+                if i > 0:
+                    caller = entry[4].get(stack[i - 1], (0, 0, 0.0, 0.0))
+                    entry[4][stack[i - 1]] = (
+                        caller[0] + count, caller[1] + count,
+                        caller[2] + (seconds if leaf else 0.0), caller[3] + seconds)
+
+        return {func: (e[0], e[1], e[2], e[3], e[4]) for func, e in stats.items()}
+
+
+class _Stats:
+    """
+    Holder for statistics in the `pstats` format, which `pstats.Stats` can load.
+    """
+
+    def __init__(self, stats: Dict[tuple, tuple]):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
@@ -0,0 +1,89 @@
+import itertools
+import sqlalchemy
+
+from typing import List, Optional, Union
+
+
+# Shared by all instances, since Editor (and so its replicas) is normally
+# created for each request - a per-instance counter would always start from
+# the first engine
+_counter = itertools.count()
+
+
+class ReadReplicas:
+    """
+    A set of database engines that Editor can send its reads to, leaving the
+    primary engine for writes.
+
+    Two strategies are available for picking the engine for each read:
+
+    * `round_robin` - cycle through the engines in turn.
+    * `least_loaded` - use the engine with the fewest connections currently
+      checked out of its pool (engines whose pool doesn't track this count as
+      unloaded). Ties are broken round robin.
+    """
+
+    strategies = ['round_robin', 'least_loaded']
+
+    def __init__(self, engines: Union[sqlalchemy.engine.Engine, List[sqlalchemy.engine.Engine]], strategy: Optional[str] = 'round_robin'):
+        """
+        Creates an instance of ReadReplicas.
+
+        :param engines: Engine or list of engines for the read replicas.
+        :type engines: sqlalchemy.engine.Engine or list
+        :param strategy: `round_robin` or `least_loaded`.
+        :type strategy: str, optional
+        """
+        if strategy not in self.strategies:
+            raise ValueError('Unknown read replica strategy: ' + str(strategy))
+
+        self._engines = [engines] if isinstance(
+            engines, sqlalchemy.engine.Engine) else list(engines)
+        self._strategy = strategy
+
+        if len(self._engines) == 0:
+            raise ValueError('At least one read engine must be given')
+
+    def engines(self) -> List[sqlalchemy.engine.Engine]:
+        """
+        Get the engines in the set.
+
+        :return: List of engines.
+        :rtype: list
+        """
+        return self._engines
+
+    def engine(self) -> sqlalchemy.engine.Engine:
+        """
+        Pick the engine to use for a read.
+
+        :return: Engine to read from.
+        :rtype: sqlalchemy.engine.Engine
+        """
+        engines = self._engines
+        count = len(engines)
+
+        if count == 1:
+            return engines[0]
+
+        start = next(_counter) % count
+
+        if self._strategy == 'round_robin':
+            return engines[start]
+
+        # Rotate so that ties don't always go to the first engine
+        rotated = engines[start:] + engines[:start]
+
+        return min(rotated, key=ReadReplicas.__load)
+
+    @staticmethod
+    def __load(engine: sqlalchemy.engine.Engine) -> int:
+        """
+        Get the number of connections an engine has in use.
+
+        :param engine: Engine to check.
+        :return: Number of connections checked out of the engine's pool.
+        """
+        checkedout = getattr(engine.pool, 'checkedout', None)
+
+        return checkedout() if callable(checkedout) else 0
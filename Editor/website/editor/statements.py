@@ -0,0 +1,454 @@
+import collections
+import contextvars
+import logging
+import random
+import re
+import threading
+import time
+
+import sqlalchemy
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# The Editor table and action being processed, set by `Editor.process()` so
+# that statements can be attributed to the request that issued them
+statement_context = contextvars.ContextVar('editor_statement_context', default=None)
+
+# The statement counts of the `process()` call being checked by a
+# `StatementBudget`
+_budget_tally = contextvars.ContextVar('editor_budget_tally', default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])')
+_PARAM = re.compile(r'%\(\w+\)s|%s|(?<![:\w]):\w+|\$\d+|\?')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """
+    Normalise a statement so that statements which differ only in their
+    values are counted together. Literals and parameter placeholders become
+    `?`, lists of them (such as an `IN` list) become `(...)` and whitespace is
+    collapsed.
+
+    :param statement: SQL statement
+    :return: Fingerprint
+    :rtype: str
+    """
+    statement = _STRING.sub('?', statement)
+    statement = _PARAM.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _LIST.sub('(...)', statement)
+
+    return _SPACE.sub(' ', statement).strip()
+
+
+class StatementRecorder:
+    """
+    Opt-in recorder of the SQL statements run on one or more engines. It
+    listens to SQLAlchemy's `before_cursor_execute` and `after_cursor_execute`
+    events, and for each statement fingerprint (see `fingerprint`) counts the
+    executions, total and maximum time, and rows. Statements which take longer
+    than `threshold` seconds are logged as warnings, with the Editor table and
+    action that issued them.
+
+    Rows are the driver's `rowcount`. Some drivers (e.g. SQLite) don't give
+    one for a `SELECT`, in which case no rows are counted for it.
+
+    A recorder would normally be created once at module level and given to
+    `Editor.statement_recorder`, or attached to an engine with `attach`.
+    `snapshot` gives the statistics, e.g. for a metrics endpoint.
+    """
+
+    def __init__(self, threshold: Optional[float] = 0.5, limit: Optional[int] = 1000, log_parameters: Optional[bool] = False):
+        """
+        Creates an instance of StatementRecorder.
+
+        :param threshold: Time in seconds over which a statement is logged as
+            slow. `None` disables the log.
+        :type threshold: float, optional
+        :param limit: Maximum number of fingerprints to keep statistics for.
+            Statements after that are counted together as `<other>`. None
+            for no limit.
+        :type limit: int, optional
+        :param log_parameters: Include the parameters in the slow statement
+            log. They can contain personal data, so are left out by default.
+        :type log_parameters: bool, optional
+        """
+        self._threshold = threshold
+        self._limit = limit
+        self._log_parameters = log_parameters
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._engines = []
+
+    def attach(self, engine: sqlalchemy.engine.Engine) -> 'StatementRecorder':
+        """
+        Record the statements run on an engine. Attaching an engine more than
+        once has no effect.
+
+        :param engine: Engine to record
+        :return: Self for chaining
+        :rtype: StatementRecorder
+        """
+        with self._lock:
+            if any(e is engine for e in self._engines):
+                return self
+
+            self._engines.append(engine)
+
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', self._before)
+        sqlalchemy.event.listen(engine, 'after_cursor_execute', self._after)
+
+        return self
+
+    def detach(self, engine: sqlalchemy.engine.Engine) -> 'StatementRecorder':
+        """
+        Stop recording the statements run on an engine.
+
+        :param engine: Engine to stop recording
+        :return: Self for chaining
+        :rtype: StatementRecorder
+        """
+        with self._lock:
+            if not any(e is engine for e in self._engines):
+                return self
+
+            self._engines = [e for e in self._engines if e is not engine]
+
+        sqlalchemy.event.remove(engine, 'before_cursor_execute', self._before)
+        sqlalchemy.event.remove(engine, 'after_cursor_execute', self._after)
+
+        return self
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Get the statistics recorded so far, the statements with the most time
+        first.
+
+        :return: List of dicts with the `statement` fingerprint, its `count`,
+            `total`, `max` and `mean` times (seconds), `rows`, `max_rows`,
+            `slow` count and `sources` (executions by `table:action`)
+        :rtype: list
+        """
+        with self._lock:
+            stats = [dict(stat, sources=dict(stat['sources']))
+                     for stat in self._stats.values()]
+
+        for stat in stats:
+            stat['mean'] = stat['total'] / stat['count']
+
+        stats.sort(key=lambda stat: stat['total'], reverse=True)
+
+        return stats
+
+    def reset(self) -> 'StatementRecorder':
+        """
+        Clear the statistics.
+
+        :return: Self for chaining
+        :rtype: StatementRecorder
+        """
+        with self._lock:
+            self._stats = {}
+
+        return self
+
+    def _before(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        """
+        Listener for `before_cursor_execute` - note the start time.
+        """
+        # On the execution context, rather than the connection, so nothing is
+        # left behind if the statement fails
+        if context is not None:
+            context._editor_statement_start = time.perf_counter()
+
+    def _after(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        """
+        Listener for `after_cursor_execute` - record the statement.
+        """
+        start = getattr(context, '_editor_statement_start', None)
+
+        if start is None:
+            return
+
+        elapsed = time.perf_counter() - start
+        rows = getattr(cursor, 'rowcount', -1)
+        source = statement_context.get()
+
+        self.record(statement, elapsed, rows if rows is not None and rows >= 0 else None, source)
+
+        if self._threshold is not None and elapsed >= self._threshold:
+            table, action = source if source is not None else (None, None)
+
+            if self._log_parameters:
+                logger.warning('Slow statement (%.3fs, table=%s, action=%s): %s %r',
+                               elapsed, table, action, statement, parameters)
+            else:
+                logger.warning('Slow statement (%.3fs, table=%s, action=%s): %s',
+                               elapsed, table, action, statement)
+
+    def record(self, statement: str, elapsed: float, rows: Optional[int] = None, source: Optional[Tuple[str, str]] = None) -> None:
+        """
+        Add an execution of a statement to the statistics.
+
+        :param statement: SQL statement
+        :param elapsed: Execution time in seconds
+        :param rows: Number of rows, if known
+        :param source: Editor table and action that ran the statement
+        """
+        key = fingerprint(statement)
+        slow = self._threshold is not None and elapsed >= self._threshold
+        name = source[0] + ':' + source[1] if source is not None else None
+
+        with self._lock:
+            stat = self._stats.get(key)
+
+            if stat is None:
+                if self._limit is not None and len(self._stats) >= self._limit:
+                    key = '<other>'
+                    stat = self._stats.get(key)
+
+                if stat is None:
+                    stat = self._stats[key] = {
+                        'statement': key, 'count': 0, 'total': 0.0, 'max': 0.0,
+                        'rows': 0, 'max_rows': 0, 'slow': 0, 'sources': {}
+                    }
+
+            stat['count'] += 1
+            stat['total'] += elapsed
+
+            if elapsed > stat['max']:
+                stat['max'] = elapsed
+
+            if rows is not None:
+                stat['rows'] += rows
+
+                if rows > stat['max_rows']:
+                    stat['max_rows'] = rows
+
+            if slow:
+                stat['slow'] += 1
+
+            if name is not None:
+                stat['sources'][name] = stat['sources'].get(name, 0) + 1
+
+
+class StatementBudgetExceeded(Exception):
+    """
+    Raised by `Editor.process()` when a `StatementBudget` with `raise_error`
+    set is exceeded. The budget's report for the request is in `report`.
+    """
+
+    def __init__(self, report: Dict[str, Any]):
+        super().__init__(
+            'SQL statement budget exceeded for `' + report['table'] + '` ' + report['action'] +
+            ': ' + str(report['statements']) + ' statements, budget ' + str(report['budget']))
+
+        self.report = report
+
+
+class StatementBudget:
+    """
+    Guard on the number of SQL statements run by each `Editor.process()`
+    call. While a request is processed the statements run on the Editor's
+    engines are counted by fingerprint (see `fingerprint`). Afterwards, a
+    report is made of:
+
+    * The total number of statements, and whether it is over the budget
+      (`limit`).
+    * Fingerprints run `repeats` times or more - the same statement, with
+      different values, run over and over. This is usually a query per row
+      (an N+1), which could be done once for all of the rows.
+
+    Reports with a problem are logged as warnings and given to `handler`, and
+    the most recent reports are kept (see `reports`). With `raise_error` set,
+    `process()` raises `StatementBudgetExceeded` when the budget is exceeded,
+    which is intended for tests. For use in production, `sample` checks only a
+    fraction of the requests.
+
+    A budget would normally be created once at module level and given to
+    `Editor.statement_budget`.
+    """
+
+    def __init__(self, limit: Optional[Union[int, Dict[str, int]]] = None, repeats: Optional[int] = 5, raise_error: Optional[bool] = False, sample: Optional[float] = 1.0, handler: Optional[Callable[[Dict[str, Any]], None]] = None, history: Optional[int] = 100):
+        """
+        Creates an instance of StatementBudget.
+
+        :param limit: Maximum number of statements for a request. Either a
+            number for all requests, or a dict of numbers keyed by action name
+            (`read`, `create`, `edit`, `remove`, `upload`, `import`) - an
+            action not in the dict has no limit. None for no limit.
+        :type limit: int or dict, optional
+        :param repeats: Number of runs of the same fingerprint in a request
+            that is reported as a probable N+1. None disables the check.
+        :type repeats: int, optional
+        :param raise_error: Raise `StatementBudgetExceeded` when the limit is
+            exceeded.
+        :type raise_error: bool, optional
+        :param sample: Fraction of the requests to check, from 0 to 1.
+        :type sample: float, optional
+        :param handler: Function called with the report of each request that
+            has a problem.
+        :type handler: function, optional
+        :param history: Number of reports to keep.
+        :type history: int, optional
+        """
+        self._limit = limit
+        self._repeats = repeats
+        self._raise_error = raise_error
+        self._sample = sample
+        self._handler = handler
+        self._lock = threading.Lock()
+        self._reports = collections.deque(maxlen=history)
+        self._engines = []
+
+    def attach(self, engine: sqlalchemy.engine.Engine) -> 'StatementBudget':
+        """
+        Count the statements run on an engine. Attaching an engine more than
+        once has no effect.
+
+        :param engine: Engine to count the statements of
+        :return: Self for chaining
+        :rtype: StatementBudget
+        """
+        with self._lock:
+            if any(e is engine for e in self._engines):
+                return self
+
+            self._engines.append(engine)
+
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', self._before)
+
+        return self
+
+    def detach(self, engine: sqlalchemy.engine.Engine) -> 'StatementBudget':
+        """
+        Stop counting the statements run on an engine.
+
+        :param engine: Engine to stop counting
+        :return: Self for chaining
+        :rtype: StatementBudget
+        """
+        with self._lock:
+            if not any(e is engine for e in self._engines):
+                return self
+
+            self._engines = [e for e in self._engines if e is not engine]
+
+        sqlalchemy.event.remove(engine, 'before_cursor_execute', self._before)
+
+        return self
+
+    def reports(self) -> List[Dict[str, Any]]:
+        """
+        Get the reports of the most recently checked requests, oldest first.
+
+        :return: List of dicts with the `table` and `action`, the number of
+            `statements`, the `budget` (None if there isn't one), whether it
+            was `exceeded`, the statement counts by fingerprint (`counts`)
+            and the `repeated` fingerprints with their counts, most first
+        :rtype: list
+        """
+        with self._lock:
+            return list(self._reports)
+
+    def reset(self) -> 'StatementBudget':
+        """
+        Clear the reports.
+
+        :return: Self for chaining
+        :rtype: StatementBudget
+        """
+        with self._lock:
+            self._reports.clear()
+
+        return self
+
+    def _start(self) -> Optional[contextvars.Token]:
+        """
+        Start counting the statements of a request. Called by
+        `Editor.process()`.
+
+        :return: Token for `_finish`, or None if the request isn't sampled
+        """
+        if self._sample < 1 and random.random() >= self._sample:
+            return None
+
+        return _budget_tally.set((self, {}))
+
+    def _finish(self, token: contextvars.Token, table: str, action: str) -> Dict[str, Any]:
+        """
+        Stop counting the statements of a request and report on them. Called
+        by `Editor.process()`.
+
+        :param token: Token from `_start`
+        :param table: Editor table
+        :param action: Action name
+        :return: Report
+        """
+        counts = _budget_tally.get()[1]
+        _budget_tally.reset(token)
+
+        limit = self._limit.get(action) if isinstance(self._limit, dict) else self._limit
+        statements = sum(counts.values())
+        repeated = []
+
+        if self._repeats is not None:
+            repeated = sorted(
+                ((key, count) for key, count in counts.items() if count >= self._repeats),
+                key=lambda item: item[1], reverse=True)
+
+        report = {
+            'table': table,
+            'action': action,
+            'statements': statements,
+            'budget': limit,
+            'exceeded': limit is not None and statements > limit,
+            'counts': counts,
+            'repeated': repeated,
+        }
+
+        with self._lock:
+            self._reports.append(report)
+
+        if report['exceeded']:
+            logger.warning('SQL statement budget exceeded (table=%s, action=%s): %d statements, budget %d',
+                           table, action, statements, limit)
+
+        for key, count in repeated:
+            logger.warning('Probable N+1 (table=%s, action=%s): %d runs of %s',
+                           table, action, count, key)
+
+        if self._handler is not None and (report['exceeded'] or len(repeated)):
+            self._handler(report)
+
+        return report
+
+    def _enforce(self, report: Dict[str, Any]) -> None:
+        """
+        Raise an error if the report is over budget and errors are enabled.
+        Called by `Editor.process()`, once the request is complete.
+
+        :param report: Report from `_finish`
+        """
+        if self._raise_error and report['exceeded']:
+            raise StatementBudgetExceeded(report)
+
+    def _before(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        """
+        Listener for `before_cursor_execute` - count the statement, if it is
+        run by a request being checked by this budget.
+        """
+        tally = _budget_tally.get()
+
+        if tally is None or tally[0] is not self:
+            return
+
+        key = fingerprint(statement)
+        tally[1][key] = tally[1].get(key, 0) + 1
@@ -0,0 +1,544 @@
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+
+import sqlalchemy
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .table import Table
+
+
+class Upload:
+    """
+    Upload class for Editor. This class provides the ability to easily specify
+    file upload information, specifically how the file should be recorded on
+    the server (database and file system).
+
+    An instance of this class is attached to a field using the `Field.upload`
+    method. When Editor detects a file upload for that file the information
+    provided for this instance is executed.
+
+    The file is read from the request a chunk at a time and written to a
+    spool file on disk, with its size and hash calculated as it goes, so it
+    is never held in memory as a whole. Once it has passed validation the
+    spool file is moved to its final location and its information written to
+    the files table.
+
+    The configuration is shared by all requests, so an instance should not
+    be changed once the Editor that uses it is processing requests.
+    """
+
+    # Column values which are filled in from the uploaded file, for use with
+    # `db`
+    DB_CONTENT = 'editor-content'
+    DB_CONTENT_TYPE = 'editor-contentType'
+    DB_EXTN = 'editor-extn'
+    DB_FILE_NAME = 'editor-fileName'
+    DB_FILE_SIZE = 'editor-fileSize'
+    DB_HASH = 'editor-hash'
+    DB_MIME_TYPE = 'editor-mimeType'
+    DB_READ_ONLY = 'editor-readOnly'
+    DB_SYSTEM_PATH = 'editor-systemPath'
+    DB_WEB_PATH = 'editor-webPath'
+
+    __slots__ = ('_action', '_web_path', '_table', '_pkey', '_fields',
+                 '_validators', '_extensions', '_extension_error', '_max_size',
+                 '_max_size_error', '_chunk', '_hash', '_spool_dir',
+                 '_db_clean', '_db_clean_field', '_sqla')
+
+    def __init__(self, action: Optional[Union[str, Callable[[Dict, Any], Any]]] = None):
+        """
+        Creates an instance of Upload.
+
+        :param action: Action to take on upload - see `action`
+        :type action: str or function, optional
+        """
+        self._action = action
+        self._web_path = None
+        self._table = None
+        self._pkey = None
+        self._fields = {}
+        self._validators = []
+        self._extensions = None
+        self._extension_error = None
+        self._max_size = None
+        self._max_size_error = None
+        self._chunk = 64 * 1024
+        self._hash = 'sha256'
+        self._spool_dir = None
+        self._db_clean = None
+        self._db_clean_field = None
+        self._sqla = None
+
+    ########################################
+    # Public methods
+
+    def action(self, action: Optional[Union[str, Callable[[Dict, Any], Any]]] = None) -> Union['Upload', str, Callable]:
+        """
+        Get/set the action to take when a file is uploaded. This can be either:
+
+        * A string - the path the file should be moved to. It can use the
+          placeholders `__ID__` (the id of the row in the files table),
+          `__NAME__` (the file name) and `__EXTN__` (the file extension,
+          without the dot).
+        * A function - given the file information and the id of the row in the
+          files table (None if `db` isn't used). The file information includes
+          the `path` of the spooled file, which the function must move or copy
+          if it wants to keep it. When `db` isn't used, the value returned is
+          used as the file's id.
+
+        :param action: Path or function
+        :return: Current action or self for chaining
+        """
+        if action is None:
+            return self._action
+
+        self._action = action
+        return self
+
+    def web_path(self, path: Optional[str] = None) -> Union['Upload', str]:
+        """
+        Get/set the URL the file can be accessed from once uploaded, for the
+        `DB_WEB_PATH` column. It can use the same placeholders as `action`, for
+        example `/static/uploads/__ID__.__EXTN__`.
+
+        :param str path: URL template
+        :return: Current template or self for chaining
+        """
+        if path is None:
+            return self._web_path
+
+        self._web_path = path
+        return self
+
+    def db(self, table: Optional[str] = None, pkey: Optional[str] = None, fields: Optional[Dict[str, Any]] = None) -> Union['Upload', str]:
+        """
+        Get/set the database table to store information about the uploaded
+        files in.
+
+        :param str table: Table name
+        :param str pkey: Primary key column of the table
+        :param dict fields: Columns to write, with the value for each. The
+            value can be one of the `DB_*` constants, a function which is
+            given the file information, or a value to write as it is.
+        :return: Table name or self for chaining
+        """
+        if table is None:
+            return self._table
+
+        self._table = table
+        self._pkey = pkey
+        self._fields = fields if fields is not None else {}
+        self._sqla = None
+        return self
+
+    def table(self) -> Optional[str]:
+        """
+        Get the name of the table that file information is stored in.
+
+        :return: Table name, or None if not set
+        :rtype: str
+        """
+        return self._table
+
+    def pkey(self) -> Optional[str]:
+        """
+        Get the primary key column of the files table.
+
+        :return: Column name
+        :rtype: str
+        """
+        return self._pkey
+
+    def validator(self, fn: Optional[Callable[[Dict], Union[bool, str, None]]] = None) -> Union['Upload', List]:
+        """
+        Add a validator to check the uploaded file. It is given the file
+        information (`name`, `extn`, `type`, `size`, `hash` and the `path` of
+        the spooled file) and should return True or None if the file is valid,
+        or an error message if not.
+
+        :param fn: Validation function
+        :return: List of validators or self for chaining
+        """
+        if fn is None:
+            return self._validators
+
+        self._validators.append(fn)
+        return self
+
+    def allowed_extensions(self, extensions: Iterable[str], error: Optional[str] = 'This file type cannot be uploaded') -> 'Upload':
+        """
+        Set the file extensions that can be uploaded (case insensitive). This
+        is checked before the file is read.
+
+        :param extensions: Allowed extensions, without the dot
+        :param str error: Error message if the extension isn't allowed
+        :return: Self for chaining
+        """
+        self._extensions = {extn.lower() for extn in extensions}
+        self._extension_error = error
+        return self
+
+    def max_size(self, size: int, error: Optional[str] = 'File size is too large') -> 'Upload':
+        """
+        Set the maximum file size, in bytes. The upload is stopped as soon as
+        this many bytes have been read.
+
+        :param int size: Maximum size
+        :param str error: Error message if the file is too large
+        :return: Self for chaining
+        """
+        self._max_size = size
+        self._max_size_error = error
+        return self
+
+    def chunk(self, size: Optional[int] = None) -> Union['Upload', int]:
+        """
+        Get/set the number of bytes read from the request at a time.
+
+        :param int size: Chunk size
+        :return: Current size or self for chaining
+        """
+        if size is None:
+            return self._chunk
+
+        self._chunk = size
+        return self
+
+    def hash(self, algorithm: Optional[str] = None) -> Union['Upload', str]:
+        """
+        Get/set the `hashlib` algorithm used for the `DB_HASH` column.
+
+        :param str algorithm: Algorithm name
+        :return: Current algorithm or self for chaining
+        """
+        if algorithm is None:
+            return self._hash
+
+        hashlib.new(algorithm)
+        self._hash = algorithm
+        return self
+
+    def spool_dir(self, path: Optional[str] = None) -> Union['Upload', str]:
+        """
+        Get/set the directory files are spooled to while being uploaded. If
+        not set, the system's temporary directory is used. Using a directory
+        on the same file system as the final location lets the file be moved
+        without being copied.
+
+        :param str path: Directory
+        :return: Current directory or self for chaining
+        """
+        if path is None:
+            return self._spool_dir
+
+        self._spool_dir = path
+        return self
+
+    def db_clean(self, callback: Optional[Callable[[List[Dict]], bool]] = None, table_field: Optional[str] = None) -> Union['Upload', Callable]:
+        """
+        Set a function to clean up files which are no longer referenced by the
+        Editor's table. After a create, edit or remove, the rows in the files
+        table that aren't referenced are given to the function. If it returns
+        True, they are deleted from the files table. The function is
+        responsible for removing the files themselves.
+
+        :param callback: Clean up function
+        :param str table_field: Column in the Editor's table that references
+            the files. If not given, the field's database column is used.
+        :return: Current function or self for chaining
+        """
+        if callback is None:
+            return self._db_clean
+
+        self._db_clean = callback
+        self._db_clean_field = table_field
+        return self
+
+    ########################################
+    # Internal methods
+
+    def data(self, db: sqlalchemy.engine.Engine, ids: Optional[Iterable[Any]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the information for files from the files table.
+
+        :param db: Engine to read from
+        :param ids: Ids of the files to get. If None, all files are read.
+        :return: File information, by id
+        :rtype: dict
+        """
+        if self._table is None:
+            return {}
+
+        table = self.__sqla(db)
+        columns = [table.c[self._pkey]] + [
+            table.c[name] for name, value in self._fields.items()
+            if value != Upload.DB_CONTENT and name != self._pkey
+        ]
+        out = {}
+
+        with db.connect() as connection:
+            if ids is None:
+                self.__rows(connection.execute(sqlalchemy.select(*columns)), out)
+            else:
+                ids = list(ids)
+                sql = sqlalchemy.select(*columns).where(
+                    table.c[self._pkey].in_(sqlalchemy.bindparam('ids', expanding=True)))
+
+                # Chunked, to stay within the database's parameter limits
+                for i in range(0, len(ids), 500):
+                    self.__rows(connection.execute(
+                        sql, {'ids': ids[i:i + 500]}), out)
+
+        return out
+
+    def _exec(self, editor: Any, file: Any) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Store an uploaded file.
+
+        :param editor: Editor instance the upload is for
+        :param file: Uploaded file - a file object, or an object with a
+            `stream` (such as Werkzeug's `FileStorage`)
+        :return: Tuple of the file's id and None, or None and an error message
+        """
+        if self._table is None and not callable(self._action):
+            raise Exception(
+                'An upload action function must be given when `db` is not used')
+
+        name = os.path.basename(str(
+            getattr(file, 'filename', None) or getattr(file, 'name', None) or 'upload'
+        ).replace('\\', '/'))
+
+        # A name of only dots (or none) would give a path to the directory or
+        # its parent when used for `__NAME__`, rather than to a file in it
+        if name.strip('.') == '' or '\x00' in name:
+            name = 'upload'
+
+        extn = name.rsplit('.', 1)[1] if '.' in name else ''
+
+        if self._extensions is not None and extn.lower() not in self._extensions:
+            return None, self._extension_error
+
+        info, error = self.__spool(file, name, extn)
+
+        if error is not None:
+            return None, error
+
+        try:
+            for validator in self._validators:
+                res = validator(info)
+
+                if res is not None and res is not True:
+                    return None, res
+
+            if self._table is None:
+                id = self._action(info, None)
+            else:
+                id = self.__store(editor, info)
+
+            return str(id), None
+        finally:
+            # Moved away unless there was an error
+            if os.path.exists(info['path']):
+                os.remove(info['path'])
+
+    def _clean(self, editor: Any, field: Any) -> None:
+        """
+        Run the `db_clean` function for the files which are no longer
+        referenced by the Editor's table.
+
+        :param editor: Editor instance
+        :param field: Field the upload is attached to
+        """
+        if self._db_clean is None or self._table is None:
+            return
+
+        column = self._db_clean_field or field.db_field()
+        c, t = column.rsplit('.', 1) if '.' in column else (column, None)
+        ref = sqlalchemy.table(
+            editor.table()[0].split(' ')[0] if t is None else t, sqlalchemy.column(c))
+        db = editor._engine
+        table = self.__sqla(db)
+        pkey = table.c[self._pkey]
+        orphans = sqlalchemy.select(table).where(pkey.not_in(
+            sqlalchemy.select(ref.c[c]).where(ref.c[c].is_not(None))))
+
+        with db.connect() as connection:
+            rows = [dict(row._mapping) for row in connection.execute(orphans)]
+
+        if len(rows) == 0 or self._db_clean(rows) is not True:
+            return
+
+        ids = [row[self._pkey] for row in rows]
+
+        with db.begin() as connection:
+            for i in range(0, len(ids), 500):
+                connection.execute(table.delete().where(pkey.in_(ids[i:i + 500])))
+
+    def __spool(self, file: Any, name: str, extn: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Copy the uploaded file to a spool file, a chunk at a time, working
+        out its size and hash as it goes.
+
+        :param file: Uploaded file
+        :param name: File name
+        :param extn: File extension
+        :return: File information and None, or None and an error message
+        """
+        read = getattr(file, 'stream', file).read
+        digest = hashlib.new(self._hash)
+        chunk = self._chunk
+        limit = self._max_size
+        size = 0
+
+        fd, path = tempfile.mkstemp(
+            prefix='editor-upload-', dir=self._spool_dir)
+
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    data = read(chunk)
+
+                    if not data:
+                        break
+
+                    size += len(data)
+
+                    if limit is not None and size > limit:
+                        os.remove(path)
+                        return None, self._max_size_error
+
+                    digest.update(data)
+                    out.write(data)
+        except BaseException:
+            os.remove(path)
+            raise
+
+        return {
+            'name': name,
+            'extn': extn,
+            'type': getattr(file, 'mimetype', None) or getattr(file, 'content_type', None),
+            'size': size,
+            'hash': digest.hexdigest(),
+            'path': path
+        }, None
+
+    def __store(self, editor: Any, info: Dict[str, Any]) -> Any:
+        """
+        Write the file's information to the files table and move the file
+        into place.
+
+        :param editor: Editor instance
+        :param info: File information
+        :return: Id of the new row
+        """
+        db = editor._engine
+        table = self.__sqla(db)
+        values = {}
+        paths = {}
+
+        for column, prop in self._fields.items():
+            if prop == Upload.DB_SYSTEM_PATH or prop == Upload.DB_WEB_PATH:
+                # Need the id, so written once the row has been inserted
+                paths[column] = prop
+            elif prop == Upload.DB_CONTENT:
+                with open(info['path'], 'rb') as f:
+                    values[column] = f.read()
+            elif prop == Upload.DB_CONTENT_TYPE:
+                values[column] = info['type']
+            elif prop == Upload.DB_EXTN:
+                values[column] = info['extn']
+            elif prop == Upload.DB_FILE_NAME:
+                values[column] = info['name']
+            elif prop == Upload.DB_FILE_SIZE:
+                values[column] = info['size']
+            elif prop == Upload.DB_HASH:
+                values[column] = info['hash']
+            elif prop == Upload.DB_MIME_TYPE:
+                values[column] = mimetypes.guess_type(info['name'])[0] or \
+                    'application/octet-stream'
+            elif prop == Upload.DB_READ_ONLY:
+                continue
+            elif callable(prop):
+                values[column] = prop(info)
+            else:
+                values[column] = prop
+
+        moved = None
+
+        try:
+            with db.begin() as connection:
+                res = connection.execute(table.insert().values(values))
+                id = res.inserted_primary_key[0]
+                system_path = None
+
+                if isinstance(self._action, str):
+                    system_path = self.__path(self._action, id, info)
+                    os.makedirs(os.path.dirname(system_path) or '.', exist_ok=True)
+                    shutil.move(info['path'], system_path)
+                    moved = system_path
+                elif callable(self._action):
+                    self._action(info, id)
+
+                update = {}
+
+                for column, prop in paths.items():
+                    if prop == Upload.DB_SYSTEM_PATH:
+                        update[column] = system_path
+                    elif self._web_path is not None:
+                        update[column] = self.__path(self._web_path, id, info)
+
+                if len(update):
+                    connection.execute(
+                        table.update().where(table.c[self._pkey] == id).values(update))
+        except BaseException:
+            # The row is rolled back, so the file would be left without one
+            if moved is not None and os.path.exists(moved):
+                os.remove(moved)
+
+            raise
+
+        return id
+
+    def __sqla(self, db: sqlalchemy.engine.Engine) -> sqlalchemy.Table:
+        """
+        Get the SQLAlchemy table for the files table.
+
+        :param db: Engine the table is in
+        :return: Table
+        """
+        if self._sqla is None:
+            table = Table(db, self._table)
+            table.columns(self._pkey, pkey=True)
+            table.columns([c for c in self._fields if c != self._pkey])
+            self._sqla = table.get()
+
+        return self._sqla
+
+    def __rows(self, result: Any, out: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Add the rows of a result to the file information.
+
+        :param result: Query result
+        :param out: File information, by id
+        """
+        for row in result:
+            row = dict(row._mapping)
+            out[str(row[self._pkey])] = row
+
+    @staticmethod
+    def __path(template: str, id: Any, info: Dict[str, Any]) -> str:
+        """
+        Fill in the placeholders of a path template.
+
+        :param template: Path with `__ID__`, `__NAME__` and `__EXTN__`
+        :param id: File id
+        :param info: File information
+        :return: Path
+        """
+        return template.replace('__ID__', str(id)) \
+            .replace('__NAME__', info['name']) \
+            .replace('__EXTN__', info['extn'])
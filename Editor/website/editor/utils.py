@@ -12,4 +12,35 @@ def split_table_column(full_name: str) -> List:
         parts = full_name.split('.')
         return [parts[1], parts[0]]
     
-    return [full_name, None]
\ No newline at end of file
+    return [full_name, None]
+
+def split_bracket_key(key: str) -> List[str]:
+    """
+    Split an HTTP form key in the bracket notation used by DataTables into its
+    parts, in a single pass. For example "data[57][last_name]" gives
+    `['data', '57', 'last_name']` and "data[1][tags][]" gives
+    `['data', '1', 'tags', '']` - the empty last part marking an array.
+
+    :param str key: The form key
+    :return: A list of the key parts
+    :rtype: list
+    """
+    start = key.find('[')
+
+    if start == -1:
+        return [key]
+
+    parts = [key[:start]]
+
+    while start != -1:
+        end = key.find(']', start)
+
+        if end == -1:
+            # Unterminated bracket - use the rest of the key as is
+            parts.append(key[start + 1:])
+            break
+
+        parts.append(key[start + 1:end])
+        start = key.find('[', end)
+
+    return parts
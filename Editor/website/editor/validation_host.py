@@ -5,9 +5,14 @@ class ValidationHost:
     """
     Information container about the Field and Editor instances
     for the item being validated.
+
+    Editor creates one host per field for each request and updates `id` for
+    each row, so a validator should not keep a reference to the host.
     """
 
-    def __init__(self, action: Optional[str] = None, id: Optional[str] = None, field: Optional[str] = None, editor: Optional[Any] = None):
+    __slots__ = ('action', 'id', 'field', 'editor', 'connection')
+
+    def __init__(self, action: Optional[str] = None, id: Optional[str] = None, field: Optional[str] = None, editor: Optional[Any] = None, connection: Optional[Any] = None):
         """
         Creates an instance of ValidationHost.
 
@@ -19,9 +24,14 @@ class ValidationHost:
         :type field: object, optional
         :param editor: Editor instance
         :type editor: object, optional
+        :param connection: Connection of a transaction in progress (bulk
+            import), which database lookups on the Editor's own database
+            should use
+        :type connection: sqlalchemy.engine.Connection, optional
         :rtype: None
         """
         self.action = action
         self.id = id
         self.field = field
         self.editor = editor
+        self.connection = connection
@@ -1,4 +1,28 @@
-from typing import Optional, Dict
+from typing import Any, Optional, Dict
+
+
+class _Option:
+    """
+    A validation option - the instance's value, or the default when read from
+    the class (`ValidationOptions.message`), as the class attributes held the
+    defaults before the class had `__slots__`.
+    """
+
+    __slots__ = ('_name', '_slot')
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._name = name
+        self._slot = '_' + name
+
+    def __get__(self, obj: Any, owner: Optional[type] = None) -> Any:
+        if obj is None:
+            return owner.defaults[self._name]
+
+        return getattr(obj, self._slot)
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        setattr(obj, self._slot, value)
+
 
 class ValidationOptions:
     """
@@ -16,10 +40,19 @@ class ValidationOptions:
                          submit just a partial list of options.
     """
 
-    # Defaults
-    message: str = "Input not valid"
-    empty: bool = True
-    optional: bool = True
+    __slots__ = ('_message', '_empty', '_optional')
+
+    message = _Option()
+    empty = _Option()
+    optional = _Option()
+
+    # Defaults, which are also read through the class attributes. Change them
+    # here, as assigning to a class attribute replaces the option
+    defaults = {
+        'message': 'Input not valid',
+        'empty': True,
+        'optional': True
+    }
 
     @staticmethod
     def select(user: Optional['ValidationOptions'] = None) -> 'ValidationOptions':
@@ -46,6 +79,8 @@ class ValidationOptions:
         if options is None:
             options = {}
 
-        self.message = options.get('message', self.message)
-        self.empty = options.get('empty', self.empty)
-        self.optional = options.get('optional', self.optional)
\ No newline at end of file
+        defaults = self.defaults
+
+        self.message = options.get('message', defaults['message'])
+        self.empty = options.get('empty', defaults['empty'])
+        self.optional = options.get('optional', defaults['optional'])
\ No newline at end of file
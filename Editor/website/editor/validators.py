@@ -1,8 +1,7 @@
 import re
 import datetime
-import validators
 
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 
 from typing import Callable, Optional, Dict, List
 
@@ -10,6 +9,22 @@ from .validation_options import ValidationOptions
 from .validation_host import ValidationHost
 
 
+# Patterns are compiled once, rather than looked up in the `re` cache per call
+_EMAIL = re.compile(
+    r'^(([^<>()\[\]\.,;:\s@\"]+(\.[^<>()\[\]\.,;:\s@\"]+)*)|(\".+\"))@(([^<>()[\]\.,;:\s@\"]+\.)+[^<>()[\]\.,;:\s@\"]{2,})$')
+_OCTET = r'0*(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])'
+_IPV4 = re.compile(r'\.'.join([_OCTET] * 4))
+_TAGS = re.compile(r'<.*>')
+
+# Quick check for a scheme, before the full check by the `validators` package
+_URL_SCHEME = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.\-]*://\S')
+
+
+# Test for the validators which only apply the validation options
+def _valid(val: str, data: dict, host: ValidationHost) -> bool:
+    return True
+
+
 class Validate:
     """
     Validation methods for DataTables Editor fields. All of the methods
@@ -29,21 +44,35 @@ class Validate:
 
     Options = ValidationOptions
 
-    def __common(val: str, opts: ValidationOptions):
-        if not opts.optional and val == None:
-            return False
+    @staticmethod
+    def _compile(opts: ValidationOptions, test: Optional[Callable[[str, dict, ValidationHost], bool]] = None) -> Callable[[str, dict, ValidationHost], bool]:
+        """
+        Create a validation function from the common validation options and
+        a validator's own test. The options are resolved when the function is
+        created, rather than on each call, and `None` and empty values are
+        decided by them before the test is run.
 
-        if not opts.empty and val != None and val == "":
-            return False
+        :param opts: Validation options
+        :param test: Validator's test for any other value. If not given, other
+            values are valid.
+        :return: Validation function
+        :rtype: function
+        """
+        on_none = True if opts.optional else opts.message
+        on_empty = True if opts.empty else opts.message
 
-        if opts.optional and val == None:
-            return True
+        if test is None:
+            test = _valid
 
-        if opts.empty and val == "":
-            return True
+        def func(val: str, data: dict, host: ValidationHost) -> bool:
+            if val is None:
+                return on_none
+            if val == '':
+                return on_empty
 
-        # Have the specific validation function perform its tests
-        return None
+            return test(val, data, host)
+
+        return func
 
     # Built-in validators
     @staticmethod
@@ -59,11 +88,7 @@ class Validate:
         """
         opts = ValidationOptions.select(cfg)
 
-        def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            return opts.message if common == False else True
-
-        return func
+        return Validate._compile(opts)
 
     @staticmethod
     def required(cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -77,11 +102,7 @@ class Validate:
         opts.empty = False
         opts.optional = False
 
-        def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            return opts.message if common == False else True
-
-        return func
+        return Validate._compile(opts)
 
     @staticmethod
     def not_empty(cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -94,11 +115,7 @@ class Validate:
         opts = ValidationOptions.select(cfg)
         opts.empty = False
 
-        def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            return opts.message if common == False else True
-
-        return func
+        return Validate._compile(opts)
 
     @staticmethod
     def boolean(cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -109,12 +126,9 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            if common != None:
-                return opts.message if common == False else True
-
             b = val.lower() if type(val) is str else val
 
             if b == True or b == 1 or b == '1' or b == 'true' or b == 't' or b == 'on' or b == 'yes' or b == '✓':
@@ -123,9 +137,9 @@ class Validate:
             if b == False or b == 0 or b == '0' or b == 'false' or b == 'f' or b == 'off' or b == 'no' or b == 'x':
                 return True
 
-            return opts.message
+            return message
 
-        return func
+        return Validate._compile(opts, func)
 
     #################################################################
     #
@@ -143,23 +157,20 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            if common != None:
-                return opts.message if common == False else True
-
             typ = type(val)
             if typ is int or typ is float:
                 return True
 
             num = str(val).replace(decimal, '').strip()
             if num == '' or not num.isnumeric():
-                return opts.message
+                return message
 
             return True
 
-        return func
+        return Validate._compile(opts, func)
 
     @staticmethod
     def min_num(min: float, decimal: Optional[str] = '.', cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -172,20 +183,22 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
+
+        numeric = Validate.numeric(decimal, cfg)
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            numeric = Validate.numeric(decimal, cfg)(val, data, host)
-            if numeric != True:
-                return opts.message
+            if numeric(val, data, host) != True:
+                return message
 
             if decimal != '.':
                 num = str(val).replace(decimal, '.')
             else:
                 num = val
 
-            return opts.message if float(val) < min else True
+            return message if float(num) < min else True
 
-        return func
+        return Validate._compile(opts, func)
 
     @staticmethod
     def max_num(max: float, decimal: Optional[str] ='.', cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -198,20 +211,22 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
+
+        numeric = Validate.numeric(decimal, cfg)
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            numeric = Validate.numeric(decimal, cfg)(val, data, host)
-            if numeric != True:
-                return opts.message
+            if numeric(val, data, host) != True:
+                return message
 
             if decimal != '.':
                 num = str(val).replace(decimal, '.')
             else:
                 num = val
 
-            return opts.message if float(val) > max else True
+            return message if float(num) > max else True
 
-        return func
+        return Validate._compile(opts, func)
 
     @staticmethod
     def min_max_num(min: float, max: float, decimal: Optional[str] = '.', cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -225,11 +240,13 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
+
+        numeric = Validate.numeric(decimal, cfg)
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            numeric = Validate.numeric(decimal, cfg)(val, data, host)
-            if numeric != True:
-                return opts.message
+            if numeric(val, data, host) != True:
+                return message
 
             if decimal != '.':
                 num = str(val).replace(decimal, '.')
@@ -239,11 +256,11 @@ class Validate:
             num = float(num)
 
             if num < min or num > max:
-                return opts.message
+                return message
 
             return True
 
-        return func
+        return Validate._compile(opts, func)
 
     #################################################################
     #
@@ -261,18 +278,15 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            if common != None:
-                return opts.message if common == False else True
+            return message if len(val) < min else True
 
-            return opts.message if len(val) < min else True
-
-        return func
+        return Validate._compile(opts, func)
 
     @staticmethod
-    def max_len(min: int, cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
+    def max_len(max: int, cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
         """
         Check for a numeric input and that it is greater than a given value.
         :param int max: Maximum length
@@ -281,15 +295,12 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            if common != None:
-                return opts.message if common == False else True
+            return message if len(val) > max else True
 
-            return opts.message if len(val) > max else True
-
-        return func
+        return Validate._compile(opts, func)
 
     @staticmethod
     def min_max_len(min: int, max: int, cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -302,16 +313,13 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            if common != None:
-                return opts.message if common == False else True
-
             length = len(val)
-            return opts.message if length < min or length > max else True
+            return message if length < min or length > max else True
 
-        return func
+        return Validate._compile(opts, func)
 
     @staticmethod
     def email(cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -322,19 +330,13 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
+        match = _EMAIL.match
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            if common != None:
-                return opts.message if common == False else True
-
-            res = re.match(
-                r'^(([^<>()\[\]\.,;:\s@\"]+(\.[^<>()\[\]\.,;:\s@\"]+)*)|(\".+\"))@(([^<>()[\]\.,;:\s@\"]+\.)+[^<>()[\]\.,;:\s@\"]{2,})$',
-                val)
+            return True if match(val) else message
 
-            return True if res else opts.message
-
-        return func
+        return Validate._compile(opts, func)
 
     @staticmethod
     def ip(cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -345,27 +347,13 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
+        match = _IPV4.fullmatch
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            if common != None:
-                return opts.message if common == False else True
-
-            ipaddr = val.split('.')
-            if len(ipaddr) != 4:
-                return opts.message
-
-            for ip in ipaddr:
-                if not ip.isdigit():
-                    return opts.message
-
-                i = int(ip)
-                if i < 0 or i > 255:
-                    return opts.message
+            return True if match(val) else message
 
-            return True
-
-        return func
+        return Validate._compile(opts, func)
 
     @staticmethod
     def url(cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -376,21 +364,26 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
+        scheme = _URL_SCHEME.match
+
+        # Only loaded when a URL validator is used
+        import validators
+
+        check = validators.url
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            if common != None:
-                return opts.message if common == False else True
+            # Anything without a scheme can't be valid, so is rejected
+            # without the full check
+            if type(val) is not str or not scheme(val):
+                return message
 
             try:
-                if validators.url(val) != True:
-                    return opts.message
-            except:
-                return opts.message
+                return True if check(val) == True else message
+            except Exception:
+                return message
 
-            return True
-
-        return func
+        return Validate._compile(opts, func)
 
     @staticmethod
     def xss(cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -401,15 +394,12 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            if common != None:
-                return opts.message if common == False else True
-
-            return True if host.field._xss_safety(val) == val else opts.message
+            return True if host.field._xss_safety(val) == val else message
 
-        return func
+        return Validate._compile(opts, func)
 
     @staticmethod
     def values(arr: List, cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -421,15 +411,12 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            if common != None:
-                return opts.message if common == False else True
-
-            return True if val in arr else opts.message
+            return True if val in arr else message
 
-        return func
+        return Validate._compile(opts, func)
 
     @staticmethod
     def no_tags(cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -440,15 +427,13 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
+        search = _TAGS.search
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            if common != None:
-                return opts.message if common == False else True
+            return message if search(val) else True
 
-            return opts.message if re.search(r'<.*>', val) else True
-
-        return func
+        return Validate._compile(opts, func)
 
     @staticmethod
     def date_format(format: str, cfg: Optional[Dict] = {}) -> Callable[[str, dict, ValidationHost], bool]:
@@ -460,24 +445,21 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
 
         def func(val: str, data: dict, host: ValidationHost) -> bool:
-            common = Validate.__common(val, opts)
-            if common != None:
-                return opts.message if common == False else True
-
             try:
                 # If reformatting doesn't match, means not right
                 df = datetime.datetime.strptime(val, format)
                 dfs = df.strftime(format)
                 if dfs != val:
-                    return opts.message
+                    return message
             except:
-                return opts.message
+                return message
 
             return True
 
-        return func
+        return Validate._compile(opts, func)
 
     #############################
     # Database validation
@@ -496,20 +478,12 @@ class Validate:
         :rtype: function
         """
         opts = ValidationOptions.select(cfg)
+        message = opts.message
 
-        def func(val: str, data: dict, host: ValidationHost) -> bool:
-            nonlocal db, table, column
-            common = Validate.__common(val, opts)
-            options = host.field.options()
-
-            if common != None:
-                return opts.message if common == False else True
+        def resolve(host: ValidationHost) -> tuple:
+            nonlocal table, column
 
-            if val in values:
-                return True
-
-            if db == None:
-                db = host.editor._engine
+            options = host.field.options()
 
             if table == None:
                 table = options.table()
@@ -522,15 +496,71 @@ class Validate:
                     "Table or column for database value check is not defined for field "
                     + host.field.name())
 
-            with db.connect() as connection:
+            # Picked per call, as read replicas can spread the lookups
+            return host.editor._reader() if db == None else db, table, column
+
+        def func(val: str, data: dict, host: ValidationHost) -> bool:
+            if val in values:
+                return True
+
+            engine, table, column = resolve(host)
+
+            with engine.connect() as connection:
                 sql = text(
                     f"SELECT {column} FROM {table} WHERE {column} = :val")
 
                 res = connection.execute(sql, {"val": val}).fetchall()
 
-                return True if len(res) else opts.message
+                return True if len(res) else message
+
+        def batch(vals: List, rows: List[dict], host: ValidationHost) -> List:
+            # Used by bulk import - the values not in `values` are looked up
+            # with one query per chunk of distinct values, rather than one
+            # query per value
+            results = []
+            lookup = set()
+
+            for val, row in zip(vals, rows):
+                if val is None or val == '':
+                    results.append(validate(val, row, host))
+                elif val in values:
+                    results.append(True)
+                else:
+                    results.append(None)
+                    lookup.add(str(val))
+
+            if len(lookup) == 0:
+                return results
+
+            engine, table, column = resolve(host)
+            found = set()
+            lookup = list(lookup)
+            sql = text(
+                f"SELECT {column} FROM {table} WHERE {column} IN :vals"
+            ).bindparams(bindparam('vals', expanding=True))
+
+            if host.connection is not None and (db == None or db is host.editor._engine):
+                # Read in the import's own transaction - another connection
+                # can be locked out by its writes
+                for i in range(0, len(lookup), 500):
+                    res = host.connection.execute(sql, {"vals": lookup[i:i + 500]})
+                    found.update(str(row[0]) for row in res)
+            else:
+                with engine.connect() as connection:
+                    for i in range(0, len(lookup), 500):
+                        res = connection.execute(sql, {"vals": lookup[i:i + 500]})
+                        found.update(str(row[0]) for row in res)
 
-        return func
+            # Values are compared as strings, since the submitted data is text
+            return [
+                (True if str(val) in found else message) if res is None else res
+                for val, res in zip(vals, results)
+            ]
+
+        validate = Validate._compile(opts, func)
+        validate.batch = batch
+
+        return validate
 
     # TK COLIN
     # TK COLIN db_unique
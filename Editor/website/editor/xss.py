@@ -0,0 +1,66 @@
+import re
+
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+# Characters that `bleach.clean` changes - markup characters and the control
+# characters other than tab and new line. A string without any of them is
+# returned unchanged, so there is no need to run the sanitiser on it.
+_UNSAFE = re.compile(r'[\x00-\x08\x0b-\x1f&<>]')
+
+
+def _bleach(val: str) -> str:
+    """
+    Run `bleach.clean`, which is only imported once a value needs it.
+
+    :param val: Value to clean
+    :return: Cleaned value
+    """
+    import bleach
+
+    return bleach.clean(val)
+
+
+def sanitizer(fn: Optional[Callable[[str], str]] = None, cache: Optional[int] = 4096) -> Callable[[Any], Any]:
+    """
+    Create an XSS sanitiser for use with `Field.xss`, which caches the cleaned
+    value for recently seen strings.
+
+    When no function is given, `bleach.clean` is used, and strings which
+    contain no markup or control characters are returned as they are without
+    calling it. As a custom function may change other characters, it is only
+    cached, so it must always give the same result for the same value.
+
+    :param fn: Sanitiser to wrap. `bleach.clean` if not given.
+    :param cache: Number of cleaned values to keep. `None` for no limit.
+    :return: Sanitiser function. `cache_info()` and `cache_clear()` are
+        available on it.
+    :rtype: function
+    """
+    cached = lru_cache(maxsize=cache)(_bleach if fn is None else fn)
+
+    if fn is None:
+        search = _UNSAFE.search
+
+        def clean(val: Any) -> Any:
+            # Non-strings (numbers etc.) contain nothing to clean
+            if type(val) is not str or search(val) is None:
+                return val
+
+            return cached(val)
+    else:
+        def clean(val: Any) -> Any:
+            try:
+                return cached(val)
+            except TypeError:
+                # Unhashable value
+                return fn(val)
+
+    clean.cache_info = cached.cache_info
+    clean.cache_clear = cached.cache_clear
+
+    return clean
+
+
+# Default sanitiser, shared by all fields
+clean = sanitizer()